@@ -3,7 +3,7 @@ from django.utils.translation import gettext_lazy as _
 from django.utils.html import format_html
 from django.db.models import Count
 
-from jobs.models import Company, Job
+from jobs.models import Company, Job, JobRequiredSkill
 
 
 class JobInline(admin.TabularInline):
@@ -80,13 +80,21 @@ class CompanyAdmin(admin.ModelAdmin):
         return obj.user == request.user
 
 
+class JobRequiredSkillInline(admin.TabularInline):
+    model = JobRequiredSkill
+    verbose_name = _("Требуемый навык")
+    verbose_name_plural = _("Требуемые навыки")
+    extra = 1
+    autocomplete_fields = ['skill']
+
+
 @admin.register(Job)
 class JobAdmin(admin.ModelAdmin):
     list_display = ('title', 'company', 'status', 'location', 'salary_display', 'created_at')
     list_filter = ('status', 'created_at', 'company')
     search_fields = ('title', 'company__name', 'location', 'description')
-    filter_horizontal = ('required_skills',)
     readonly_fields = ('created_at', 'updated_at')
+    inlines = [JobRequiredSkillInline]
     prepopulated_fields = {"slug": ("title",)}
     
     fieldsets = (
@@ -94,7 +102,7 @@ class JobAdmin(admin.ModelAdmin):
             'fields': ('title', 'slug', 'company', 'status', 'description', 'requirements')
         }),
         (_('Требования и условия'), {
-            'fields': ('salary_min', 'salary_max', 'location', 'required_skills')
+            'fields': ('salary_min', 'salary_max', 'location')
         }),
         (_('Метаданные'), {
             'fields': ('created_at', 'updated_at'),
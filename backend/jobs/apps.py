@@ -8,4 +8,7 @@ class JobsConfig(AppConfig):
     verbose_name = _('Вакансии и компании')
     
     def ready(self):
-        import jobs.signals  
\ No newline at end of file
+        from django.db.models.signals import post_migrate
+        import jobs.signals
+        
+        post_migrate.connect(jobs.signals.match_table_post_migrate_handler, sender=self)  
\ No newline at end of file
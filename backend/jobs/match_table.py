@@ -0,0 +1,265 @@
+import logging
+from typing import Dict, Iterable, List, Optional, Set
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from jobs.matching import JOBS, METRIC_RELEVANCE, RESUMES, Match, get_idf_weights, get_skill_matrix
+
+logger = logging.getLogger(__name__)
+
+# Сколько лучших резюме хранится для каждой вакансии по умолчанию
+DEFAULT_TABLE_LIMIT = 500
+
+# Вакансий в одном умножении матриц и в одном запросе к БД
+REFRESH_BLOCK_SIZE = 256
+
+# Изменение оценки, при котором строка таблицы перезаписывается
+SCORE_TOLERANCE = 1e-5
+
+PENDING_KEY = 'matching:table:pending:{kind}:{row_id}'
+DEFAULT_PENDING_TTL = 60 * 10
+
+
+def get_table_limit() -> int:
+    return getattr(settings, 'RESUME_JOB_MATCH_LIMIT', DEFAULT_TABLE_LIMIT)
+
+
+def _blocks(ids: List[int]) -> Iterable[List[int]]:
+    for start in range(0, len(ids), REFRESH_BLOCK_SIZE):
+        yield ids[start:start + REFRESH_BLOCK_SIZE]
+
+
+def refresh_job_matches(job_ids: Iterable[int]) -> int:
+    """
+    Пересчитывает лучшие резюме вакансий по матрице навыков резюме и
+    записывает в ResumeJobMatch только разницу с сохраненными строками.
+    У неактивных и удаленных вакансий строки удаляются. Возвращает число
+    измененных строк.
+    """
+    from jobs.models import Job, JobRequiredSkill, ResumeJobMatch
+    from resumes.models import Resume
+
+    resumes = get_skill_matrix(RESUMES)
+    idf = get_idf_weights()
+    limit = get_table_limit()
+    changed = 0
+
+    for block in _blocks(sorted(set(job_ids))):
+        job_skills: Dict[int, Dict[int, float]] = {}
+        links = JobRequiredSkill.objects.filter(job_id__in=block, job__status=Job.ACTIVE)
+        for job_id, skill_id, importance in links.values_list('job_id', 'skill_id', 'importance'):
+            job_skills.setdefault(job_id, {})[skill_id] = JobRequiredSkill.IMPORTANCE_WEIGHTS.get(importance, 1.0)
+
+        ranked = list(job_skills)
+        results = resumes.match_many([job_skills[job_id] for job_id in ranked], METRIC_RELEVANCE, limit, idf)
+        wanted = {job_id: {match.id: match for match in matches} for job_id, (matches, _) in zip(ranked, results)}
+        # Матрица в памяти могла отстать от удаления резюме
+        existing_resumes = set(Resume.objects.filter(
+            id__in={resume_id for matches in wanted.values() for resume_id in matches}
+        ).values_list('id', flat=True))
+
+        stored: Dict[int, Dict[int, ResumeJobMatch]] = {}
+        for row in ResumeJobMatch.objects.filter(job_id__in=block):
+            stored.setdefault(row.job_id, {})[row.resume_id] = row
+
+        now = timezone.now()
+        to_delete: List[int] = []
+        to_update: List[ResumeJobMatch] = []
+        to_create: List[ResumeJobMatch] = []
+        for job_id in block:
+            matches = wanted.get(job_id, {})
+            rows = stored.get(job_id, {})
+            to_delete.extend(row.id for resume_id, row in rows.items() if resume_id not in matches)
+            for resume_id, match in matches.items():
+                if resume_id not in existing_resumes:
+                    continue
+                row = rows.get(resume_id)
+                if row is None:
+                    to_create.append(ResumeJobMatch(
+                        resume_id=resume_id, job_id=job_id, score=match.score,
+                        matching_skills_count=match.overlap, updated_at=now,
+                    ))
+                elif abs(row.score - match.score) > SCORE_TOLERANCE or row.matching_skills_count != match.overlap:
+                    row.score, row.matching_skills_count, row.updated_at = match.score, match.overlap, now
+                    to_update.append(row)
+
+        with transaction.atomic():
+            ResumeJobMatch.objects.filter(id__in=to_delete).delete()
+            ResumeJobMatch.objects.bulk_update(to_update, ['score', 'matching_skills_count', 'updated_at'],
+                                               batch_size=1000)
+            # Резюме, удаленное после проверки, пропускается вместе с конфликтом уникальности
+            ResumeJobMatch.objects.bulk_create(to_create, batch_size=1000, ignore_conflicts=True)
+        changed += len(to_delete) + len(to_update) + len(to_create)
+
+    return changed
+
+
+def refresh_resume_matches(resume_ids: Iterable[int]) -> int:
+    """
+    Обновляет таблицу после изменения навыков резюме: строки самих резюме
+    вставляются, обновляются или удаляются, а вакансии, где строк стало
+    больше лимита, обрезаются. Лучшие резюме вакансии пересчитываются
+    целиком, только если резюме выбыло из заполненной вакансии и без
+    пересчета неизвестно, кто займет освободившееся место. Возвращает число
+    измененных строк.
+    """
+    from jobs.models import ResumeJobMatch
+    from resumes.models import Resume
+
+    resume_ids = sorted(set(resume_ids))
+    jobs_matrix = get_skill_matrix(JOBS)
+    resumes = get_skill_matrix(RESUMES)
+    idf = get_idf_weights()
+    limit = get_table_limit()
+
+    # Новые оценки резюме по всем активным вакансиям - одно умножение матриц.
+    # Оценка симметрична: сумма IDF общих навыков, умноженного на их веса в вакансии и в резюме
+    existing_resumes = set(Resume.objects.filter(id__in=resume_ids).values_list('id', flat=True))
+    queried = [
+        resume_id for resume_id in resume_ids if resume_id in existing_resumes and resume_id in resumes.row_skills
+    ]
+    scores: Dict[int, Dict[int, Match]] = {}
+    results = jobs_matrix.match_many([resumes.row_skills[resume_id] for resume_id in queried], METRIC_RELEVANCE,
+                                     None, idf)
+    for resume_id, (matches, _) in zip(queried, results):
+        for match in matches:
+            scores.setdefault(match.id, {})[resume_id] = match
+
+    stored: Dict[int, Dict[int, ResumeJobMatch]] = {}
+    for row in ResumeJobMatch.objects.filter(resume_id__in=resume_ids):
+        stored.setdefault(row.job_id, {})[row.resume_id] = row
+
+    now = timezone.now()
+    to_delete: List[int] = []
+    to_save: List[ResumeJobMatch] = []
+    to_trim: Set[int] = set()
+    to_refresh: Set[int] = set()
+    for block in _blocks(sorted(set(scores) | set(stored))):
+        # Остальные строки вакансий: их число и худшая оценка
+        others = {
+            row['job_id']: row for row in ResumeJobMatch.objects.filter(job_id__in=block)
+            .exclude(resume_id__in=resume_ids).values('job_id').annotate(rows=Count('id'), lowest=Min('score'))
+        }
+        for job_id in block:
+            new = scores.get(job_id, {})
+            old = stored.get(job_id, {})
+            other = others.get(job_id) or {'rows': 0, 'lowest': None}
+
+            if not other['rows'] and not old:
+                # Строк нет: вакансия еще не рассчитывалась (например, сразу после миграции)
+                # или у нее не было кандидатов - ее лучшие резюме считаются целиком
+                to_refresh.add(job_id)
+                continue
+            if other['rows'] + len(old) < limit:
+                # Вакансия не заполнена: в таблице все подходящие резюме, кандидатов вне ее нет
+                qualified = set(new)
+            else:
+                # Резюме вне таблицы оцениваются не выше худшей сохраненной оценки
+                ceiling = min(
+                    [row.score for row in old.values()] + ([other['lowest']] if other['rows'] else [])
+                )
+                qualified = {resume_id for resume_id, match in new.items() if match.score >= ceiling}
+                if other['rows'] + len(qualified) < limit:
+                    to_refresh.add(job_id)
+                    continue
+
+            to_delete.extend(row.id for resume_id, row in old.items() if resume_id not in qualified)
+            for resume_id in qualified:
+                match, row = new[resume_id], old.get(resume_id)
+                if row is None or abs(row.score - match.score) > SCORE_TOLERANCE \
+                        or row.matching_skills_count != match.overlap:
+                    to_save.append(ResumeJobMatch(
+                        resume_id=resume_id, job_id=job_id, score=match.score,
+                        matching_skills_count=match.overlap, updated_at=now,
+                    ))
+            if other['rows'] + len(qualified) > limit:
+                to_trim.add(job_id)
+
+    with transaction.atomic():
+        ResumeJobMatch.objects.filter(id__in=to_delete).delete()
+        ResumeJobMatch.objects.bulk_create(
+            to_save, batch_size=1000, update_conflicts=True,
+            unique_fields=['resume', 'job'], update_fields=['score', 'matching_skills_count', 'updated_at'],
+        )
+        trimmed = sum(_trim_job(job_id, limit) for job_id in sorted(to_trim))
+    changed = len(to_delete) + len(to_save) + trimmed
+
+    if to_refresh:
+        changed += refresh_job_matches(to_refresh)
+    return changed
+
+
+def _trim_job(job_id: int, limit: int) -> int:
+    """Удаляет строки вакансии за пределами limit лучших."""
+    from jobs.models import ResumeJobMatch
+
+    tail = list(
+        ResumeJobMatch.objects.filter(job_id=job_id).order_by('-score', '-resume_id')
+        .values_list('id', flat=True)[limit:]
+    )
+    if not tail:
+        return 0
+    deleted, _ = ResumeJobMatch.objects.filter(id__in=tail).delete()
+    return deleted
+
+
+def rebuild_matches() -> int:
+    """Полный пересчет таблицы, например после пересчета весов IDF."""
+    from jobs.models import Job, ResumeJobMatch
+
+    active = list(Job.objects.filter(status=Job.ACTIVE).values_list('id', flat=True))
+    deleted, _ = ResumeJobMatch.objects.exclude(job__status=Job.ACTIVE).delete()
+    changed = deleted + refresh_job_matches(active)
+    logger.info(f"Таблица совпадений резюме и вакансий пересчитана: {len(active)} вакансий, {changed} строк изменено")
+    return changed
+
+
+def _pending_keys(kind: str, row_ids: Iterable[int]) -> List[str]:
+    return [PENDING_KEY.format(kind=kind, row_id=row_id) for row_id in row_ids]
+
+
+def schedule_refresh(kind: str, row_ids: Optional[Iterable[int]]) -> None:
+    """
+    Ставит обновление таблицы для измененных вакансий (JOBS) или резюме
+    (RESUMES) после фиксации транзакции. Строки, обновление которых уже
+    ожидает в очереди, пропускаются; без row_ids таблица пересчитывается целиком.
+    """
+    row_ids = sorted(set(row_ids)) if row_ids is not None else None
+    transaction.on_commit(lambda: _enqueue(kind, row_ids))
+
+
+def _enqueue(kind: str, row_ids: Optional[List[int]]) -> None:
+    from jobs.tasks import rebuild_resume_job_matches, refresh_job_matches_task, refresh_resume_matches_task
+
+    try:
+        if row_ids is None:
+            rebuild_resume_job_matches.delay()
+            return
+
+        try:
+            ttl = getattr(settings, 'MATCH_TABLE_PENDING_TTL', DEFAULT_PENDING_TTL)
+            row_ids = [
+                row_id for row_id, key in zip(row_ids, _pending_keys(kind, row_ids)) if cache.add(key, True, ttl)
+            ]
+        except Exception as e:
+            # Без общего кэша повторные обновления просто выполняются еще раз
+            logger.warning(f"Кэш недоступен при постановке обновления таблицы совпадений: {e}")
+        if not row_ids:
+            return
+
+        task = refresh_job_matches_task if kind == JOBS else refresh_resume_matches_task
+        task.delay(row_ids)
+    except Exception as e:
+        logger.error(f"Не удалось поставить обновление таблицы совпадений {kind}: {e}")
+
+
+def clear_pending(kind: str, row_ids: Iterable[int]) -> None:
+    """Снимает отметки ожидания перед пересчетом: изменения во время него поставят новую задачу."""
+    try:
+        cache.delete_many(_pending_keys(kind, row_ids))
+    except Exception as e:
+        logger.warning(f"Не удалось снять отметки ожидания таблицы совпадений: {e}")
@@ -0,0 +1,454 @@
+import time
+import logging
+import threading
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from scipy import sparse
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Виды строк матриц: активные вакансии и резюме
+JOBS = 'jobs'
+RESUMES = 'resumes'
+# Версия весов IDF навыков, общая для процессов
+IDF = 'idf'
+
+METRIC_RELEVANCE = 'relevance'
+METRIC_OVERLAP = 'overlap'
+METRIC_JACCARD = 'jaccard'
+METRIC_COSINE = 'cosine'
+METRICS = (METRIC_RELEVANCE, METRIC_OVERLAP, METRIC_JACCARD, METRIC_COSINE)
+
+# Число результатов подбора по умолчанию и максимальное
+DEFAULT_MATCH_LIMIT = 20
+MAX_MATCH_LIMIT = 100
+
+MATRIX_VERSION_KEY = 'matching:{kind}:version'
+MATRIX_CHANGE_KEY = 'matching:{kind}:change:{version}'
+
+# Сколько изменений процесс догоняет по ленте; при большем отставании матрица перестраивается
+CHANGE_FEED_LIMIT = 1000
+CHANGE_TTL = 24 * 60 * 60
+
+# Запись ленты, после которой все процессы перестраивают матрицу целиком
+REBUILD = 'rebuild'
+
+# Измененные строки копятся в отдельном блоке; когда их больше этой доли
+# (но не меньше COMPACT_MIN_ROWS), основной блок пересобирается из памяти
+COMPACT_FRACTION = 0.05
+COMPACT_MIN_ROWS = 256
+
+# Навыки строки или запроса: id навыков (вес 1) или словарь id навыка -> вес
+Skills = Union[Iterable[int], Mapping[int, float]]
+
+
+class Match(NamedTuple):
+    id: int
+    score: float
+    overlap: int
+
+
+class _Block(NamedTuple):
+    """
+    Неизменяемая часть матрицы. postings - транспонированная CSR-матрица
+    навык × строка (списки строк каждого навыка) с единицами, weighted - та же
+    матрица с весами навыков строки, sizes - число навыков строки, live - маска
+    строк, не замененных более новыми (None - все действующие).
+    """
+    row_ids: np.ndarray
+    postings: sparse.csr_matrix
+    weighted: sparse.csr_matrix
+    sizes: np.ndarray
+    live: Optional[np.ndarray]
+
+
+def _as_weights(skills: Skills) -> Dict[int, float]:
+    if isinstance(skills, Mapping):
+        return {int(skill_id): float(weight) for skill_id, weight in skills.items() if weight > 0}
+    return dict.fromkeys((int(skill_id) for skill_id in skills), 1.0)
+
+
+def _build_block(row_skills: Dict[int, Dict[int, float]]) -> _Block:
+    row_ids = sorted(row_id for row_id, skills in row_skills.items() if skills)
+    sizes = np.array([len(row_skills[row_id]) for row_id in row_ids], dtype=np.int64)
+    indptr = np.concatenate(([0], np.cumsum(sizes)))
+    rows = [sorted(row_skills[row_id].items()) for row_id in row_ids]
+    indices = np.fromiter((skill_id for row in rows for skill_id, _ in row), dtype=np.int32, count=int(indptr[-1]))
+    weights = np.fromiter((weight for row in rows for _, weight in row), dtype=np.float32, count=int(indptr[-1]))
+    columns = int(indices.max()) + 1 if len(indices) else 0
+    shape = (len(row_ids), columns)
+
+    # Транспонированные матрицы хранятся готовыми: запрос умножается на них без преобразования формата
+    postings = sparse.csr_matrix((np.ones(len(indices), dtype=np.float32), indices, indptr), shape=shape).T.tocsr()
+    if np.all(weights == 1):
+        weighted = postings
+    else:
+        weighted = sparse.csr_matrix((weights, indices, indptr), shape=shape).T.tocsr()
+    return _Block(np.array(row_ids, dtype=np.int64), postings, weighted, sizes.astype(np.float32), None)
+
+
+def _query_matrix(queries: Sequence[Dict[int, float]], columns: int,
+                  idf: Optional[np.ndarray] = None) -> sparse.csr_matrix:
+    """Матрица запросов: с idf - веса навыков запроса, умноженные на IDF, иначе единицы."""
+    indptr = [0]
+    indices: List[int] = []
+    data: List[float] = []
+    for query in queries:
+        for skill_id in sorted(query):
+            if not 0 <= skill_id < columns:
+                continue
+            indices.append(skill_id)
+            if idf is not None:
+                data.append(query[skill_id] * (idf[skill_id] if skill_id < len(idf) else 1.0))
+        indptr.append(len(indices))
+    values = np.array(data, dtype=np.float32) if idf is not None else np.ones(len(indices), dtype=np.float32)
+    return sparse.csr_matrix((values, indices, indptr), shape=(len(queries), columns))
+
+
+def _top(scores: np.ndarray, ids: np.ndarray, limit: Optional[int]) -> np.ndarray:
+    """Индексы limit лучших результатов: по убыванию оценки, при равенстве - сначала больший id."""
+    candidates = np.arange(len(scores))
+    if limit is not None and limit < len(scores):
+        threshold = np.partition(scores, len(scores) - limit)[len(scores) - limit]
+        candidates = np.flatnonzero(scores >= threshold)
+    order = np.lexsort((-ids[candidates], -scores[candidates]))
+    return candidates[order[:limit]]
+
+
+class SkillMatrix:
+    """
+    Разреженная матрица строка × навык (вакансии или резюме) в памяти процесса.
+    Оценки совпадения для целого блока запросов считаются одним умножением
+    разреженных матриц: overlap - число общих навыков, jaccard - overlap / |A ∪ B|,
+    cosine - overlap / sqrt(|A| * |B|), relevance - сумма по общим навыкам
+    IDF навыка, умноженного на веса навыка в запросе и в строке (важность
+    навыка для вакансии).
+
+    Матрица обновляется построчно: основной блок не меняется, прежние версии
+    измененных строк скрываются маской, а новые собираются в небольшой
+    дополнительный блок. Когда измененных строк становится много, основной блок
+    пересобирается. Поиск в других потоках видит либо старое, либо новое
+    состояние целиком.
+    """
+
+    def __init__(self, pairs: Iterable[Tuple] = (), version: Optional[int] = None):
+        """pairs - (id строки, id навыка) или (id строки, id навыка, вес)."""
+        self.version = version
+        self.loaded_at = time.monotonic()
+
+        self.row_skills: Dict[int, Dict[int, float]] = {}
+        for row_id, skill_id, *weight in pairs:
+            self.row_skills.setdefault(row_id, {})[skill_id] = float(weight[0]) if weight else 1.0
+        self._compact()
+
+    def __len__(self) -> int:
+        return len(self.row_skills)
+
+    def _compact(self) -> None:
+        self._changed: Dict[int, Dict[int, float]] = {}
+        self._positions: Optional[Dict[int, int]] = None
+        self._state: Tuple[_Block, Optional[_Block]] = (_build_block(self.row_skills), None)
+
+    def update_row(self, row_id: int, skills: Skills = ()) -> None:
+        """Заменяет навыки строки; пустой набор убирает строку из матрицы."""
+        self.update_rows({row_id: skills})
+
+    def update_rows(self, rows: Mapping[int, Skills]) -> None:
+        """Заменяет навыки нескольких строк с одной пересборкой дополнительного блока."""
+        base, _ = self._state
+        if self._positions is None:
+            self._positions = {row_id: position for position, row_id in enumerate(base.row_ids.tolist())}
+
+        live = base.live.copy() if base.live is not None else np.ones(len(base.row_ids), dtype=bool)
+        changed = False
+        for row_id, row_skills in rows.items():
+            skills = _as_weights(row_skills)
+            if self.row_skills.get(row_id, {}) == skills:
+                continue
+            if skills:
+                self.row_skills[row_id] = skills
+            else:
+                self.row_skills.pop(row_id, None)
+            self._changed[row_id] = skills
+            changed = True
+
+            position = self._positions.get(row_id)
+            if position is not None:
+                live[position] = False
+
+        if not changed:
+            return
+        if len(self._changed) > max(COMPACT_MIN_ROWS, len(self.row_skills) * COMPACT_FRACTION):
+            self._compact()
+            return
+
+        delta = _build_block(self._changed)
+        self._state = (base._replace(live=live), delta if len(delta.row_ids) else None)
+
+    def match(self, skills: Skills, metric: str = METRIC_OVERLAP, limit: Optional[int] = None,
+              idf: Optional[np.ndarray] = None) -> Tuple[List[Match], int]:
+        """Лучшие строки для одного набора навыков и общее число строк с общими навыками."""
+        return self.match_many([skills], metric, limit, idf)[0]
+
+    def match_many(self, queries: Sequence[Skills], metric: str = METRIC_OVERLAP, limit: Optional[int] = None,
+                   idf: Optional[np.ndarray] = None) -> List[Tuple[List[Match], int]]:
+        """
+        Для каждого набора навыков - лучшие строки и общее число строк с общими
+        навыками. idf - веса навыков по id для метрики relevance (без них - 1).
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Неизвестная метрика: {metric}")
+
+        queries = [_as_weights(skills) for skills in queries]
+        if metric == METRIC_RELEVANCE and idf is None:
+            idf = np.ones(0, dtype=np.float32)
+
+        parts = [self._score_block(block, queries, metric, idf) for block in self._state if block]
+        if len(parts) == 1:
+            query_numbers, ids, scores, overlaps = parts[0]
+        else:
+            query_numbers, ids, scores, overlaps = (np.concatenate(column) for column in zip(*parts))
+            # Части уже упорядочены по номеру запроса, устойчивая сортировка лишь сливает их
+            order = np.argsort(query_numbers, kind='stable')
+            query_numbers, ids, scores, overlaps = (
+                query_numbers[order], ids[order], scores[order], overlaps[order]
+            )
+        bounds = np.searchsorted(query_numbers, np.arange(len(queries) + 1))
+
+        results = []
+        for number, query in enumerate(queries):
+            start, end = bounds[number], bounds[number + 1]
+            top = _top(scores[start:end], ids[start:end], limit) + start
+            matches = []
+            for i in top:
+                row_id = int(ids[i])
+                # Для relevance число общих навыков считается только у отобранных строк
+                overlap = int(overlaps[i]) if overlaps[i] >= 0 else len(
+                    query.keys() & self.row_skills.get(row_id, {}).keys()
+                )
+                matches.append(Match(row_id, float(scores[i]), overlap))
+            results.append((matches, int(end - start)))
+        return results
+
+    @staticmethod
+    def _score_block(block: _Block, queries: Sequence[Dict[int, float]], metric: str, idf: Optional[np.ndarray]):
+        """
+        Все ненулевые совпадения запросов со строками блока: (номер запроса,
+        id строки, оценка, overlap); для relevance overlap равен -1.
+        """
+        columns = block.postings.shape[0]
+        if metric == METRIC_RELEVANCE:
+            product = (_query_matrix(queries, columns, idf) @ block.weighted).tocsr()
+        else:
+            product = (_query_matrix(queries, columns) @ block.postings).tocsr()
+        query_numbers = np.repeat(np.arange(len(queries)), np.diff(product.indptr))
+        positions = product.indices
+        values = product.data
+        if block.live is not None:
+            keep = block.live[positions]
+            query_numbers, positions, values = query_numbers[keep], positions[keep], values[keep]
+
+        if metric == METRIC_RELEVANCE:
+            return (query_numbers, block.row_ids[positions], values.astype(np.float32),
+                    np.full(len(values), -1, dtype=np.int32))
+
+        query_sizes = np.array([len(query) for query in queries], dtype=np.float32)
+        if metric == METRIC_JACCARD:
+            scores = values / (query_sizes[query_numbers] + block.sizes[positions] - values)
+        elif metric == METRIC_COSINE:
+            scores = values / np.sqrt(query_sizes[query_numbers] * block.sizes[positions])
+        else:
+            scores = values
+        return query_numbers, block.row_ids[positions], scores.astype(np.float32), values.astype(np.int32)
+
+
+def match_all(source: SkillMatrix, target: SkillMatrix, metric: str = METRIC_OVERLAP, limit: int = 50,
+              block_size: int = 256, idf: Optional[np.ndarray] = None) -> Iterator[Tuple[int, List[Match]]]:
+    """
+    Лучшие строки target для каждой строки source, например 50 лучших
+    кандидатов для каждой активной вакансии. Строки source обрабатываются
+    блоками по block_size: одно умножение матриц на блок.
+    """
+    row_ids = sorted(source.row_skills)
+    for start in range(0, len(row_ids), block_size):
+        block_ids = row_ids[start:start + block_size]
+        results = target.match_many([source.row_skills[row_id] for row_id in block_ids], metric, limit, idf)
+        for row_id, (matches, _) in zip(block_ids, results):
+            yield row_id, matches
+
+
+def get_match_options(query_params) -> Tuple[str, int]:
+    """Метрика и число результатов из параметров запроса (?metric=, ?limit=)."""
+    metric = query_params.get('metric') or METRIC_RELEVANCE
+    if metric not in METRICS:
+        raise ValueError(f"Метрика должна быть одной из: {', '.join(METRICS)}")
+    try:
+        limit = int(query_params.get('limit', DEFAULT_MATCH_LIMIT))
+    except ValueError:
+        limit = DEFAULT_MATCH_LIMIT
+    return metric, min(max(limit, 1), MAX_MATCH_LIMIT)
+
+
+def _row_pairs(kind: str, row_ids: Optional[Iterable[int]] = None):
+    """(id строки, id навыка, вес): для вакансий вес задает важность навыка."""
+    if kind == JOBS:
+        from jobs.models import JobRequiredSkill, Job
+        queryset = JobRequiredSkill.objects.filter(job__status=Job.ACTIVE)
+        if row_ids is not None:
+            queryset = queryset.filter(job_id__in=list(row_ids))
+        return (
+            (job_id, skill_id, JobRequiredSkill.IMPORTANCE_WEIGHTS.get(importance, 1.0))
+            for job_id, skill_id, importance in queryset.values_list('job_id', 'skill_id', 'importance')
+            .iterator(chunk_size=10000)
+        )
+
+    from resumes.models import Resume
+    queryset = Resume.skills.through.objects.all()
+    if row_ids is not None:
+        queryset = queryset.filter(resume_id__in=list(row_ids))
+    return queryset.values_list('resume_id', 'skill_id').iterator(chunk_size=10000)
+
+
+def load_skill_matrix(kind: str, version: Optional[int] = None) -> SkillMatrix:
+    matrix = SkillMatrix(_row_pairs(kind), version=version)
+    logger.info(f"Загружена матрица навыков {kind}: {len(matrix)} строк (версия {version})")
+    return matrix
+
+
+_matrices: Dict[str, SkillMatrix] = {}
+_matrices_lock = threading.Lock()
+
+
+def _get_shared_version(kind: str) -> Optional[int]:
+    key = MATRIX_VERSION_KEY.format(kind=kind)
+    version = cache.get(key)
+    if version is None:
+        # Ключ отсутствует (первый запуск или вытеснение) - инициализируем значением,
+        # которое не совпадет ни с одной ранее выданной версией
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _catch_up(kind: str, matrix: SkillMatrix, version: int) -> bool:
+    """
+    Применяет к матрице изменения из общей ленты до версии version.
+    False - ленту не удалось прочитать целиком, матрицу нужно перестроить.
+    """
+    if matrix.version is None or not 0 < version - matrix.version <= CHANGE_FEED_LIMIT:
+        return False
+
+    keys = [MATRIX_CHANGE_KEY.format(kind=kind, version=v) for v in range(matrix.version + 1, version + 1)]
+    changes = cache.get_many(keys)
+    if len(changes) != len(keys) or REBUILD in changes.values():
+        return False
+
+    row_ids = set(chain.from_iterable(changes.values()))
+    skills: Dict[int, Dict[int, float]] = {row_id: {} for row_id in row_ids}
+    for row_id, skill_id, *weight in _row_pairs(kind, row_ids):
+        skills[row_id][skill_id] = weight[0] if weight else 1.0
+    matrix.update_rows(skills)
+
+    matrix.version = version
+    return True
+
+
+def get_skill_matrix(kind: str) -> SkillMatrix:
+    """
+    Возвращает матрицу навыков активных вакансий (JOBS) или резюме (RESUMES)
+    текущего процесса.
+
+    Сигналы записывают id измененных строк в общую ленту в кэше и увеличивают
+    ее версию. Отставший процесс перечитывает из БД только эти строки; если
+    записи ленты вытеснены или отставание больше CHANGE_FEED_LIMIT, матрица
+    перестраивается целиком. Если общий кэш недоступен, матрица
+    перестраивается не чаще SKILL_MATRIX_MAX_AGE секунд.
+    """
+    with _matrices_lock:
+        matrix = _matrices.get(kind)
+        try:
+            version = _get_shared_version(kind)
+        except Exception as e:
+            logger.warning(f"Не удалось получить версию матрицы навыков {kind} из кэша: {e}")
+            max_age = getattr(settings, 'SKILL_MATRIX_MAX_AGE', 60)
+            if matrix is None or time.monotonic() - matrix.loaded_at > max_age:
+                matrix = _matrices[kind] = load_skill_matrix(kind)
+            return matrix
+
+        if matrix is None or matrix.version != version:
+            try:
+                caught_up = matrix is not None and _catch_up(kind, matrix, version)
+            except Exception as e:
+                logger.warning(f"Не удалось применить изменения матрицы навыков {kind}: {e}")
+                caught_up = False
+            if not caught_up:
+                matrix = _matrices[kind] = load_skill_matrix(kind, version)
+
+        return matrix
+
+
+def publish_changes(kind: str, row_ids: Optional[Iterable[int]] = None) -> None:
+    """
+    Добавляет в ленту изменений id вакансий или резюме, навыки (или статус
+    вакансии) которых изменились. Без row_ids все процессы перестроят матрицу целиком.
+    """
+    change = sorted(set(row_ids)) if row_ids is not None else REBUILD
+    try:
+        try:
+            version = cache.incr(MATRIX_VERSION_KEY.format(kind=kind))
+        except ValueError:
+            # Версии нет в кэше: процессы перестроят матрицу при ее инициализации
+            _get_shared_version(kind)
+            return
+        cache.set(MATRIX_CHANGE_KEY.format(kind=kind, version=version), change, CHANGE_TTL)
+    except Exception as e:
+        logger.error(f"Не удалось записать изменение матрицы навыков {kind}: {e}")
+
+
+_idf_weights: Optional[np.ndarray] = None
+_idf_version: Optional[int] = None
+_idf_loaded_at = 0.0
+_idf_lock = threading.Lock()
+
+
+def get_idf_weights() -> np.ndarray:
+    """
+    Веса IDF навыков текущего процесса: массив, индекс - id навыка, для
+    навыков без посчитанного веса - 1. Перечитываются из БД, когда задача
+    refresh_skill_idf_weights увеличивает общую версию весов; без общего
+    кэша - не чаще SKILL_MATRIX_MAX_AGE секунд.
+    """
+    global _idf_weights, _idf_version, _idf_loaded_at
+    with _idf_lock:
+        try:
+            version = _get_shared_version(IDF)
+            stale = _idf_weights is None or version != _idf_version
+        except Exception as e:
+            logger.warning(f"Не удалось получить версию весов IDF из кэша: {e}")
+            version = None
+            max_age = getattr(settings, 'SKILL_MATRIX_MAX_AGE', 60)
+            stale = _idf_weights is None or time.monotonic() - _idf_loaded_at > max_age
+
+        if stale:
+            from resumes.models import Skill
+            rows = list(Skill.objects.values_list('id', 'idf_weight'))
+            weights = np.ones(max((skill_id for skill_id, _ in rows), default=0) + 1, dtype=np.float32)
+            for skill_id, weight in rows:
+                weights[skill_id] = weight
+            _idf_weights, _idf_version, _idf_loaded_at = weights, version, time.monotonic()
+        return _idf_weights
+
+
+def publish_idf_weights() -> None:
+    """Сообщает всем процессам, что веса IDF навыков пересчитаны."""
+    try:
+        try:
+            cache.incr(MATRIX_VERSION_KEY.format(kind=IDF))
+        except ValueError:
+            _get_shared_version(IDF)
+    except Exception as e:
+        logger.error(f"Не удалось обновить версию весов IDF: {e}")
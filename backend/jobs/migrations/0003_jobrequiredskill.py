@@ -0,0 +1,49 @@
+# Generated by Django 5.2 on 2026-10-18 05:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    Явная промежуточная модель для Job.required_skills поверх существующей
+    таблицы jobs_job_required_skills: в состоянии миграций создается модель,
+    в базе данных только добавляется столбец importance.
+    """
+
+    dependencies = [
+        ('jobs', '0002_alter_company_options_alter_job_options_company_slug_and_more'),
+        ('resumes', '0006_skill_idf_weight'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='JobRequiredSkill',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skill_links', to='jobs.job', verbose_name='вакансия')),
+                        ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_links', to='resumes.skill', verbose_name='навык')),
+                    ],
+                    options={
+                        'verbose_name': 'требуемый навык',
+                        'verbose_name_plural': 'требуемые навыки',
+                        'db_table': 'jobs_job_required_skills',
+                        'unique_together': {('job', 'skill')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='job',
+                    name='required_skills',
+                    field=models.ManyToManyField(blank=True, related_name='jobs', through='jobs.JobRequiredSkill', to='resumes.skill', verbose_name='требуемые навыки'),
+                ),
+            ],
+            database_operations=[],
+        ),
+        migrations.AddField(
+            model_name='jobrequiredskill',
+            name='importance',
+            field=models.CharField(choices=[('required', 'Обязательный'), ('nice_to_have', 'Желательный')], default='required', max_length=20, verbose_name='важность'),
+        ),
+    ]
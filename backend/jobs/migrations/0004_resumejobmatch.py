@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-18 05:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0003_jobrequiredskill'),
+        ('resumes', '0006_skill_idf_weight'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumeJobMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='оценка')),
+                ('matching_skills_count', models.PositiveIntegerField(verbose_name='число общих навыков')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='дата обновления')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resume_matches', to='jobs.job', verbose_name='вакансия')),
+                ('resume', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_matches', to='resumes.resume', verbose_name='резюме')),
+            ],
+            options={
+                'verbose_name': 'совпадение резюме и вакансии',
+                'verbose_name_plural': 'совпадения резюме и вакансий',
+                'indexes': [models.Index(fields=['job', '-score', '-resume'], name='jobs_match_job_score_idx')],
+                'unique_together': {('resume', 'job')},
+            },
+        ),
+    ]
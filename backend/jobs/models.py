@@ -1,9 +1,9 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.core.validators import MinValueValidator, URLValidator
 from django.utils.translation import gettext_lazy as _
 from django.utils.text import slugify
-from resumes.models import Skill
+from resumes.models import Resume, Skill
 from typing import Optional, List, Set
 
 
@@ -101,6 +101,7 @@ class Job(models.Model):
     required_skills = models.ManyToManyField(
         Skill, 
         blank=True,
+        through='JobRequiredSkill',
         related_name='jobs',
         verbose_name=_('требуемые навыки')
     )
@@ -162,4 +163,103 @@ class Job(models.Model):
         return "Договорная"
     
     def get_required_skills_list(self) -> List[str]:
-        return list(self.required_skills.values_list('name', flat=True))
\ No newline at end of file
+        return list(self.required_skills.values_list('name', flat=True))
+    
+    def set_required_skills(self, skills, nice_to_have=()) -> None:
+        """Заменяет требуемые навыки вакансии; навыки из nice_to_have отмечаются как желательные."""
+        nice_to_have_ids = {getattr(skill, 'pk', skill) for skill in nice_to_have}
+        skill_ids = {getattr(skill, 'pk', skill) for skill in skills} | nice_to_have_ids
+        
+        self.required_skills.set(skill_ids)
+        links = self.skill_links.all()
+        updated = links.filter(skill_id__in=nice_to_have_ids).exclude(
+            importance=JobRequiredSkill.NICE_TO_HAVE
+        ).update(importance=JobRequiredSkill.NICE_TO_HAVE)
+        updated += links.exclude(skill_id__in=nice_to_have_ids).exclude(
+            importance=JobRequiredSkill.REQUIRED
+        ).update(importance=JobRequiredSkill.REQUIRED)
+        
+        if updated:
+            # update() не вызывает сигналов, а важность навыка влияет на ранжирование
+            from jobs.match_table import schedule_refresh
+            from jobs.matching import JOBS, publish_changes
+            transaction.on_commit(lambda: publish_changes(JOBS, [self.pk]))
+            schedule_refresh(JOBS, [self.pk])
+
+
+class JobRequiredSkill(models.Model):
+    REQUIRED = 'required'
+    NICE_TO_HAVE = 'nice_to_have'
+    
+    IMPORTANCE_CHOICES = (
+        (REQUIRED, _('Обязательный')),
+        (NICE_TO_HAVE, _('Желательный')),
+    )
+    
+    # Множитель веса навыка при ранжировании
+    IMPORTANCE_WEIGHTS = {
+        REQUIRED: 1.0,
+        NICE_TO_HAVE: 0.5,
+    }
+    
+    job = models.ForeignKey(
+        Job,
+        on_delete=models.CASCADE,
+        related_name='skill_links',
+        verbose_name=_('вакансия')
+    )
+    skill = models.ForeignKey(
+        Skill,
+        on_delete=models.CASCADE,
+        related_name='job_links',
+        verbose_name=_('навык')
+    )
+    importance = models.CharField(
+        _('важность'),
+        max_length=20,
+        choices=IMPORTANCE_CHOICES,
+        default=REQUIRED
+    )
+    
+    class Meta:
+        # Таблица прежней автоматической связи required_skills
+        db_table = 'jobs_job_required_skills'
+        verbose_name = _('требуемый навык')
+        verbose_name_plural = _('требуемые навыки')
+        unique_together = [('job', 'skill')]
+    
+    def __str__(self) -> str:
+        return f"{self.skill} ({self.get_importance_display()})"
+
+class ResumeJobMatch(models.Model):
+    """
+    Лучшие резюме для активной вакансии по релевантности навыков. Таблица
+    обновляется фоновыми задачами (см. jobs.match_table), подбор кандидатов
+    читает ее одним индексированным запросом.
+    """
+    resume = models.ForeignKey(
+        Resume,
+        on_delete=models.CASCADE,
+        related_name='job_matches',
+        verbose_name=_('резюме')
+    )
+    job = models.ForeignKey(
+        Job,
+        on_delete=models.CASCADE,
+        related_name='resume_matches',
+        verbose_name=_('вакансия')
+    )
+    score = models.FloatField(_('оценка'))
+    matching_skills_count = models.PositiveIntegerField(_('число общих навыков'))
+    updated_at = models.DateTimeField(_('дата обновления'), auto_now=True)
+    
+    class Meta:
+        verbose_name = _('совпадение резюме и вакансии')
+        verbose_name_plural = _('совпадения резюме и вакансий')
+        unique_together = [('resume', 'job')]
+        indexes = [
+            models.Index(fields=['job', '-score', '-resume'], name='jobs_match_job_score_idx'),
+        ]
+    
+    def __str__(self) -> str:
+        return f"{self.resume_id} → {self.job_id} ({self.score:.3f})"
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from django.db import transaction
-from jobs.models import Company, Job
+from jobs.models import Company, Job, JobRequiredSkill
 from resumes.serializers import SkillSerializer
 from resumes.models import Skill
 from typing import Dict, Any, List
@@ -74,6 +74,13 @@ class JobDetailSerializer(serializers.ModelSerializer):
         required=False,
         source='required_skills'
     )
+    nice_to_have_skills = serializers.SerializerMethodField()
+    nice_to_have_skills_ids = serializers.PrimaryKeyRelatedField(
+        queryset=Skill.objects.all(),
+        many=True,
+        write_only=True,
+        required=False
+    )
     salary_display = serializers.CharField(read_only=True)
     
     class Meta:
@@ -82,6 +89,7 @@ class JobDetailSerializer(serializers.ModelSerializer):
             'id', 'title', 'slug', 'company', 'company_name', 'company_logo', 'company_website',
             'description', 'requirements', 'salary_min', 'salary_max', 'salary_display',
             'location', 'required_skills', 'required_skills_ids',
+            'nice_to_have_skills', 'nice_to_have_skills_ids',
             'status', 'created_at', 'updated_at'
         ]
         read_only_fields = ['created_at', 'updated_at', 'slug']
@@ -92,6 +100,12 @@ class JobDetailSerializer(serializers.ModelSerializer):
             return request.build_absolute_uri(obj.company.logo.url)
         return ''
     
+    def get_nice_to_have_skills(self, obj) -> List[int]:
+        return [
+            link.skill_id for link in obj.skill_links.all()
+            if link.importance == JobRequiredSkill.NICE_TO_HAVE
+        ]
+    
     def validate(self, data: Dict[str, Any]) -> Dict[str, Any]:
         salary_min = data.get('salary_min')
         salary_max = data.get('salary_max')
@@ -114,22 +128,35 @@ class JobDetailSerializer(serializers.ModelSerializer):
     @transaction.atomic
     def create(self, validated_data: Dict[str, Any]) -> Job:
         skills_data = validated_data.pop('required_skills', [])
+        nice_to_have_data = validated_data.pop('nice_to_have_skills_ids', [])
         job = Job.objects.create(**validated_data)
         
-        if skills_data:
-            job.required_skills.set(skills_data)
+        if skills_data or nice_to_have_data:
+            job.set_required_skills(skills_data, nice_to_have_data)
             
         return job
     
     @transaction.atomic
     def update(self, instance: Job, validated_data: Dict[str, Any]) -> Job:
         skills_data = validated_data.pop('required_skills', None)
+        nice_to_have_data = validated_data.pop('nice_to_have_skills_ids', None)
         
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
         
-        if skills_data is not None:
-            instance.required_skills.set(skills_data)
+        if skills_data is not None or nice_to_have_data is not None:
+            if skills_data is None:
+                skills_data = list(instance.required_skills.all())
+            if nice_to_have_data is None:
+                # Без явного списка желательные навыки, оставшиеся в вакансии, сохраняют важность
+                skill_ids = {skill.pk for skill in skills_data}
+                nice_to_have_data = [
+                    skill_id for skill_id in instance.skill_links.filter(
+                        importance=JobRequiredSkill.NICE_TO_HAVE
+                    ).values_list('skill_id', flat=True)
+                    if skill_id in skill_ids
+                ]
+            instance.set_required_skills(skills_data, nice_to_have_data)
             
         instance.save()
         return instance
\ No newline at end of file
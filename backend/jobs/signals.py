@@ -1,12 +1,15 @@
 import logging
-from django.db.models.signals import post_save, pre_delete, m2m_changed
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save, m2m_changed
 from django.dispatch import receiver
 from django.utils import timezone
 from django.conf import settings
 from django.core.mail import send_mail
 from django.template.loader import render_to_string
 
-from jobs.models import Company, Job
+from jobs.match_table import schedule_refresh
+from jobs.matching import JOBS, publish_changes
+from jobs.models import Company, Job, JobRequiredSkill, ResumeJobMatch
 
 logger = logging.getLogger(__name__)
 
@@ -90,6 +93,58 @@ def job_skills_changed_handler(sender, instance, action, reverse, model, pk_set,
             logger.info(f"Обновление списка кандидатов для вакансии {instance.title} после изменения требуемых навыков")
 
 
+@receiver(pre_save, sender=Job)
+def job_status_snapshot_handler(sender, instance, update_fields=None, **kwargs):
+    # Из полей вакансии матрицу навыков меняет только статус: он определяет, есть ли
+    # вакансия в матрице. Навыки обрабатываются сигналами связей
+    if instance._state.adding or kwargs.get('raw'):
+        instance._status_changed = True
+    elif update_fields is not None:
+        instance._status_changed = 'status' in update_fields
+    else:
+        previous = Job.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+        instance._status_changed = previous != instance.status
+
+
+@receiver(post_save, sender=Job)
+def job_index_handler(sender, instance, **kwargs):
+    if getattr(instance, '_status_changed', True):
+        _publish_job_changes([instance.id])
+
+
+@receiver(post_delete, sender=Job)
+def job_delete_index_handler(sender, instance, **kwargs):
+    # id запоминается сразу: после удаления Django обнуляет pk экземпляра
+    _publish_job_changes([instance.id])
+
+
+def _publish_job_changes(job_ids):
+    transaction.on_commit(lambda: publish_changes(JOBS, job_ids))
+    schedule_refresh(JOBS, job_ids)
+
+
+@receiver(m2m_changed, sender=Job.required_skills.through)
+def job_skills_index_handler(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    
+    if not reverse:
+        job_ids = [instance.id]
+    elif pk_set is not None:
+        job_ids = list(pk_set)
+    else:
+        # skill.jobs.clear(): затронутые вакансии неизвестны, матрица перестраивается
+        job_ids = None
+    _publish_job_changes(job_ids)
+
+
+@receiver(post_save, sender=JobRequiredSkill)
+@receiver(post_delete, sender=JobRequiredSkill)
+def job_skill_link_handler(sender, instance, **kwargs):
+    # Изменения связей в обход required_skills (например, в админке) и смена важности навыка
+    _publish_job_changes([instance.job_id])
+
+
 @receiver(pre_delete, sender=Company)
 def company_delete_handler(sender, instance, **kwargs):
     logger.warning(f"Удаление компании {instance.name} (ID: {instance.id}), владелец: {instance.user.email}")
@@ -98,3 +153,14 @@ def company_delete_handler(sender, instance, **kwargs):
     if active_jobs > 0:
         logger.warning(f"При удалении компании {instance.name} будут удалены {active_jobs} активных вакансий")
     
+
+
+def match_table_post_migrate_handler(sender, using='default', **kwargs):
+    # После создания таблицы совпадений она пуста: полный пересчет ставится в очередь.
+    # До его завершения подбор для вакансий без строк идет по матрице навыков
+    try:
+        if not ResumeJobMatch.objects.using(using).exists() and \
+                Job.objects.using(using).filter(status=Job.ACTIVE).exists():
+            schedule_refresh(JOBS, None)
+    except Exception as e:
+        logger.error(f"Не удалось поставить пересчет таблицы совпадений после миграции: {e}")
@@ -0,0 +1,74 @@
+import math
+import logging
+from collections import Counter
+from typing import Dict, Any, List
+
+from celery import shared_task
+
+from jobs import match_table
+from jobs.matching import JOBS, RESUMES, publish_idf_weights
+from jobs.models import Job, JobRequiredSkill
+from resumes.models import Resume, Skill
+
+logger = logging.getLogger(__name__)
+
+# Изменение веса IDF, при котором он перезаписывается и таблица совпадений пересчитывается.
+# Новое резюме или вакансия сдвигает веса всех навыков на ~1/N - такой дрейф не меняет ранжирование
+IDF_TOLERANCE = 1e-3
+
+
+@shared_task
+def refresh_skill_idf_weights() -> Dict[str, Any]:
+    """
+    Пересчитывает веса IDF навыков по активным вакансиям и резюме:
+    idf = ln((1 + N) / (1 + df)) + 1, где N - число вакансий и резюме с
+    навыками, df - число тех из них, где встречается навык. Редкие навыки
+    получают больший вес при ранжировании по релевантности. Запускается
+    периодически Celery beat (SKILL_IDF_REFRESH_INTERVAL).
+    """
+    job_links = JobRequiredSkill.objects.filter(job__status=Job.ACTIVE)
+    resume_links = Resume.skills.through.objects.all()
+
+    document_frequency = Counter()
+    for queryset in (job_links, resume_links):
+        document_frequency.update(
+            skill_id for skill_id, in queryset.values_list('skill_id').iterator(chunk_size=10000)
+        )
+    documents = (
+        job_links.values('job_id').distinct().count()
+        + resume_links.values('resume_id').distinct().count()
+    )
+
+    changed = []
+    for skill in Skill.objects.only('id', 'idf_weight').iterator(chunk_size=2000):
+        weight = math.log((1 + documents) / (1 + document_frequency.get(skill.id, 0))) + 1
+        if abs(skill.idf_weight - weight) > IDF_TOLERANCE:
+            skill.idf_weight = weight
+            changed.append(skill)
+    Skill.objects.bulk_update(changed, ['idf_weight'], batch_size=1000)
+
+    if changed:
+        publish_idf_weights()
+        # Оценки в таблице совпадений зависят от весов IDF
+        rebuild_resume_job_matches.delay()
+    logger.info(f"Пересчитаны веса IDF: {len(changed)} навыков изменено, документов {documents}")
+    return {'documents': documents, 'updated': len(changed)}
+
+
+@shared_task
+def refresh_job_matches_task(job_ids: List[int]) -> Dict[str, Any]:
+    """Обновляет лучшие резюме вакансий после изменения их навыков или статуса."""
+    match_table.clear_pending(JOBS, job_ids)
+    return {'jobs': len(job_ids), 'changed': match_table.refresh_job_matches(job_ids)}
+
+
+@shared_task
+def refresh_resume_matches_task(resume_ids: List[int]) -> Dict[str, Any]:
+    """Обновляет таблицу совпадений у вакансий, затронутых изменением навыков резюме."""
+    match_table.clear_pending(RESUMES, resume_ids)
+    return {'resumes': len(resume_ids), 'changed': match_table.refresh_resume_matches(resume_ids)}
+
+
+@shared_task
+def rebuild_resume_job_matches() -> Dict[str, Any]:
+    return {'changed': match_table.rebuild_matches()}
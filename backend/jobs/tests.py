@@ -1,3 +1,285 @@
-from django.test import TestCase
+import math
+import random
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from accounts.models import User
+from jobs import match_table, matching
+from jobs.match_table import refresh_job_matches, refresh_resume_matches
+from jobs.models import Company, Job, ResumeJobMatch
+from jobs.matching import (
+    MATRIX_CHANGE_KEY, METRIC_COSINE, METRIC_JACCARD, METRIC_OVERLAP, METRIC_RELEVANCE, RESUMES,
+    SkillMatrix, get_skill_matrix, publish_changes
+)
+from resumes.models import Resume, Skill
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'jobs-tests'}}
+
+
+def brute_force(rows, query, metric, idf=None):
+    """Эталон: оценки всех строк с общими навыками, по убыванию оценки, при равенстве - больший id."""
+    scored = []
+    for row_id, skills in rows.items():
+        shared = query.keys() & skills.keys()
+        if not shared:
+            continue
+        overlap = len(shared)
+        if metric == METRIC_RELEVANCE:
+            score = sum(query[skill] * skills[skill] * (idf[skill] if idf is not None else 1.0) for skill in shared)
+        elif metric == METRIC_JACCARD:
+            score = overlap / (len(query) + len(skills) - overlap)
+        elif metric == METRIC_COSINE:
+            score = overlap / math.sqrt(len(query) * len(skills))
+        else:
+            score = overlap
+        scored.append((row_id, score, overlap))
+    scored.sort(key=lambda item: (-item[1], -item[0]))
+    return scored
+
+
+class SkillMatrixTests(SimpleTestCase):
+    skills_count = 30
+
+    def setUp(self):
+        self.random = random.Random(7)
+        # Веса - двоичные дроби: суммы в float32 точные, порядок при равенстве проверяется строго
+        self.idf = np.array([1 + (skill % 4) / 2 for skill in range(self.skills_count)], dtype=np.float32)
+
+    def _random_skills(self, weighted=False):
+        skills = self.random.sample(range(self.skills_count), self.random.randint(1, 6))
+        return {skill: self.random.choice((1.0, 0.5)) if weighted else 1.0 for skill in skills}
+
+    def _assert_matches_reference(self, matrix, rows, weighted=False):
+        queries = [self._random_skills(weighted) for _ in range(8)]
+        for metric in (METRIC_OVERLAP, METRIC_RELEVANCE, METRIC_JACCARD, METRIC_COSINE):
+            idf = self.idf if metric == METRIC_RELEVANCE else None
+            for query, (matches, total) in zip(queries, matrix.match_many(queries, metric, 5, idf)):
+                expected = brute_force(rows, query, metric, idf)
+                self.assertEqual(total, len(expected))
+                if metric in (METRIC_OVERLAP, METRIC_RELEVANCE):
+                    self.assertEqual([(m.id, m.score, m.overlap) for m in matches], expected[:5])
+                else:
+                    # Равные дроби в float32 могут отличаться в последнем знаке - сравниваются оценки
+                    self.assertEqual(len(matches), min(5, len(expected)))
+                    scores = dict((row_id, score) for row_id, score, _ in expected)
+                    for match, (_, score, _) in zip(matches, expected):
+                        self.assertAlmostEqual(match.score, score, places=5)
+                        self.assertAlmostEqual(match.score, scores[match.id], places=5)
+
+    def _run_updates(self, matrix, rows, weighted=False, rounds=6):
+        for _ in range(rounds):
+            changes = {}
+            for row_id in self.random.sample(range(80), 10):
+                # Пустой набор навыков убирает строку, новые id добавляют строки
+                changes[row_id] = {} if self.random.random() < 0.2 else self._random_skills(weighted)
+            matrix.update_rows(changes)
+            for row_id, skills in changes.items():
+                if skills:
+                    rows[row_id] = skills
+                else:
+                    rows.pop(row_id, None)
+            self.assertEqual(len(matrix), len(rows))
+            self._assert_matches_reference(matrix, rows, weighted)
+
+    def _initial_rows(self, weighted=False):
+        return {row_id: self._random_skills(weighted) for row_id in range(60)}
+
+    def test_matches_reference_after_build(self):
+        rows = self._initial_rows(weighted=True)
+        pairs = [(row_id, skill, weight) for row_id, skills in rows.items() for skill, weight in skills.items()]
+        self._assert_matches_reference(SkillMatrix(pairs), rows, weighted=True)
+
+    def test_matches_reference_with_delta_block(self):
+        rows = self._initial_rows()
+        matrix = SkillMatrix((row_id, skill) for row_id, skills in rows.items() for skill in skills)
+        self._run_updates(matrix, rows)
+        # Изменений меньше COMPACT_MIN_ROWS: основной блок не пересобирался
+        self.assertIsNotNone(matrix._state[1])
+
+    def test_matches_reference_across_compaction(self):
+        rows = self._initial_rows(weighted=True)
+        pairs = [(row_id, skill, weight) for row_id, skills in rows.items() for skill, weight in skills.items()]
+        matrix = SkillMatrix(pairs)
+        with mock.patch.object(matching, 'COMPACT_MIN_ROWS', 15), mock.patch.object(matching, 'COMPACT_FRACTION', 0):
+            self._run_updates(matrix, rows, weighted=True)
+        self.assertLessEqual(len(matrix._changed), 15)
+
+    def test_unchanged_update_keeps_state(self):
+        matrix = SkillMatrix([(1, 1), (1, 2), (2, 2)])
+        state = matrix._state
+        matrix.update_row(1, [2, 1])
+        self.assertIs(matrix._state, state)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class SkillMatrixFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        matching._matrices.clear()
+        self.addCleanup(matching._matrices.clear)
+
+        user = User.objects.create_user(email='seeker@example.com', password='password')
+        self.skills = [Skill.objects.create(name=f'skill-{number}') for number in range(3)]
+        self.resume = Resume.objects.create(user=user, title='Резюме', file='resumes/resume.pdf')
+        self.resume.skills.set(self.skills[:2])
+
+    def _change_skills(self):
+        self.resume.skills.set(self.skills[2:])
+        # Сигнал публикует изменение после фиксации транзакции, в тесте - явно
+        publish_changes(RESUMES, [self.resume.id])
+
+    def test_catch_up_applies_published_rows(self):
+        matrix = get_skill_matrix(RESUMES)
+        self.assertEqual(set(matrix.row_skills[self.resume.id]), {self.skills[0].id, self.skills[1].id})
+
+        self._change_skills()
+        caught_up = get_skill_matrix(RESUMES)
+
+        self.assertIs(caught_up, matrix)
+        self.assertEqual(caught_up.row_skills[self.resume.id], {self.skills[2].id: 1.0})
+        matches, total = caught_up.match([self.skills[2].id])
+        self.assertEqual((total, matches[0].id), (1, self.resume.id))
+
+    def test_evicted_feed_entry_rebuilds_matrix(self):
+        matrix = get_skill_matrix(RESUMES)
+        self._change_skills()
+        cache.delete(MATRIX_CHANGE_KEY.format(kind=RESUMES, version=matrix.version + 1))
+
+        rebuilt = get_skill_matrix(RESUMES)
+
+        self.assertIsNot(rebuilt, matrix)
+        self.assertEqual(rebuilt.row_skills[self.resume.id], {self.skills[2].id: 1.0})
+
+    def test_publish_without_ids_rebuilds_matrix(self):
+        matrix = get_skill_matrix(RESUMES)
+        publish_changes(RESUMES)
+        self.assertIsNot(get_skill_matrix(RESUMES), matrix)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class JobIndexSignalTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(email='employer@example.com', password='password')
+        company = Company.objects.create(name='Acme', user=user)
+        self.job = Job.objects.create(
+            title='Python developer', company=company, description='d', requirements='r', status=Job.ACTIVE
+        )
+        patcher = mock.patch('jobs.signals.schedule_refresh')
+        self.schedule_refresh = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_other_fields_do_not_touch_matrix(self):
+        self.job.title = 'Senior Python developer'
+        self.job.save()
+        self.job.description = 'new'
+        self.job.save(update_fields=['description'])
+        self.schedule_refresh.assert_not_called()
+
+    def test_status_change_refreshes_job(self):
+        self.job.status = Job.CLOSED
+        self.job.save()
+        self.job.status = Job.ACTIVE
+        self.job.save(update_fields=['status'])
+        self.assertEqual(self.schedule_refresh.call_count, 2)
+        self.schedule_refresh.assert_called_with(matching.JOBS, [self.job.id])
+
+
+@override_settings(CACHES=LOCMEM_CACHE, RESUME_JOB_MATCH_LIMIT=3)
+class RefreshResumeMatchesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for target in ('jobs.signals.schedule_refresh', 'resumes.signals.schedule_refresh'):
+            patcher = mock.patch(target)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(matching._matrices.clear)
+
+        self.user = User.objects.create_user(email='employer@example.com', password='password')
+        company = Company.objects.create(name='Acme', user=self.user)
+        self.python, self.django, self.docker = [Skill.objects.create(name=name) for name in ('Python', 'Django', 'Docker')]
+        self.job = Job.objects.create(
+            title='Python developer', company=company, description='d', requirements='r', status=Job.ACTIVE
+        )
+        self.job.set_required_skills([self.python, self.django], nice_to_have=[self.docker])
+
+        # Оценки: 2, 2, 1, 1 - в таблицу с лимитом 3 попадают два лучших и последнее из равных
+        self.resumes = [
+            self._create_resume([self.python, self.django]),
+            self._create_resume([self.python, self.django]),
+            self._create_resume([self.python]),
+            self._create_resume([self.python]),
+        ]
+        matching._matrices.clear()
+        refresh_job_matches([self.job.id])
+
+    def _create_resume(self, skills):
+        resume = Resume.objects.create(user=self.user, title='Резюме', file='resumes/resume.pdf')
+        resume.skills.set(skills)
+        return resume
+
+    def _refresh(self, resumes):
+        # Матрицы перестраиваются по БД: в тесте изменения не публикуются после фиксации
+        matching._matrices.clear()
+        with mock.patch.object(match_table, 'refresh_job_matches', wraps=refresh_job_matches) as full_refresh:
+            refresh_resume_matches([resume.id for resume in resumes])
+        return full_refresh
+
+    def _assert_table_is_top(self):
+        rows = list(
+            ResumeJobMatch.objects.filter(job=self.job).order_by('-score', '-resume_id')
+            .values_list('resume_id', 'matching_skills_count')
+        )
+        matches, _ = get_skill_matrix(RESUMES).match(
+            {self.python.id: 1.0, self.django.id: 1.0, self.docker.id: 0.5}, METRIC_RELEVANCE, 3,
+            matching.get_idf_weights(),
+        )
+        self.assertEqual(rows, [(match.id, match.overlap) for match in matches])
+        return [resume_id for resume_id, _ in rows]
+
+    def test_initial_table(self):
+        first, second, _, fourth = self.resumes
+        self.assertEqual(self._assert_table_is_top(), [second.id, first.id, fourth.id])
+
+    def test_resume_at_ceiling_is_inserted_and_table_trimmed(self):
+        newcomer = self._create_resume([self.python])
+
+        full_refresh = self._refresh([newcomer])
+
+        full_refresh.assert_not_called()
+        self.assertEqual(self._assert_table_is_top(), [self.resumes[1].id, self.resumes[0].id, newcomer.id])
+
+    def test_resume_below_ceiling_is_not_inserted(self):
+        newcomer = self._create_resume([self.docker])
+
+        full_refresh = self._refresh([newcomer])
+
+        full_refresh.assert_not_called()
+        self.assertFalse(ResumeJobMatch.objects.filter(resume=newcomer).exists())
+        self._assert_table_is_top()
+
+    def test_resume_leaving_full_job_refreshes_job(self):
+        first, second, third, fourth = self.resumes
+        second.skills.set([self.docker])
+
+        full_refresh = self._refresh([second])
+
+        # Освободившееся место занимает резюме вне таблицы - нужен полный пересчет вакансии
+        full_refresh.assert_called_once_with({self.job.id})
+        self.assertEqual(self._assert_table_is_top(), [first.id, fourth.id, third.id])
+
+    def test_job_below_limit_is_updated_in_place(self):
+        first, second, third, fourth = self.resumes
+        third.skills.clear()
+        fourth.skills.clear()
+        self._refresh([third, fourth])
+        self.assertEqual(self._assert_table_is_top(), [second.id, first.id])
+
+        newcomer = self._create_resume([self.django, self.docker])
+        full_refresh = self._refresh([newcomer])
+
+        # В незаполненной вакансии все подходящие резюме уже в таблице
+        full_refresh.assert_not_called()
+        self.assertEqual(self._assert_table_is_top(), [second.id, first.id, newcomer.id])
@@ -2,10 +2,16 @@ from rest_framework import viewsets, status, permissions, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.pagination import PageNumberPagination
 from django.db.models import Count, Q, Prefetch
 from django.shortcuts import get_object_or_404
 
-from jobs.models import Company, Job
+from jobs.match_table import get_table_limit
+from jobs.matching import (
+    DEFAULT_MATCH_LIMIT, MAX_MATCH_LIMIT, METRIC_RELEVANCE, RESUMES,
+    get_idf_weights, get_match_options, get_skill_matrix
+)
+from jobs.models import Company, Job, JobRequiredSkill, ResumeJobMatch
 from resumes.models import Skill, Resume
 from jobs.serializers import (
     CompanySerializer, 
@@ -16,6 +22,12 @@ from accounts.models import User
 from accounts.permissions import IsEmployer, IsAdmin, IsOwnerOrAdmin, ReadOnly
 
 
+class MatchPagination(PageNumberPagination):
+    page_size = DEFAULT_MATCH_LIMIT
+    page_size_query_param = 'limit'
+    max_page_size = MAX_MATCH_LIMIT
+
+
 class CompanyViewSet(viewsets.ModelViewSet):
     serializer_class = CompanySerializer
     permission_classes = [IsAuthenticated]
@@ -113,6 +125,11 @@ class JobViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['get'])
     def matching_resumes(self, request, slug=None):
+        """
+        Подходящие резюме для вакансии постранично (?page=, ?limit=, ?metric=).
+        Доступны только RESUME_JOB_MATCH_LIMIT лучших резюме: count - число
+        подходящих резюме, но не больше этого лимита, для любой метрики.
+        """
         job = self.get_object()
         
         if not request.user.is_staff and job.company.user != request.user:
@@ -121,23 +138,48 @@ class JobViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
             
-        job_skills = job.required_skills.values_list('id', flat=True)
-        
-        matching_resumes = Resume.objects.filter(
-            skills__in=job_skills
-        ).annotate(
-            matching_skills_count=Count('skills', filter=Q(skills__in=job_skills))
-        ).order_by('-matching_skills_count')
+        try:
+            metric, _ = get_match_options(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         from resumes.serializers import ResumeListSerializer
         
+        paginator = MatchPagination()
+        stored = ResumeJobMatch.objects.filter(job=job)
+        if metric == METRIC_RELEVANCE and job.status == Job.ACTIVE and stored.exists():
+            # Лучшие резюме активной вакансии хранятся в таблице совпадений, страница читается по индексу
+            queryset = stored.select_related('resume').prefetch_related(
+                'resume__skills'
+            ).order_by('-score', '-resume_id')
+            page = paginator.paginate_queryset(queryset, request, view=self)
+            results = [(row.resume, row.matching_skills_count, row.score) for row in page]
+        else:
+            # Другие метрики, неактивные вакансии и вакансии, для которых таблица
+            # еще не рассчитана: оценки по матрице навыков резюме в памяти
+            job_skills = {
+                skill_id: JobRequiredSkill.IMPORTANCE_WEIGHTS.get(importance, 1.0)
+                for skill_id, importance in job.skill_links.values_list('skill_id', 'importance')
+            }
+            matches, _ = get_skill_matrix(RESUMES).match(
+                job_skills, metric, get_table_limit(), idf=get_idf_weights()
+            )
+            page = paginator.paginate_queryset(matches, request, view=self)
+            resumes = Resume.objects.filter(
+                id__in=[match.id for match in page]
+            ).prefetch_related('skills').in_bulk()
+            results = [
+                (resumes[match.id], match.overlap, match.score) for match in page if match.id in resumes
+            ]
+        
         serializer = ResumeListSerializer(
-            matching_resumes, 
-            many=True, 
+            [resume for resume, _, _ in results],
+            many=True,
             context={'request': request}
         )
+        data = serializer.data
+        for item, (_, overlap, score) in zip(data, results):
+            item['matching_skills_count'] = overlap
+            item['match_score'] = round(score, 4)
         
-        return Response({
-            'count': matching_resumes.count(),
-            'results': serializer.data
-        })
\ No newline at end of file
+        return paginator.get_paginated_response(data)
@@ -190,6 +190,104 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+# Этапы анализа резюме выполняются в отдельных очередях со своими воркерами,
+# чтобы тяжелое извлечение текста не задерживало быстрые задачи очереди по умолчанию
+CELERY_TASK_ROUTES = {
+    'resumes.tasks.extract_resume_stage': {'queue': 'cpu_extract'},
+    'resumes.tasks.analyze_resume_stage': {'queue': 'analysis'},
+    'resumes.tasks.persist_analysis_stage': {'queue': 'io_persist'},
+    'resumes.tasks.index_resume_skills_stage': {'queue': 'io_persist'},
+    'resumes.tasks.analyze_resumes_batch': {'queue': 'cpu_extract'},
+    'resumes.tasks.gpt_analyze_resume': {'queue': 'llm'},
+    'resumes.tasks.enrich_analysis_with_llm': {'queue': 'llm'},
+    # Обновления таблицы совпадений: потоки одного воркера делят матрицы навыков в памяти
+    'jobs.tasks.refresh_job_matches_task': {'queue': 'io_persist'},
+    'jobs.tasks.refresh_resume_matches_task': {'queue': 'io_persist'},
+    'jobs.tasks.rebuild_resume_job_matches': {'queue': 'io_persist'},
+}
+
+# Сколько лучших резюме хранится в таблице совпадений для каждой вакансии
+RESUME_JOB_MATCH_LIMIT = int(os.getenv('RESUME_JOB_MATCH_LIMIT', 500))
+
+# Интервал пересчета весов IDF навыков для ранжирования подбора (секунды)
+SKILL_IDF_REFRESH_INTERVAL = int(os.getenv('SKILL_IDF_REFRESH_INTERVAL', 60 * 60))
+
+CELERY_BEAT_SCHEDULE = {
+    'refresh-skill-idf-weights': {
+        'task': 'jobs.tasks.refresh_skill_idf_weights',
+        'schedule': SKILL_IDF_REFRESH_INTERVAL,
+    },
+}
+
+# Общий кэш процессов (веб и Celery-воркеры)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('REDIS_CACHE_URL', 'redis://localhost:6379/1'),
+    }
+}
+
+# Бюджет извлечения текста из одного файла резюме
+RESUME_EXTRACTION_MAX_PAGES = int(os.getenv('RESUME_EXTRACTION_MAX_PAGES', 20))
+RESUME_EXTRACTION_MAX_CHARS = int(os.getenv('RESUME_EXTRACTION_MAX_CHARS', 100000))
+
+# Извлечение выполняется в изолированных процессах с ограничением времени и памяти.
+# Процесс перезапускается после указанного числа файлов.
+RESUME_EXTRACTION_ISOLATED = os.getenv('RESUME_EXTRACTION_ISOLATED', 'True') == 'True'
+RESUME_EXTRACTION_TIMEOUT = int(os.getenv('RESUME_EXTRACTION_TIMEOUT', 30))
+RESUME_EXTRACTION_MEMORY_LIMIT_MB = int(os.getenv('RESUME_EXTRACTION_MEMORY_LIMIT_MB', 512))
+RESUME_EXTRACTION_MAX_FILES_PER_CHILD = int(os.getenv('RESUME_EXTRACTION_MAX_FILES_PER_CHILD', 50))
+
+# Сколько секунд запрос анализа считается ожидающим в очереди (повторные запросы объединяются с ним)
+ANALYSIS_PENDING_TTL = int(os.getenv('ANALYSIS_PENDING_TTL', 600))
+
+# Записи кэша извлечения и анализа удаляются, если к ним не обращались указанное число дней
+ANALYSIS_CACHE_TTL_DAYS = int(os.getenv('ANALYSIS_CACHE_TTL_DAYS', 30))
+
+# Режим анализа резюме: rules - правила, ai - LLM с откатом на правила, hybrid - результат правил
+# сразу, затем дополнение от LLM в очереди llm. USE_AI_ANALYSIS=True соответствует режиму ai.
+USE_AI_ANALYSIS = os.getenv('USE_AI_ANALYSIS', 'False') == 'True'
+ANALYSIS_MODE = os.getenv('ANALYSIS_MODE', 'ai' if USE_AI_ANALYSIS else 'rules')
+
+# Модель OpenAI для AI-анализа резюме. OPENAI_BASE_URL позволяет направить запросы на локальную заглушку.
+OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo')
+OPENAI_TEMPERATURE = float(os.getenv('OPENAI_TEMPERATURE', 0.5))
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', '')
+
+# Клиент LLM: таймаут запроса (секунды), повторы, размер пула соединений. Для пакетного анализа -
+# число одновременных запросов и ограничение частоты (запросов в секунду, 0 - без ограничения)
+LLM_REQUEST_TIMEOUT = float(os.getenv('LLM_REQUEST_TIMEOUT', 30))
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', 1))
+LLM_MAX_CONNECTIONS = int(os.getenv('LLM_MAX_CONNECTIONS', 20))
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', 8))
+LLM_RATE_LIMIT = float(os.getenv('LLM_RATE_LIMIT', 0))
+
+# Выключатель LLM: в окне LLM_BREAKER_WINDOW секунд (не меньше LLM_BREAKER_MIN_REQUESTS вызовов)
+# при доле ошибок от LLM_BREAKER_ERROR_RATE или p95 задержки от LLM_BREAKER_P95_SECONDS вызовы LLM
+# прекращаются на LLM_BREAKER_OPEN_SECONDS, затем возобновляются после успешных пробных вызовов
+LLM_BREAKER_WINDOW = int(os.getenv('LLM_BREAKER_WINDOW', 60))
+LLM_BREAKER_BUCKET = int(os.getenv('LLM_BREAKER_BUCKET', 10))
+LLM_BREAKER_MIN_REQUESTS = int(os.getenv('LLM_BREAKER_MIN_REQUESTS', 10))
+LLM_BREAKER_ERROR_RATE = float(os.getenv('LLM_BREAKER_ERROR_RATE', 0.5))
+LLM_BREAKER_P95_SECONDS = float(os.getenv('LLM_BREAKER_P95_SECONDS', 15))
+LLM_BREAKER_OPEN_SECONDS = int(os.getenv('LLM_BREAKER_OPEN_SECONDS', 30))
+LLM_BREAKER_HALF_OPEN_SUCCESSES = int(os.getenv('LLM_BREAKER_HALF_OPEN_SUCCESSES', 2))
+
+# Максимальный размер промпта AI-анализа в токенах; длинные резюме сокращаются с сохранением
+# опыта работы и навыков
+LLM_PROMPT_TOKEN_BUDGET = int(os.getenv('LLM_PROMPT_TOKEN_BUDGET', 3000))
+
+# Кэш ответов LLM: LRU в памяти процесса и общий кэш со временем жизни LLM_CACHE_TTL секунд
+LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'True') == 'True'
+LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', 60 * 60 * 24 * 7))
+LLM_CACHE_LOCAL_SIZE = int(os.getenv('LLM_CACHE_LOCAL_SIZE', 256))
+
+# Максимальный возраст снимка каталога навыков, если общий кэш недоступен (секунды)
+SKILL_CATALOG_MAX_AGE = int(os.getenv('SKILL_CATALOG_MAX_AGE', 60))
+
+# Максимальный возраст матриц навыков вакансий и резюме, если общий кэш недоступен (секунды)
+SKILL_MATRIX_MAX_AGE = int(os.getenv('SKILL_MATRIX_MAX_AGE', 60))
+
 CSRF_TRUSTED_ORIGINS = [
     'http://localhost:3000',
     'http://127.0.0.1:3000',
@@ -1,122 +1,264 @@
 import os
+import asyncio
 import logging
 import requests
 import json
-import openai
 from django.conf import settings
 
+from resume_analyzer.utils.circuit_breaker import get_circuit_breaker
+from resume_analyzer.utils.llm_cache import get_llm_cache, make_llm_cache_key
+from resume_analyzer.utils.llm_client import AsyncLLMClient, get_sync_client
+from resume_analyzer.utils.prompt_builder import DEFAULT_TOKEN_BUDGET, build_analysis_prompt
+from resume_analyzer.utils.skill_matcher import SkillMatcher
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_MODEL = "gpt-3.5-turbo"
+DEFAULT_TEMPERATURE = 0.5
+
+# Увеличивается при любом изменении текста промпта, чтобы не отдавать из кэша ответы на старый промпт
+PROMPT_VERSION = 2
+
+COMMON_SKILLS = [
+    "Python", "Java", "JavaScript", "React", "Vue", "Angular", "Node.js",
+    "Django", "Flask", "SQL", "PostgreSQL", "MongoDB", "MySQL", "Redis",
+    "Docker", "Kubernetes", "AWS", "Azure", "GCP", "Git", "CI/CD",
+    "HTML", "CSS", "REST API", "GraphQL", "TDD", "Agile", "Scrum",
+    "Machine Learning", "Data Analysis", "TensorFlow", "PyTorch"
+]
+
+# Распространенные варианты написания навыков из COMMON_SKILLS
+COMMON_SKILL_ALIASES = {
+    "JS": "JavaScript", "ReactJS": "React", "React.js": "React", "Vue.js": "Vue",
+    "VueJS": "Vue", "NodeJS": "Node.js", "Node": "Node.js", "Postgres": "PostgreSQL",
+    "Mongo": "MongoDB", "k8s": "Kubernetes", "Amazon Web Services": "AWS",
+    "Google Cloud": "GCP", "RESTful API": "REST API", "REST": "REST API",
+    "ML": "Machine Learning", "Машинное обучение": "Machine Learning",
+}
+
+_common_skills_matcher = SkillMatcher(
+    [(skill, skill) for skill in COMMON_SKILLS] + list(COMMON_SKILL_ALIASES.items())
+)
+
+SYSTEM_PROMPT = "You are an expert resume analyzer. Analyze the resume and provide detailed feedback in JSON format."
+
+
+class _LLMCall:
+    """
+    Учет одного запроса к LLM выключателем: блок with записывает успех или
+    ошибку запроса. Ошибка запроса логируется и подавляется, ok - запрос выполнен.
+    """
+    
+    def __init__(self, breaker, permit):
+        self.breaker = breaker
+        self.permit = permit
+        self.ok = False
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is None:
+            self.breaker.record(self.permit, success=True)
+            self.ok = True
+            return False
+        if not issubclass(exc_type, Exception):
+            return False
+        self.breaker.record(self.permit, success=False)
+        logger.error(f"OpenAI API error: {str(exc)}")
+        return True
+
+
 class AIResumeAnalyzer:
     def __init__(self):
         self.api_key = os.getenv('OPENAI_API_KEY', '')
-        openai.api_key = self.api_key
+        self.base_url = getattr(settings, 'OPENAI_BASE_URL', '') or None
+        self.model = getattr(settings, 'OPENAI_MODEL', DEFAULT_MODEL)
+        self.temperature = getattr(settings, 'OPENAI_TEMPERATURE', DEFAULT_TEMPERATURE)
+        self.token_budget = getattr(settings, 'LLM_PROMPT_TOKEN_BUDGET', DEFAULT_TOKEN_BUDGET)
+        # Общие для процесса кэш ответов и выключатель; нагрузочный тест подменяет их изолированными
+        self.llm_cache = get_llm_cache()
+        self.breaker = get_circuit_breaker()
+    
+    def analyze_resume(self, resume_text, job_description=None, use_cache=True):
+        """
+        Анализ резюме через LLM с откатом на простой анализ.
+
+        Успешные ответы LLM кэшируются по хэшу нормализованного текста, описания
+        вакансии, модели, температуры и версии промпта. use_cache=False - явный
+        обход кэша: запрос всегда уходит в LLM, а свежий ответ заменяет запись в кэше.
+        """
+        result = self.analyze_with_llm(resume_text, job_description, use_cache)
+        if result is None:
+            return self._fallback_analysis(resume_text)
+        return result
     
-    def analyze_resume(self, resume_text, job_description=None):
+    def analyze_with_llm(self, resume_text, job_description=None, use_cache=True):
+        """Анализ только через LLM: None, если ответ LLM получить не удалось."""
         try:
-            if not resume_text or len(resume_text.strip()) < 10:
-                logger.warning("Resume text is empty or too short. Using simple analysis.")
-                return self._simple_analysis("")
-                
-            if not self.api_key:
-                logger.warning("OpenAI API key is not set. Using simple analysis.")
-                return self._simple_analysis(resume_text)
+            result, cache_key = self._prepare(resume_text, job_description, use_cache)
+            if result is not None or cache_key is None:
+                return result
             
             prompt = self._create_analysis_prompt(resume_text, job_description)
-            
-            try:
-                response = openai.ChatCompletion.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "You are an expert resume analyzer. Analyze the resume and provide detailed feedback in JSON format."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.5,
-                    max_tokens=1000
-                )
-                
-                result_text = response.choices[0].message.content.strip()
-                
-                try:
-                    start_idx = result_text.find('{')
-                    end_idx = result_text.rfind('}') + 1
-                    if start_idx >= 0 and end_idx > start_idx:
-                        json_str = result_text[start_idx:end_idx]
-                        result = json.loads(json_str)
-                    else:
-                        logger.warning("Failed to extract JSON from AI response. Using simple analysis.")
-                        result = self._simple_analysis(resume_text)
-                except json.JSONDecodeError:
-                    logger.warning("Failed to parse AI response as JSON. Using simple analysis.")
-                    result = self._simple_analysis(resume_text)
-            except Exception as api_error:
-                logger.error(f"OpenAI API error: {str(api_error)}")
-                result = self._simple_analysis(resume_text)
-                    
-            return result
+            return self._store(cache_key, self._request_analysis(prompt))
             
         except Exception as e:
             logger.error(f"Error in AI resume analysis: {str(e)}")
-            return self._simple_analysis(resume_text)
-    def _create_analysis_prompt(self, resume_text, job_description=None):
-        prompt = f"""
-        Please analyze the following resume and return your analysis in JSON format:
-        
-        Resume text:
-        ```
-        {resume_text}
-        ```
-        
-        Please return a JSON object with the following structure:
-        {{
-            "skills_found": [list of technical and soft skills found in resume],
-            "format_quality": "good"|"average"|"needs_improvement",
-            "structure_analysis": {{
-                "has_contact_info": true|false,
-                "has_professional_summary": true|false,
-                "has_work_experience": true|false,
-                "has_education": true|false,
-                "has_skills_section": true|false
-            }},
-            "improvement_suggestions": [list of specific suggestions],
-            "overall_score": 1-10 rating
-        }}
-        
-        Only return the JSON, no additional explanations.
+            return None
+    
+    def analyze_many(self, resume_texts, job_description=None, use_cache=True, **client_options):
         """
+        Пакетный анализ: запросы к LLM выполняются одновременно через общий пул
+        соединений с ограничением параллельности и частоты (см. AsyncLLMClient).
+        Результаты возвращаются в порядке resume_texts.
+        """
+        return asyncio.run(self.analyze_many_async(resume_texts, job_description, use_cache, **client_options))
+    
+    async def analyze_many_async(self, resume_texts, job_description=None, use_cache=True, **client_options):
+        if not self.api_key:
+            return [self.analyze_resume(text, job_description, use_cache) for text in resume_texts]
         
-        if job_description:
-            prompt += f"""
+        async with AsyncLLMClient.from_settings(self.api_key, self.base_url, **client_options) as client:
+            results = await asyncio.gather(*(
+                self._analyze_with_llm_async(client, text, job_description, use_cache) for text in resume_texts
+            ))
+        return [
+            result if result is not None else self._fallback_analysis(text)
+            for text, result in zip(resume_texts, results)
+        ]
+    
+    async def _analyze_with_llm_async(self, client, resume_text, job_description, use_cache):
+        try:
+            result, cache_key = self._prepare(resume_text, job_description, use_cache)
+            if result is not None or cache_key is None:
+                return result
             
-            Additionally, compare the resume with the following job description:
-            ```
-            {job_description}
-            ```
+            prompt = self._create_analysis_prompt(resume_text, job_description)
+            call = self._llm_call()
+            if call is None:
+                return None
+            with call:
+                result_text = await client.complete(self._build_messages(prompt), self.model, self.temperature)
+            if not call.ok:
+                return None
+            
+            return self._store(cache_key, self._parse_response(result_text))
+            
+        except Exception as e:
+            logger.error(f"Error in AI resume analysis: {str(e)}")
+            return None
+    
+    def _prepare(self, resume_text, job_description, use_cache):
+        """
+        Проверки и поиск в кэше до запроса к LLM. Возвращает (результат из кэша
+        или None, ключ кэша); ключ None - запрос к LLM невозможен.
+        """
+        if not resume_text or len(resume_text.strip()) < 10:
+            logger.warning("Resume text is empty or too short. Using simple analysis.")
+            return None, None
             
-            Add these fields to the JSON:
-            {{
-                "job_match_percentage": percentage as number (0-100),
-                "matching_skills": [skills that match job requirements],
-                "missing_skills": [important skills from job description not found in resume],
-                "tailoring_suggestions": [suggestions to better tailor resume for this job]
-            }}
-            """
+        if not self.api_key:
+            logger.warning("OpenAI API key is not set. Using simple analysis.")
+            return None, None
+        
+        llm_cache = self.llm_cache
+        # Бюджет токенов влияет на текст промпта длинных резюме, поэтому входит в версию
+        cache_key = make_llm_cache_key(
+            resume_text, job_description, self.model, self.temperature,
+            f'{PROMPT_VERSION}:{self.token_budget}'
+        )
+        if not self._cache_enabled():
+            # Кэш выключен настройкой: это не обход, ответы не читаются и не записываются
+            return None, cache_key
+        if use_cache:
+            return llm_cache.get(cache_key), cache_key
         
-        return prompt
+        llm_cache.record_bypass()
+        return None, cache_key
     
-    def _simple_analysis(self, text):
-        common_skills = [
-            "Python", "Java", "JavaScript", "React", "Vue", "Angular", "Node.js",
-            "Django", "Flask", "SQL", "PostgreSQL", "MongoDB", "MySQL", "Redis",
-            "Docker", "Kubernetes", "AWS", "Azure", "GCP", "Git", "CI/CD",
-            "HTML", "CSS", "REST API", "GraphQL", "TDD", "Agile", "Scrum",
-            "Machine Learning", "Data Analysis", "TensorFlow", "PyTorch"
+    def _store(self, cache_key, result):
+        # Результаты простого анализа не кэшируются: при следующем запросе LLM может быть доступна
+        if result is not None and self._cache_enabled():
+            self.llm_cache.set(cache_key, result)
+        return result
+    
+    @staticmethod
+    def _cache_enabled():
+        return getattr(settings, 'LLM_CACHE_ENABLED', True)
+    
+    def _fallback_analysis(self, resume_text):
+        if not resume_text or len(resume_text.strip()) < 10:
+            return self._simple_analysis("")
+        return self._simple_analysis(resume_text)
+    
+    def _build_messages(self, prompt):
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
         ]
+    
+    def _request_analysis(self, prompt):
+        """
+        Запрос к LLM. Возвращает разобранный JSON или None, если ответ получить не удалось.
+        Пока выключатель LLM разомкнут, запрос не отправляется.
+        """
+        call = self._llm_call()
+        if call is None:
+            return None
+        with call:
+            response = get_sync_client(self.api_key, self.base_url).chat.completions.create(
+                model=self.model,
+                messages=self._build_messages(prompt),
+                temperature=self.temperature,
+                max_tokens=1000
+            )
+        if not call.ok:
+            return None
         
-        found_skills = []
-        for skill in common_skills:
-            if skill.lower() in text.lower():
-                found_skills.append(skill)
+        return self._parse_response((response.choices[0].message.content or '').strip())
+    
+    def _llm_call(self):
+        """Разрешение выключателя на запрос к LLM; None - выключатель разомкнут."""
+        permit = self.breaker.allow()
+        if permit is None:
+            logger.warning("LLM circuit breaker is open. Using simple analysis.")
+            return None
+        return _LLMCall(self.breaker, permit)
+    
+    def _parse_response(self, result_text):
+        try:
+            start_idx = result_text.find('{')
+            end_idx = result_text.rfind('}') + 1
+            if start_idx >= 0 and end_idx > start_idx:
+                return json.loads(result_text[start_idx:end_idx])
+            logger.warning("Failed to extract JSON from AI response. Using simple analysis.")
+        except json.JSONDecodeError:
+            logger.warning("Failed to parse AI response as JSON. Using simple analysis.")
+        return None
+    
+    def _create_analysis_prompt(self, resume_text, job_description=None):
+        build = build_analysis_prompt(resume_text, job_description, self.token_budget, self.model)
+        logger.info(
+            f"Prompt: {build.prompt_tokens} tokens of {build.original_tokens} "
+            f"(saved {build.tokens_saved}{', truncated to budget' if build.truncated else ''})"
+        )
+        return build.prompt
+    
+    def _find_skills(self, text):
+        # Каталог навыков с синонимами из БД, если он доступен и не пуст
+        try:
+            from resumes.catalog import get_skill_catalog
+            catalog = get_skill_catalog()
+            if len(catalog):
+                return [skill.name for skill in catalog.find_skills(text)]
+        except Exception as e:
+            logger.warning(f"Skill catalog is unavailable, using built-in skill list: {str(e)}")
+        
+        return _common_skills_matcher.find_values(text)
+    
+    def _simple_analysis(self, text):
+        found_skills = self._find_skills(text)
         
         structure_analysis = {
             "has_contact_info": "email" in text.lower() or "телефон" in text.lower(),
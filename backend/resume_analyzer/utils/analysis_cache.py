@@ -0,0 +1,158 @@
+import time
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import Any, BinaryIO, Dict, Iterable, Optional
+
+from resume_analyzer.utils.mongodb import get_mongodb_db
+
+logger = logging.getLogger(__name__)
+
+EXTRACTION = 'extraction'
+ANALYSIS = 'analysis'
+
+DEFAULT_TTL_DAYS = 30
+
+# Через сколько секунд повторяется подключение к MongoDB, если кэш отключен:
+# каждая попытка ждет таймаут выбора сервера, поэтому не чаще этого интервала
+RECONNECT_INTERVAL = 60
+
+
+def compute_content_hash(file: BinaryIO, chunk_size: int = 64 * 1024) -> str:
+    """SHA-256 содержимого файла. Позиция чтения файла восстанавливается."""
+    digest = hashlib.sha256()
+
+    position = file.tell() if hasattr(file, 'tell') else None
+    if hasattr(file, 'seek'):
+        file.seek(0)
+
+    if hasattr(file, 'chunks'):
+        for chunk in file.chunks(chunk_size):
+            digest.update(chunk)
+    else:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+
+    if position is not None:
+        file.seek(position)
+
+    return digest.hexdigest()
+
+
+def _get_ttl_days() -> int:
+    try:
+        from django.conf import settings
+        return int(getattr(settings, 'ANALYSIS_CACHE_TTL_DAYS', DEFAULT_TTL_DAYS))
+    except Exception:
+        return DEFAULT_TTL_DAYS
+
+
+class AnalysisCache:
+    """
+    Кэш извлеченного текста и результатов анализа по хэшу содержимого файла.
+
+    Записи хранятся в MongoDB (коллекция analysis_cache) и переживают перезапуск
+    воркеров. Политика вытеснения - TTL-индекс по времени последнего обращения:
+    запись удаляется, если к ней не обращались ANALYSIS_CACHE_TTL_DAYS дней.
+    Счетчики попаданий и промахов ведутся в коллекции analysis_cache_stats.
+    """
+
+    def __init__(self, db=None, ttl_days: Optional[int] = None):
+        self.db = db if db is not None else get_mongodb_db()
+        self.ttl_days = ttl_days if ttl_days is not None else _get_ttl_days()
+        self._indexes_ready = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.db is not None
+
+    @staticmethod
+    def make_key(kind: str, content_hash: str, variant: Iterable[Any] = ()) -> str:
+        parts = [kind, *(str(part) for part in variant), content_hash]
+        return ':'.join(parts)
+
+    def _ensure_indexes(self) -> None:
+        if self._indexes_ready:
+            return
+        self.db.analysis_cache.create_index(
+            'last_used_at',
+            expireAfterSeconds=int(timedelta(days=self.ttl_days).total_seconds()),
+        )
+        self._indexes_ready = True
+
+    def _count(self, kind: str, field: str) -> None:
+        self.db.analysis_cache_stats.update_one({'_id': kind}, {'$inc': {field: 1}}, upsert=True)
+
+    def get(self, kind: str, content_hash: str, variant: Iterable[Any] = ()) -> Optional[Dict[str, Any]]:
+        if not self.enabled or not content_hash:
+            return None
+
+        try:
+            self._ensure_indexes()
+            entry = self.db.analysis_cache.find_one_and_update(
+                {'_id': self.make_key(kind, content_hash, variant)},
+                {'$set': {'last_used_at': datetime.now()}, '$inc': {'hits': 1}},
+            )
+            self._count(kind, 'hits' if entry else 'misses')
+        except Exception as e:
+            logger.error(f"Ошибка при чтении кэша анализа ({kind}): {e}")
+            return None
+
+        return entry['value'] if entry else None
+
+    def set(self, kind: str, content_hash: str, value: Dict[str, Any], variant: Iterable[Any] = ()) -> None:
+        if not self.enabled or not content_hash:
+            return
+
+        now = datetime.now()
+        try:
+            self._ensure_indexes()
+            self.db.analysis_cache.update_one(
+                {'_id': self.make_key(kind, content_hash, variant)},
+                {
+                    '$set': {'kind': kind, 'content_hash': content_hash, 'value': value, 'last_used_at': now},
+                    '$setOnInsert': {'created_at': now, 'hits': 0},
+                },
+                upsert=True,
+            )
+        except Exception as e:
+            logger.error(f"Ошибка при записи в кэш анализа ({kind}): {e}")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        if not self.enabled:
+            return {}
+
+        result = {}
+        for item in self.db.analysis_cache_stats.find():
+            hits, misses = item.get('hits', 0), item.get('misses', 0)
+            total = hits + misses
+            result[item['_id']] = {
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': hits / total if total else 0.0,
+                'entries': self.db.analysis_cache.count_documents({'kind': item['_id']}),
+            }
+        return result
+
+    def clear(self) -> int:
+        if not self.enabled:
+            return 0
+        self.db.analysis_cache_stats.delete_many({})
+        return self.db.analysis_cache.delete_many({}).deleted_count
+
+
+_analysis_cache: Optional[AnalysisCache] = None
+_analysis_cache_created_at = 0.0
+
+
+def get_analysis_cache() -> AnalysisCache:
+    global _analysis_cache, _analysis_cache_created_at
+
+    now = time.monotonic()
+    if _analysis_cache is None or (
+        not _analysis_cache.enabled and now - _analysis_cache_created_at >= RECONNECT_INTERVAL
+    ):
+        _analysis_cache = AnalysisCache()
+        _analysis_cache_created_at = now
+    return _analysis_cache
+
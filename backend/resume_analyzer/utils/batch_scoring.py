@@ -0,0 +1,156 @@
+import logging
+from typing import Any, Dict, Iterable, Mapping, Optional, Sequence
+
+import numpy as np
+
+from resume_analyzer.utils.scoring_weights import get_scoring_weights
+from resume_analyzer.utils.text_analysis import TextFeatures, extract_text_features
+
+logger = logging.getLogger(__name__)
+
+# Столбцы матрицы признаков. Отсутствующие в исходных данных признаки равны нулю.
+FEATURE_COLUMNS = (
+    'word_count',
+    'skill_count',
+    'has_email',
+    'has_phone',
+    'has_education',
+    'has_experience',
+    'has_skills',
+    'mentions_education',
+    'mentions_experience',
+    'mentions_skills',
+    'has_bullets',
+)
+COLUMN_INDEX = {name: index for index, name in enumerate(FEATURE_COLUMNS)}
+
+SCORE_COLUMNS = (
+    'resume_score',
+    'content_score',
+    'format_score',
+    'completeness_score',
+    'skill_score',
+    'volume_score',
+    'overall_score',
+)
+
+
+def features_to_row(features: TextFeatures, skill_count: int = 0) -> Dict[str, Any]:
+    """Признаки одного резюме в виде строки матрицы."""
+    return {
+        'word_count': features.word_count,
+        'skill_count': skill_count,
+        'has_email': bool(features.emails),
+        'has_phone': bool(features.phones),
+        'has_education': features.has_education,
+        'has_experience': features.has_experience,
+        'has_skills': features.has_skills,
+        'mentions_education': features.mentions_education,
+        'mentions_experience': features.mentions_experience,
+        'mentions_skills': features.mentions_skills,
+        'has_bullets': features.has_bullets,
+    }
+
+
+def build_feature_matrix(rows: Iterable[Mapping[str, Any]]) -> np.ndarray:
+    """Строит матрицу признаков N x len(FEATURE_COLUMNS) из словарей признаков."""
+    data = [
+        tuple(float(row.get(column) or 0) for column in FEATURE_COLUMNS)
+        for row in rows
+    ]
+    if not data:
+        return np.zeros((0, len(FEATURE_COLUMNS)), dtype=np.float64)
+    return np.array(data, dtype=np.float64)
+
+
+def score_feature_matrix(matrix: np.ndarray,
+                         weights: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, np.ndarray]:
+    """
+    Векторный расчет всех оценок для матрицы признаков.
+
+    Слагаемые добавляются в том же порядке, что и в поштучных функциях
+    text_analysis и resumes.tasks, поэтому результаты совпадают с ними точно.
+    """
+    weights = weights or get_scoring_weights()
+
+    def column(name: str) -> np.ndarray:
+        return matrix[:, COLUMN_INDEX[name]]
+
+    word_count = column('word_count')
+    skill_count = column('skill_count')
+    has_email = column('has_email')
+    has_phone = column('has_phone')
+    has_education = column('has_education')
+    has_experience = column('has_experience')
+    has_skills = column('has_skills')
+
+    # text_analysis.calculate_resume_score
+    w = weights['resume']
+    resume_score = np.full(len(matrix), float(w['base']))
+    resume_score = resume_score + np.select(
+        [word_count < w['short_words'], word_count < w['medium_words'], word_count > w['long_words']],
+        [w['short_bonus'], w['medium_bonus'], w['long_bonus']],
+        default=0.0,
+    )
+    resume_score = resume_score + has_email * w['email']
+    resume_score = resume_score + has_phone * w['phone']
+    resume_score = resume_score + column('mentions_education') * w['education']
+    resume_score = resume_score + column('mentions_experience') * w['experience']
+    resume_score = resume_score + column('mentions_skills') * w['skills']
+    resume_score = np.clip(resume_score, 0, 100)
+
+    # text_analysis.calculate_content_score
+    content_score = np.minimum(100, word_count / weights['content']['words_per_point'])
+
+    # text_analysis.calculate_format_score
+    w = weights['format']
+    format_score = np.full(len(matrix), float(w['base']))
+    format_score = format_score + has_education * w['education']
+    format_score = format_score + has_experience * w['experience']
+    format_score = format_score + has_skills * w['skills']
+    format_score = format_score + column('has_bullets') * w['bullets']
+    format_score = np.clip(format_score, 0, 100)
+
+    # text_analysis.calculate_completeness_score
+    w = weights['completeness']
+    completeness_score = np.full(len(matrix), float(w['base']))
+    completeness_score = completeness_score + has_email * w['email']
+    completeness_score = completeness_score + has_phone * w['phone']
+    completeness_score = completeness_score + has_education * w['education']
+    completeness_score = completeness_score + has_experience * w['experience']
+    completeness_score = completeness_score + has_skills * w['skills']
+    completeness_score = np.clip(completeness_score, 0, 100)
+
+    # resumes.tasks.calculate_simple_scores
+    w = weights['simple']
+    skill_score = np.minimum(skill_count / w['skills_target'], 1) * w['skill_points']
+    volume_score = np.minimum(word_count / w['words_target'], 1) * w['volume_points']
+    overall_score = (skill_score + volume_score) / 2
+
+    return {
+        'resume_score': resume_score,
+        'content_score': content_score,
+        'format_score': format_score,
+        'completeness_score': completeness_score,
+        'skill_score': skill_score,
+        'volume_score': volume_score,
+        'overall_score': overall_score,
+    }
+
+
+def score_resumes(texts: Sequence[str], skill_counts: Optional[Sequence[int]] = None,
+                  weights: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, np.ndarray]:
+    """
+    Пакетная оценка множества резюме. Возвращает словарь столбцов оценок
+    (SCORE_COLUMNS), i-й элемент каждого столбца соответствует texts[i].
+    """
+    if skill_counts is None:
+        skill_counts = [0] * len(texts)
+    if len(skill_counts) != len(texts):
+        raise ValueError("Количество значений skill_counts не совпадает с количеством текстов")
+
+    matrix = build_feature_matrix(
+        features_to_row(extract_text_features(text), skill_count)
+        for text, skill_count in zip(texts, skill_counts)
+    )
+    return score_feature_matrix(matrix, weights)
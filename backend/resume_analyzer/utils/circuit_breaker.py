@@ -0,0 +1,253 @@
+import time
+import logging
+from typing import Any, Dict, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Верхние границы интервалов гистограммы задержек (секунды); последний интервал открытый
+LATENCY_BOUNDS = (0.25, 0.5, 1, 2, 4, 8, 16, 32)
+# Оценка p95, если он попал в открытый интервал
+LATENCY_OVERFLOW = LATENCY_BOUNDS[-1] * 2
+
+DEFAULTS = {
+    'LLM_BREAKER_WINDOW': 60,
+    'LLM_BREAKER_BUCKET': 10,
+    'LLM_BREAKER_MIN_REQUESTS': 10,
+    'LLM_BREAKER_ERROR_RATE': 0.5,
+    'LLM_BREAKER_P95_SECONDS': 15,
+    'LLM_BREAKER_OPEN_SECONDS': 30,
+    'LLM_BREAKER_HALF_OPEN_SUCCESSES': 2,
+}
+
+
+def _get_setting(name: str) -> Any:
+    try:
+        from django.conf import settings
+        return getattr(settings, name, DEFAULTS[name])
+    except Exception:
+        return DEFAULTS[name]
+
+
+class Permit(NamedTuple):
+    """Разрешение на вызов. probe - пробный вызов в полуоткрытом состоянии."""
+    probe: bool
+    started: float
+
+
+class CircuitBreaker:
+    """
+    Автоматический выключатель вызовов внешнего сервиса с общим для всех
+    процессов состоянием в кэше Django (Redis).
+
+    Вызовы учитываются в скользящем окне window секунд, разбитом на интервалы
+    по bucket секунд: число вызовов, ошибок и гистограмма задержек. Если в окне
+    не меньше min_requests вызовов и доля ошибок достигла error_rate или p95
+    задержки - p95_seconds, выключатель размыкается на open_seconds: allow()
+    возвращает None, и вызывающий код сразу идет по запасному пути. Затем
+    выключатель полуоткрыт: одновременно пропускается один пробный вызов,
+    после half_open_successes успешных проб он замыкается, после неудачной -
+    снова размыкается.
+
+        permit = breaker.allow()
+        if permit is None:
+            return fallback()
+        try:
+            result = call()
+        except Exception:
+            breaker.record(permit, success=False)
+            raise
+        breaker.record(permit, success=True)
+    """
+
+    def __init__(self, name: str, cache=None, **options):
+        self.name = name
+        self._cache = cache
+        self.window = int(options.get('window', _get_setting('LLM_BREAKER_WINDOW')))
+        self.bucket = max(1, int(options.get('bucket', _get_setting('LLM_BREAKER_BUCKET'))))
+        self.min_requests = int(options.get('min_requests', _get_setting('LLM_BREAKER_MIN_REQUESTS')))
+        self.error_rate = float(options.get('error_rate', _get_setting('LLM_BREAKER_ERROR_RATE')))
+        self.p95_seconds = float(options.get('p95_seconds', _get_setting('LLM_BREAKER_P95_SECONDS')))
+        self.open_seconds = int(options.get('open_seconds', _get_setting('LLM_BREAKER_OPEN_SECONDS')))
+        self.half_open_successes = int(
+            options.get('half_open_successes', _get_setting('LLM_BREAKER_HALF_OPEN_SUCCESSES'))
+        )
+
+    @property
+    def cache(self):
+        if self._cache is None:
+            from django.core.cache import cache
+            self._cache = cache
+        return self._cache
+
+    def _key(self, *parts: Any) -> str:
+        return ':'.join(['breaker', self.name, *(str(part) for part in parts)])
+
+    def _incr(self, key: str, timeout: Optional[int] = None) -> int:
+        # incr не создает ключ, поэтому первый счет ставится через add
+        if self.cache.add(key, 1, timeout):
+            return 1
+        return self.cache.incr(key)
+
+    def _buckets(self, now: float) -> List[int]:
+        current = int(now // self.bucket)
+        return list(range(current - self.window // self.bucket + 1, current + 1))
+
+    def state(self) -> str:
+        if self.cache.get(self._key('state')) != OPEN:
+            return CLOSED
+        if self.cache.get(self._key('open_until')):
+            return OPEN
+        return HALF_OPEN
+
+    def allow(self) -> Optional[Permit]:
+        try:
+            state = self.state()
+            if state == CLOSED:
+                return Permit(False, time.monotonic())
+            if state == HALF_OPEN and self.cache.add(self._key('probe'), 1, self.open_seconds):
+                logger.info(f"Выключатель {self.name}: пробный вызов")
+                return Permit(True, time.monotonic())
+        except Exception as e:
+            # Без общего кэша выключатель не мешает вызовам
+            logger.warning(f"Выключатель {self.name} недоступен: {e}")
+            return Permit(False, time.monotonic())
+
+        self._count_rejected()
+        return None
+
+    def _count_rejected(self) -> None:
+        try:
+            self._incr(self._key('rejected'))
+        except Exception:
+            pass
+
+    def record(self, permit: Permit, success: bool, latency: Optional[float] = None) -> None:
+        if latency is None:
+            latency = time.monotonic() - permit.started
+
+        try:
+            now = time.time()
+            bucket = int(now // self.bucket)
+            ttl = self.window + self.bucket
+            self._incr(self._key(bucket, 'requests'), ttl)
+            if not success:
+                self._incr(self._key(bucket, 'failures'), ttl)
+            histogram_index = next(
+                (index for index, bound in enumerate(LATENCY_BOUNDS) if latency <= bound), len(LATENCY_BOUNDS)
+            )
+            self._incr(self._key(bucket, 'latency', histogram_index), ttl)
+
+            if permit.probe:
+                self._record_probe(success and latency <= self.p95_seconds)
+            elif (not success or latency > self.p95_seconds) and self.cache.get(self._key('state')) != OPEN:
+                # Порог может быть превышен только ошибкой или медленным вызовом
+                stats = self.window_stats(now)
+                if stats['requests'] >= self.min_requests and (
+                    stats['error_rate'] >= self.error_rate or stats['p95_latency'] >= self.p95_seconds
+                ):
+                    self.trip(stats)
+        except Exception as e:
+            logger.warning(f"Не удалось учесть вызов выключателем {self.name}: {e}")
+
+    def _record_probe(self, success: bool) -> None:
+        if not success:
+            self.trip()
+            return
+
+        successes = self._incr(self._key('probe_successes'), self.open_seconds * 10)
+        self.cache.delete(self._key('probe'))
+        if successes >= self.half_open_successes:
+            self.reset()
+            logger.info(f"Выключатель {self.name} замкнут после {successes} успешных проб")
+
+    def trip(self, stats: Optional[Dict[str, Any]] = None) -> None:
+        self.cache.set(self._key('state'), OPEN, None)
+        self.cache.set(self._key('open_until'), time.time() + self.open_seconds, self.open_seconds)
+        self.cache.delete_many([self._key('probe'), self._key('probe_successes')])
+        self._incr(self._key('opened'))
+        details = (
+            f" (вызовов {stats['requests']}, ошибок {stats['error_rate']:.0%}, p95 {stats['p95_latency']} с)"
+            if stats else ''
+        )
+        logger.warning(f"Выключатель {self.name} разомкнут на {self.open_seconds} с{details}")
+
+    def _window_keys(self, buckets: List[int]) -> List[str]:
+        keys = []
+        for bucket in buckets:
+            keys.append(self._key(bucket, 'requests'))
+            keys.append(self._key(bucket, 'failures'))
+            keys.extend(self._key(bucket, 'latency', index) for index in range(len(LATENCY_BOUNDS) + 1))
+        return keys
+
+    def reset(self) -> None:
+        """Замыкает выключатель и очищает окно, чтобы прежние ошибки не разомкнули его снова."""
+        self.cache.delete_many([
+            self._key('state'), self._key('open_until'), self._key('probe'), self._key('probe_successes'),
+            *self._window_keys(self._buckets(time.time())),
+        ])
+
+    def window_stats(self, now: Optional[float] = None) -> Dict[str, Any]:
+        now = now if now is not None else time.time()
+        buckets = self._buckets(now)
+        values = self.cache.get_many(self._window_keys(buckets))
+
+        requests = failures = 0
+        histogram = [0] * (len(LATENCY_BOUNDS) + 1)
+        for bucket in buckets:
+            requests += int(values.get(self._key(bucket, 'requests')) or 0)
+            failures += int(values.get(self._key(bucket, 'failures')) or 0)
+            for index in range(len(histogram)):
+                histogram[index] += int(values.get(self._key(bucket, 'latency', index)) or 0)
+
+        # p95 - верхняя граница интервала гистограммы, в который попадает 95-й процентиль
+        p95 = 0.0
+        total = sum(histogram)
+        if total:
+            threshold = total * 0.95
+            cumulative = 0
+            for index, count in enumerate(histogram):
+                cumulative += count
+                if cumulative >= threshold:
+                    p95 = LATENCY_BOUNDS[index] if index < len(LATENCY_BOUNDS) else LATENCY_OVERFLOW
+                    break
+
+        return {
+            'requests': requests,
+            'failures': failures,
+            'error_rate': failures / requests if requests else 0.0,
+            'p95_latency': p95,
+            'latency_histogram': dict(zip([*map(str, LATENCY_BOUNDS), 'inf'], histogram)),
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        stats = self.window_stats()
+        values = self.cache.get_many([self._key('opened'), self._key('rejected'), self._key('open_until')])
+        open_until = values.get(self._key('open_until'))
+        return {
+            'name': self.name,
+            'state': self.state(),
+            'open_for_seconds': max(0.0, round(open_until - time.time(), 1)) if open_until else 0.0,
+            'window_seconds': self.window,
+            'times_opened': int(values.get(self._key('opened')) or 0),
+            'rejected_calls': int(values.get(self._key('rejected')) or 0),
+            'thresholds': {
+                'min_requests': self.min_requests,
+                'error_rate': self.error_rate,
+                'p95_seconds': self.p95_seconds,
+                'open_seconds': self.open_seconds,
+            },
+            **stats,
+        }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(name: str = 'llm') -> CircuitBreaker:
+    if name not in _breakers:
+        _breakers[name] = CircuitBreaker(name)
+    return _breakers[name]
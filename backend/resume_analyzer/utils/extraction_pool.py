@@ -0,0 +1,263 @@
+import os
+import sys
+import json
+import time
+import atexit
+import select
+import signal
+import logging
+import threading
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from resume_analyzer.utils.text_extraction import ExtractedPage, ExtractionResult
+
+logger = logging.getLogger(__name__)
+
+OK = 'ok'
+TIMEOUT = 'timeout'
+MEMORY_LIMIT = 'memory_limit'
+TOO_DEEP = 'too_deep'
+CRASHED = 'crashed'
+ERROR = 'error'
+
+# Исходы, при которых повторная обработка того же файла приведет к тому же результату
+POISON_STATUSES = (TIMEOUT, MEMORY_LIMIT, TOO_DEEP, CRASHED)
+
+DEFAULT_TIMEOUT = 30
+DEFAULT_MEMORY_LIMIT_MB = 512
+DEFAULT_MAX_FILES_PER_CHILD = 50
+DEFAULT_MAX_WORKERS = 1
+
+WORKER_MODULE = 'resume_analyzer.utils.extraction_worker'
+# Каталог, из которого импортируется пакет resume_analyzer
+PROJECT_DIR = Path(__file__).resolve().parents[2]
+
+
+class PoolResult(NamedTuple):
+    status: str
+    extraction: Optional[ExtractionResult] = None
+    error: str = ''
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.status == OK
+
+    @property
+    def is_poison(self) -> bool:
+        return self.status in POISON_STATUSES
+
+
+class ExtractionAborted(Exception):
+    """
+    Извлечение прервано пулом (срок, память, глубина вложенности, сбой
+    процесса). Повторять его бессмысленно.
+    """
+
+    def __init__(self, status: str, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _get_setting(name: str, default: Any) -> Any:
+    try:
+        from django.conf import settings
+        return getattr(settings, name, default)
+    except Exception:
+        return default
+
+
+class _Worker:
+    """Один дочерний процесс извлечения, обрабатывающий файлы последовательно."""
+
+    def __init__(self, memory_limit_mb: int):
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(PROJECT_DIR), env.get('PYTHONPATH')]))
+        # Дочерний процесс не должен загружать настройки Django
+        env.pop('DJANGO_SETTINGS_MODULE', None)
+
+        # preexec_fn небезопасен в многопоточном процессе (пул threads воркеров Celery):
+        # новая группа процессов создается через start_new_session, а лимит памяти
+        # процесс-исполнитель устанавливает себе сам при запуске
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', WORKER_MODULE, '--memory-limit-mb', str(memory_limit_mb or 0)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            env=env,
+            cwd=str(PROJECT_DIR),
+            start_new_session=os.name == 'posix',
+        )
+        self.files_processed = 0
+        self._buffer = b''
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def send(self, request: Dict[str, Any]) -> None:
+        self.process.stdin.write(json.dumps(request).encode('ascii') + b'\n')
+        self.process.stdin.flush()
+
+    def read_response(self, deadline: float) -> Optional[Dict[str, Any]]:
+        """Читает одну строку ответа. None - истек срок; EOFError - процесс завершился."""
+        stdout = self.process.stdout
+        while b'\n' not in self._buffer:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+
+            ready, _, _ = select.select([stdout], [], [], remaining)
+            if not ready:
+                return None
+
+            chunk = os.read(stdout.fileno(), 1024 * 1024)
+            if not chunk:
+                raise EOFError
+            self._buffer += chunk
+
+        line, _, self._buffer = self._buffer.partition(b'\n')
+        return json.loads(line)
+
+    def kill(self) -> None:
+        if self.alive:
+            try:
+                # Процесс запущен в своей группе, завершаем ее целиком
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except (OSError, AttributeError):
+                self.process.kill()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            logger.error(f"Процесс извлечения {self.process.pid} не завершился после SIGKILL")
+        for stream in (self.process.stdin, self.process.stdout):
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+    def describe_exit(self) -> str:
+        returncode = self.process.poll()
+        if returncode is not None and returncode < 0:
+            try:
+                return f"завершен сигналом {signal.Signals(-returncode).name}"
+            except ValueError:
+                return f"завершен сигналом {-returncode}"
+        return f"завершен с кодом {returncode}"
+
+
+class ExtractionPool:
+    """
+    Пул изолированных процессов извлечения текста.
+
+    Каждый файл обрабатывается в отдельном дочернем процессе с ограничением
+    адресного пространства (RLIMIT_AS) и сроком выполнения: процесс, превысивший
+    срок, принудительно завершается. Процессы перезапускаются после
+    max_files_per_child файлов, а также после любого сбоя. Вместо исключений
+    возвращается PoolResult с исходом извлечения.
+
+    Используются обычные подпроцессы, а не multiprocessing: дочерние процессы
+    prefork-воркера Celery являются демонами и не могут создавать собственные пулы.
+    """
+
+    def __init__(self, timeout: Optional[float] = None, memory_limit_mb: Optional[int] = None,
+                 max_files_per_child: Optional[int] = None, max_workers: Optional[int] = None):
+        self.timeout = timeout if timeout is not None else float(
+            _get_setting('RESUME_EXTRACTION_TIMEOUT', DEFAULT_TIMEOUT))
+        self.memory_limit_mb = memory_limit_mb if memory_limit_mb is not None else int(
+            _get_setting('RESUME_EXTRACTION_MEMORY_LIMIT_MB', DEFAULT_MEMORY_LIMIT_MB))
+        self.max_files_per_child = max_files_per_child if max_files_per_child is not None else int(
+            _get_setting('RESUME_EXTRACTION_MAX_FILES_PER_CHILD', DEFAULT_MAX_FILES_PER_CHILD))
+        self.max_workers = max_workers or DEFAULT_MAX_WORKERS
+
+        self._idle: List[_Worker] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+
+    def _acquire(self) -> _Worker:
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.alive:
+                    return worker
+                worker.kill()
+        return _Worker(self.memory_limit_mb)
+
+    def _release(self, worker: _Worker, healthy: bool) -> None:
+        if healthy and worker.alive and worker.files_processed < self.max_files_per_child:
+            with self._lock:
+                self._idle.append(worker)
+            return
+        worker.kill()
+
+    def extract(self, file_path: str, file_type: Optional[str], max_pages: int, max_chars: int) -> PoolResult:
+        request = {'path': file_path, 'file_type': file_type, 'max_pages': max_pages, 'max_chars': max_chars}
+
+        with self._slots:
+            started = time.monotonic()
+            worker = self._acquire()
+            healthy = False
+            try:
+                worker.send(request)
+                response = worker.read_response(started + self.timeout)
+                elapsed = time.monotonic() - started
+
+                if response is None:
+                    logger.error(
+                        f"Извлечение текста из {file_path} прервано: превышен срок {self.timeout:.0f} с"
+                    )
+                    return PoolResult(TIMEOUT, error=f"Превышен срок извлечения текста ({self.timeout:.0f} с)",
+                                      elapsed=elapsed)
+
+                worker.files_processed += 1
+                status = response['status']
+                if status != OK:
+                    logger.warning(f"Извлечение текста из {file_path} завершилось с ошибкой: {response['error']}")
+                    # После RecursionError стек раскручен, процесс можно использовать дальше
+                    healthy = status in (ERROR, TOO_DEEP)
+                    return PoolResult(status, error=response['error'], elapsed=elapsed)
+
+                healthy = True
+                pages = [ExtractedPage(*page) for page in response['pages']]
+                extraction = ExtractionResult(response['file_type'], pages, response['truncated'])
+                return PoolResult(OK, extraction, elapsed=elapsed)
+
+            except (EOFError, BrokenPipeError):
+                worker.process.wait()
+                exit_reason = worker.describe_exit()
+                logger.error(f"Процесс извлечения текста из {file_path} {exit_reason}")
+                return PoolResult(CRASHED, error=f"Процесс извлечения текста {exit_reason}",
+                                  elapsed=time.monotonic() - started)
+            finally:
+                self._release(worker, healthy)
+
+    def extract_or_raise(self, file_path: str, file_type: Optional[str],
+                         max_pages: int, max_chars: int) -> ExtractionResult:
+        """Как extract, но вызывает ExtractionAborted для исходов из POISON_STATUSES и RuntimeError для ошибок."""
+        result = self.extract(file_path, file_type, max_pages, max_chars)
+        if result.ok:
+            return result.extraction
+        if result.is_poison:
+            raise ExtractionAborted(result.status, result.error)
+        raise RuntimeError(result.error)
+
+    def close(self) -> None:
+        with self._lock:
+            workers, self._idle = self._idle, []
+        for worker in workers:
+            worker.kill()
+
+
+_extraction_pool: Optional[ExtractionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_extraction_pool() -> ExtractionPool:
+    global _extraction_pool
+
+    with _pool_lock:
+        if _extraction_pool is None:
+            _extraction_pool = ExtractionPool()
+            atexit.register(_extraction_pool.close)
+        return _extraction_pool
@@ -0,0 +1,82 @@
+"""
+Процесс-исполнитель извлечения текста для пула resume_analyzer.utils.extraction_pool.
+
+Запускается как `python -m resume_analyzer.utils.extraction_worker` и обрабатывает
+запросы по одному: каждая строка stdin - JSON-запрос, каждая строка stdout - JSON-ответ.
+Настройки Django здесь недоступны, поэтому бюджет извлечения передается в запросе,
+а лимит памяти - аргументом --memory-limit-mb.
+"""
+import gc
+import sys
+import json
+import logging
+import argparse
+
+from resume_analyzer.utils.text_extraction import extract_resume_text
+
+try:
+    import resource
+except ImportError:  # не POSIX-система: ограничение памяти недоступно
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+
+def limit_memory(memory_limit_mb):
+    """Ограничивает адресное пространство процесса (RLIMIT_AS); 0 - без ограничения."""
+    if resource is None or not memory_limit_mb:
+        return
+    limit = memory_limit_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def handle_request(request):
+    try:
+        extraction = extract_resume_text(
+            request['path'],
+            request.get('file_type'),
+            max_pages=request['max_pages'],
+            max_chars=request['max_chars'],
+        )
+    except MemoryError:
+        return {'status': 'memory_limit', 'error': 'Превышен лимит памяти при извлечении текста'}
+    except RecursionError:
+        return {'status': 'too_deep', 'error': 'Слишком глубокая вложенность объектов документа'}
+    except Exception as e:
+        return {'status': 'error', 'error': f"{type(e).__name__}: {e}"}
+
+    return {
+        'status': 'ok',
+        'file_type': extraction.file_type,
+        'truncated': extraction.truncated,
+        'pages': [list(page) for page in extraction.pages],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--memory-limit-mb', type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+    limit_memory(args.memory_limit_mb)
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+
+        response = handle_request(json.loads(line))
+        try:
+            sys.stdout.write(json.dumps(response) + '\n')
+            sys.stdout.flush()
+        except BrokenPipeError:
+            return
+
+        if response['status'] == 'memory_limit':
+            # После MemoryError состояние процесса ненадежно - пул запустит новый
+            return
+        gc.collect()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+import re
+import copy
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'llm:analysis:'
+STATS_KEY = 'llm:analysis:stats:{name}'
+STATS_NAMES = ('local_hits', 'shared_hits', 'misses', 'bypassed')
+
+DEFAULT_LOCAL_SIZE = 256
+DEFAULT_TTL = 60 * 60 * 24 * 7
+
+_WHITESPACE = re.compile(r'[ \t\r\f\v\u00a0]+')
+_BLANK_LINES = re.compile(r'\n\s*\n+')
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Приводит текст к виду, не зависящему от пробелов и переносов, которые добавляет извлечение."""
+    if not text:
+        return ''
+    text = _WHITESPACE.sub(' ', text)
+    text = '\n'.join(line.strip() for line in text.split('\n'))
+    return _BLANK_LINES.sub('\n', text).strip()
+
+
+def make_llm_cache_key(resume_text: str, job_description: Optional[str], model: str,
+                       temperature: float, prompt_version: Union[int, str]) -> str:
+    payload = json.dumps(
+        [normalize_text(resume_text), normalize_text(job_description), model, float(temperature), prompt_version],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _get_setting(name: str, default: Any) -> Any:
+    try:
+        from django.conf import settings
+        return getattr(settings, name, default)
+    except Exception:
+        return default
+
+
+class LLMResponseCache:
+    """
+    Двухуровневый кэш ответов LLM.
+
+    Первый уровень - LRU в памяти процесса на local_size записей, второй - общий
+    кэш Django (Redis) с временем жизни ttl секунд. Попадание во второй уровень
+    копируется в первый. Счетчики попаданий ведутся в общем кэше, чтобы доля
+    попаданий считалась по всем воркерам.
+    """
+
+    def __init__(self, local_size: Optional[int] = None, ttl: Optional[int] = None, shared=None):
+        self.local_size = local_size if local_size is not None else int(
+            _get_setting('LLM_CACHE_LOCAL_SIZE', DEFAULT_LOCAL_SIZE)
+        )
+        self.ttl = ttl if ttl is not None else int(_get_setting('LLM_CACHE_TTL', DEFAULT_TTL))
+        self._shared = shared
+        self._local: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self):
+        if self._shared is None:
+            from django.core.cache import cache
+            self._shared = cache
+        return self._shared
+
+    def _count(self, name: str) -> None:
+        key = STATS_KEY.format(name=name)
+        try:
+            # incr не создает ключ, поэтому первый счет ставится через add
+            if not self.shared.add(key, 1, None):
+                self.shared.incr(key)
+        except Exception as e:
+            logger.warning(f"Не удалось обновить счетчик кэша LLM {name}: {e}")
+
+    def _remember(self, key: str, value: Dict[str, Any]) -> None:
+        if self.local_size <= 0:
+            return
+        with self._lock:
+            self._local[key] = copy.deepcopy(value)
+            self._local.move_to_end(key)
+            while len(self._local) > self.local_size:
+                self._local.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            value = self._local.get(key)
+            if value is not None:
+                self._local.move_to_end(key)
+        if value is not None:
+            self._count('local_hits')
+            # Вызывающий код может изменить результат, запись первого уровня должна остаться прежней
+            return copy.deepcopy(value)
+
+        try:
+            value = self.shared.get(KEY_PREFIX + key)
+        except Exception as e:
+            logger.error(f"Ошибка при чтении кэша LLM: {e}")
+            value = None
+
+        if value is None:
+            self._count('misses')
+            return None
+
+        self._remember(key, value)
+        self._count('shared_hits')
+        return value
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        self._remember(key, value)
+        try:
+            self.shared.set(KEY_PREFIX + key, value, self.ttl)
+        except Exception as e:
+            logger.error(f"Ошибка при записи в кэш LLM: {e}")
+
+    def record_bypass(self) -> None:
+        self._count('bypassed')
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            values = self.shared.get_many([STATS_KEY.format(name=name) for name in STATS_NAMES])
+        except Exception as e:
+            logger.error(f"Ошибка при чтении счетчиков кэша LLM: {e}")
+            values = {}
+
+        result = {name: int(values.get(STATS_KEY.format(name=name)) or 0) for name in STATS_NAMES}
+        lookups = result['local_hits'] + result['shared_hits'] + result['misses']
+        result['hit_rate'] = (result['local_hits'] + result['shared_hits']) / lookups if lookups else 0.0
+        result['local_entries'] = len(self._local)
+        return result
+
+    def clear_local(self) -> None:
+        with self._lock:
+            self._local.clear()
+
+    def reset_stats(self) -> None:
+        self.shared.delete_many([STATS_KEY.format(name=name) for name in STATS_NAMES])
+
+
+_llm_cache: Optional[LLMResponseCache] = None
+
+
+def get_llm_cache() -> LLMResponseCache:
+    global _llm_cache
+
+    if _llm_cache is None:
+        _llm_cache = LLMResponseCache()
+    return _llm_cache
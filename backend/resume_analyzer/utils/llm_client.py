@@ -0,0 +1,148 @@
+import time
+import asyncio
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+import httpx
+import openai
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_TIMEOUT = 30
+DEFAULT_MAX_RETRIES = 1
+
+
+def _get_setting(name: str, default: Any) -> Any:
+    try:
+        from django.conf import settings
+        return getattr(settings, name, default)
+    except Exception:
+        return default
+
+
+class TokenBucket:
+    """
+    Ограничение частоты запросов: rate токенов в секунду, не более capacity
+    подряд. rate <= 0 отключает ограничение.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+
+        # Ожидающие получают токены по очереди захвата блокировки
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AsyncLLMClient:
+    """
+    Асинхронный клиент chat completions для пакетного анализа.
+
+    Все запросы идут через один пул HTTP-соединений (keep-alive), число
+    одновременных запросов ограничено семафором max_concurrency, частота -
+    корзиной токенов rate_limit запросов в секунду. timeout ограничивает
+    каждый запрос без учета ожидания в очереди.
+
+    Клиент привязан к циклу событий, в котором создан:
+        async with AsyncLLMClient(api_key, base_url) as client:
+            text = await client.complete(messages, model, temperature)
+    """
+
+    def __init__(self, api_key: str, base_url: Optional[str] = None,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 max_connections: Optional[int] = None,
+                 timeout: float = DEFAULT_TIMEOUT,
+                 rate_limit: float = 0,
+                 rate_burst: Optional[float] = None,
+                 max_retries: int = DEFAULT_MAX_RETRIES):
+        self.max_concurrency = max(1, max_concurrency)
+        max_connections = max_connections or max(self.max_concurrency, DEFAULT_MAX_CONNECTIONS)
+
+        self._http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=httpx.Timeout(timeout),
+        )
+        self._client = openai.AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url or None,
+            timeout=timeout,
+            max_retries=max_retries,
+            http_client=self._http_client,
+        )
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._bucket = TokenBucket(rate_limit, rate_burst)
+
+    @classmethod
+    def from_settings(cls, api_key: str, base_url: Optional[str] = None, **overrides) -> 'AsyncLLMClient':
+        options = {
+            'max_concurrency': int(_get_setting('LLM_MAX_CONCURRENCY', DEFAULT_MAX_CONCURRENCY)),
+            'max_connections': int(_get_setting('LLM_MAX_CONNECTIONS', DEFAULT_MAX_CONNECTIONS)),
+            'timeout': float(_get_setting('LLM_REQUEST_TIMEOUT', DEFAULT_TIMEOUT)),
+            'rate_limit': float(_get_setting('LLM_RATE_LIMIT', 0)),
+            'max_retries': int(_get_setting('LLM_MAX_RETRIES', DEFAULT_MAX_RETRIES)),
+        }
+        options.update(overrides)
+        return cls(api_key, base_url, **options)
+
+    async def complete(self, messages: List[Dict[str, str]], model: str, temperature: float,
+                       max_tokens: int = 1000) -> str:
+        async with self._semaphore:
+            await self._bucket.acquire()
+            response = await self._client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+            )
+        return (response.choices[0].message.content or '').strip()
+
+    async def close(self) -> None:
+        await self._client.close()
+        await self._http_client.aclose()
+
+    async def __aenter__(self) -> 'AsyncLLMClient':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+
+_sync_clients: Dict[tuple, openai.OpenAI] = {}
+_sync_clients_lock = threading.Lock()
+
+
+def get_sync_client(api_key: str, base_url: Optional[str] = None) -> openai.OpenAI:
+    """
+    Синхронный клиент для одиночных запросов. Один клиент на процесс для каждой
+    пары ключ/адрес, чтобы соединения переиспользовались между запросами.
+    """
+    key = (api_key, base_url or None)
+    with _sync_clients_lock:
+        client = _sync_clients.get(key)
+        if client is None:
+            client = openai.OpenAI(
+                api_key=api_key,
+                base_url=base_url or None,
+                timeout=float(_get_setting('LLM_REQUEST_TIMEOUT', DEFAULT_TIMEOUT)),
+                max_retries=int(_get_setting('LLM_MAX_RETRIES', DEFAULT_MAX_RETRIES)),
+            )
+            _sync_clients[key] = client
+    return client
@@ -0,0 +1,291 @@
+import re
+import json
+import time
+import uuid
+import random
+import asyncio
+import logging
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LATENCY_DISTRIBUTIONS = ('constant', 'uniform', 'normal', 'lognormal')
+
+# Исходы запроса к заглушке
+OUTCOME_OK = 'ok'
+OUTCOME_ERROR = 'error'
+OUTCOME_RATE_LIMITED = 'rate_limited'
+OUTCOME_MALFORMED = 'malformed'
+
+SAMPLE_ANALYSIS = {
+    "skills_found": ["Python", "Django", "PostgreSQL"],
+    "format_quality": "good",
+    "structure_analysis": {
+        "has_contact_info": True,
+        "has_professional_summary": True,
+        "has_work_experience": True,
+        "has_education": True,
+        "has_skills_section": True,
+    },
+    "improvement_suggestions": ["Добавьте количественные показатели достижений"],
+    "overall_score": 7,
+}
+
+REASONS = {
+    200: 'OK', 400: 'Bad Request', 404: 'Not Found', 429: 'Too Many Requests', 500: 'Internal Server Error',
+}
+
+_RESUME_BLOCK = re.compile(r'Resume:\n```\n(.*?)\n```', re.DOTALL)
+_JOB_BLOCK = re.compile(r'Job description:\n```\n(.*?)\n```', re.DOTALL)
+
+
+def _find_skills(text: str) -> List[str]:
+    from resume_analyzer.utils.ai_analyzer import _common_skills_matcher
+    return _common_skills_matcher.find_values(text)
+
+
+def build_stub_analysis(prompt: str) -> Dict[str, Any]:
+    """
+    Анализ в формате ответа LLM, вычисленный из текста промпта: навыки из
+    блока резюме, структура по ключевым словам, при наличии вакансии - поля
+    сравнения с ней. Для одного промпта результат всегда одинаков.
+    """
+    match = _RESUME_BLOCK.search(prompt)
+    resume_text = match.group(1) if match else prompt
+    lowered = resume_text.lower()
+    skills = _find_skills(resume_text)
+
+    format_quality = "needs_improvement"
+    if len(resume_text) > 1000:
+        format_quality = "good"
+    elif len(resume_text) > 300:
+        format_quality = "average"
+
+    analysis = {
+        "skills_found": skills,
+        "format_quality": format_quality,
+        "structure_analysis": {
+            "has_contact_info": "@" in resume_text or "телефон" in lowered or "phone" in lowered,
+            "has_professional_summary": "summary" in lowered or "о себе" in lowered,
+            "has_work_experience": "experience" in lowered or "опыт" in lowered,
+            "has_education": "education" in lowered or "образование" in lowered,
+            "has_skills_section": "skills" in lowered or "навыки" in lowered,
+        },
+        "improvement_suggestions": list(SAMPLE_ANALYSIS["improvement_suggestions"]),
+        "overall_score": min(4 + len(skills) // 2, 10),
+    }
+
+    job_match = _JOB_BLOCK.search(prompt)
+    if job_match:
+        job_skills = _find_skills(job_match.group(1))
+        matching = [skill for skill in job_skills if skill in skills]
+        analysis.update({
+            "job_match_percentage": round(len(matching) / len(job_skills) * 100) if job_skills else 0,
+            "matching_skills": matching,
+            "missing_skills": [skill for skill in job_skills if skill not in skills],
+            "tailoring_suggestions": ["Опишите опыт работы с требуемыми в вакансии технологиями"],
+        })
+    return analysis
+
+
+class StubLLMServer:
+    """
+    Локальная заглушка chat completions для замеров и нагрузочных тестов.
+    Отвечает анализом в формате ответа LLM (build_stub_analysis) после задержки.
+
+    Задержка распределена по latency_distribution: constant - ровно latency
+    секунд, uniform - равномерно в latency ± latency_spread, normal - нормально
+    со средним latency и отклонением latency_spread, lognormal - логнормально
+    с медианой latency и параметром формы latency_spread (длинный хвост, как у
+    настоящего API). Доля error_rate запросов получает 500, rate_limit_rate -
+    429 с Retry-After, malformed_rate - ответ 200 с оборванным JSON в content.
+
+    Исход и задержка n-го запроса определяются только seed и n, поэтому
+    прогоны с одинаковыми параметрами воспроизводимы.
+
+    Сервер асинхронный и работает в отдельном потоке со своим циклом событий:
+    ожидание ответа не занимает поток на каждое соединение, поэтому заглушка
+    не становится узким местом при сотнях одновременных запросов.
+
+        server = StubLLMServer(latency=0.2).start()
+        client = openai.OpenAI(api_key='stub', base_url=server.base_url)
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                 latency_distribution: str = 'constant', latency_spread: float = 0.0,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0, malformed_rate: float = 0.0,
+                 seed: int = 0):
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Неизвестное распределение задержки: {latency_distribution}")
+        rates = (error_rate, rate_limit_rate, malformed_rate)
+        if any(rate < 0 for rate in rates) or sum(rates) > 1:
+            raise ValueError("Доли ошибок должны быть неотрицательными и в сумме не больше 1")
+
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.latency_distribution = latency_distribution
+        self.latency_spread = latency_spread
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.malformed_rate = malformed_rate
+        self.seed = seed
+        self.requests = 0
+        self.outcomes: Counter = Counter()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    @property
+    def base_url(self) -> str:
+        return f'http://{self.host}:{self.port}/v1'
+
+    async def respond(self, path: str, payload: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        if not path.rstrip('/').endswith('/chat/completions'):
+            return 404, {'error': {'message': f'Unknown path {path}', 'type': 'invalid_request_error'}}
+
+        self.requests += 1
+        rng = random.Random(f'{self.seed}:{self.requests}')
+        outcome = self.choose_outcome(rng)
+        self.outcomes[outcome] += 1
+
+        delay = self.sample_latency(rng)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if outcome == OUTCOME_ERROR:
+            return 500, {'error': {'message': 'Stub server error', 'type': 'server_error'}}
+        if outcome == OUTCOME_RATE_LIMITED:
+            return 429, {'error': {'message': 'Rate limit reached', 'type': 'rate_limit_error'}}
+
+        prompt = ''.join(
+            message.get('content') or '' for message in payload.get('messages') or []
+            if isinstance(message, dict) and message.get('role') == 'user'
+        )
+        content = json.dumps(build_stub_analysis(prompt), ensure_ascii=False)
+        if outcome == OUTCOME_MALFORMED:
+            content = content[:len(content) // 2]
+        return 200, self.completion(payload, content)
+
+    def choose_outcome(self, rng: random.Random) -> str:
+        value = rng.random()
+        for outcome, rate in ((OUTCOME_ERROR, self.error_rate), (OUTCOME_RATE_LIMITED, self.rate_limit_rate),
+                              (OUTCOME_MALFORMED, self.malformed_rate)):
+            if value < rate:
+                return outcome
+            value -= rate
+        return OUTCOME_OK
+
+    def sample_latency(self, rng: random.Random) -> float:
+        if self.latency_distribution == 'uniform':
+            delay = rng.uniform(self.latency - self.latency_spread, self.latency + self.latency_spread)
+        elif self.latency_distribution == 'normal':
+            delay = rng.gauss(self.latency, self.latency_spread)
+        elif self.latency_distribution == 'lognormal':
+            delay = self.latency * rng.lognormvariate(0, self.latency_spread)
+        else:
+            delay = self.latency
+        return max(0.0, delay)
+
+    @staticmethod
+    def completion(payload: Dict[str, Any], content: str) -> Dict[str, Any]:
+        return {
+            'id': f'chatcmpl-{uuid.uuid4().hex}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': payload.get('model', 'stub'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': 'stop',
+            }],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
+        }
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # Соединение сохраняется между запросами (HTTP/1.1 keep-alive), как у настоящего API
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+
+                lines = head.decode('latin-1').split('\r\n')
+                method, path, _ = lines[0].split(' ', 2)
+                headers = {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        name, value = line.split(':', 1)
+                        headers[name.strip().lower()] = value.strip()
+
+                body = await reader.readexactly(int(headers.get('content-length') or 0))
+                try:
+                    payload = json.loads(body or b'{}')
+                except ValueError:
+                    payload = None
+
+                if method != 'POST' or not isinstance(payload, dict):
+                    status, response = 400, {'error': {'message': 'Bad request', 'type': 'invalid_request_error'}}
+                else:
+                    status, response = await self.respond(path, payload)
+
+                data = json.dumps(response, ensure_ascii=False).encode('utf-8')
+                # Клиент openai повторяет ответ 429 после паузы из Retry-After
+                retry_after = 'Retry-After: 1\r\n' if status == 429 else ''
+                writer.write(
+                    f'HTTP/1.1 {status} {REASONS.get(status, "Error")}\r\n'
+                    f'Content-Type: application/json\r\nContent-Length: {len(data)}\r\n'
+                    f'{retry_after}\r\n'.encode('latin-1')
+                    + data
+                )
+                await writer.drain()
+
+                if headers.get('connection', '').lower() == 'close':
+                    return
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Ошибка заглушки LLM: {e}")
+        finally:
+            writer.close()
+
+    async def _serve(self) -> None:
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port, backlog=1024)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def _run(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._serve())
+        except asyncio.CancelledError:
+            pass
+        finally:
+            # Открытые keep-alive соединения закрываются вместе с сервером
+            pending = asyncio.all_tasks(self._loop)
+            for task in pending:
+                task.cancel()
+            if pending:
+                self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self._loop.close()
+
+    def start(self) -> 'StubLLMServer':
+        self._thread = threading.Thread(target=self._run, name='stub-llm', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def serve_forever(self) -> None:
+        self._run()
+
+    def stop(self) -> None:
+        if self._loop is not None and self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+        if self._thread is not None:
+            self._thread.join()
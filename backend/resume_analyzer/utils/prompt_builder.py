@@ -0,0 +1,286 @@
+import re
+import math
+import logging
+from collections import Counter
+from functools import lru_cache
+from typing import List, NamedTuple, Optional
+
+from resume_analyzer.utils.segmentation import (
+    CONTACTS, EDUCATION, EXPERIENCE, PROJECTS, SKILLS, SUMMARY, segment_resume,
+)
+
+try:
+    import tiktoken
+except ImportError:  # без tiktoken токены оцениваются по длине слов
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOKEN_BUDGET = 3000
+
+# При нехватке бюджета разделы включаются в этом порядке, остальные - после них
+SECTION_PRIORITY = (EXPERIENCE, SKILLS, SUMMARY, CONTACTS, PROJECTS, EDUCATION)
+
+OMITTED_MARKER = '[...]'
+
+ANALYSIS_INSTRUCTIONS = """Analyze the resume below and return a JSON object with this structure:
+{
+"skills_found": [technical and soft skills found in the resume],
+"format_quality": "good"|"average"|"needs_improvement",
+"structure_analysis": {"has_contact_info": bool, "has_professional_summary": bool, "has_work_experience": bool, "has_education": bool, "has_skills_section": bool},
+"improvement_suggestions": [specific suggestions],
+"overall_score": 1-10
+}
+Sections marked [...] were shortened to fit the limit, but they are present in the resume.
+Only return the JSON, no additional explanations."""
+
+JOB_INSTRUCTIONS = """Also compare the resume with the job description and add these fields:
+"job_match_percentage": 0-100, "matching_skills": [skills matching the job requirements],
+"missing_skills": [important job skills missing from the resume], "tailoring_suggestions": [how to tailor the resume for this job]"""
+
+_INLINE_WHITESPACE = re.compile(r'[ \t\r\f\v\u00a0]+')
+
+# Колонтитулы: номера страниц в разных написаниях
+PAGE_FURNITURE = re.compile(
+    r'^(?:'
+    r'(?:page|стр\.?|страница)\s*\d+(?:\s*(?:of|из|/)\s*\d+)?'
+    r'|\d+\s*(?:/|of|из)\s*\d+'
+    r'|[-–—]?\s*\d{1,3}\s*[-–—]?'
+    r')$',
+    re.IGNORECASE,
+)
+
+_TOKEN_PIECES = re.compile(r'\w+|[^\w\s]')
+
+
+class PromptBuild(NamedTuple):
+    prompt: str
+    original_tokens: int
+    prompt_tokens: int
+    truncated: bool
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.original_tokens - self.prompt_tokens)
+
+
+@lru_cache(maxsize=8)
+def _get_encoding(model: str):
+    """
+    Кодировка tiktoken для модели или None, если ее не удалось загрузить:
+    при первом использовании tiktoken скачивает файл BPE, без сети это невозможно.
+    Результат кэшируется, поэтому неудачная загрузка не повторяется и логируется один раз.
+    """
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding('cl100k_base')
+    except Exception as e:
+        logger.warning(f"Не удалось загрузить кодировку tiktoken для {model}, токены оцениваются по длине: {e}")
+        return None
+
+
+def count_tokens(text: str, model: str = 'gpt-3.5-turbo') -> int:
+    """
+    Число токенов текста. С tiktoken - точно для модели, без него (или без
+    загруженной кодировки) - оценка с запасом: латиница около 4 символов на
+    токен, кириллица около 2.
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding(model) if tiktoken is not None else None
+    if encoding is not None:
+        return len(encoding.encode(text))
+
+    tokens = 0
+    for piece in _TOKEN_PIECES.findall(text):
+        tokens += math.ceil(len(piece) / (4 if piece.isascii() else 2))
+    return tokens
+
+
+# Сколько строк у начала и конца страницы проверяется на колонтитулы
+BOUNDARY_LINES = 2
+
+
+def compact_text(text: Optional[str]) -> str:
+    """
+    Убирает из извлеченного текста то, что не несет смысла для анализа:
+    выравнивающие пробелы pdftotext, пустые строки, номера страниц и
+    колонтитулы - строки, которые повторяются у границ нескольких страниц
+    (оставляется первое вхождение). Границами страниц считаются перевод
+    формата и строки с номером страницы; повторы внутри страниц (одинаковые
+    должности или пункты у разных мест работы) сохраняются.
+    """
+    if not text:
+        return ''
+
+    # Страницы - отрезки между переводами формата и номерами страниц
+    pages: List[List[str]] = [[]]
+    for raw_page in text.split('\f'):
+        if pages[-1]:
+            pages.append([])
+        for line in raw_page.split('\n'):
+            line = _INLINE_WHITESPACE.sub(' ', line).strip()
+            if not line:
+                continue
+            if PAGE_FURNITURE.match(line):
+                if pages[-1]:
+                    pages.append([])
+                continue
+            pages[-1].append(line)
+
+    # Верхний и нижний колонтитулы ищутся отдельно: строка должна повторяться
+    # в начале (или в конце) хотя бы двух страниц
+    furniture = set()
+    if len(pages) > 1:
+        for edge in (slice(None, BOUNDARY_LINES), slice(-BOUNDARY_LINES, None)):
+            counts = Counter(key for page in pages for key in {line.casefold() for line in page[edge]})
+            furniture.update(key for key, count in counts.items() if count > 1)
+
+    lines = []
+    kept_furniture = set()
+    for page in pages:
+        for position, line in enumerate(page):
+            key = line.casefold()
+            at_edge = position < BOUNDARY_LINES or position >= len(page) - BOUNDARY_LINES
+            if key in furniture and at_edge:
+                if key in kept_furniture:
+                    continue
+                kept_furniture.add(key)
+            lines.append(line)
+
+    return '\n'.join(lines)
+
+
+def _fit_words(line: str, budget: int, model: str) -> str:
+    """Наибольшее начало строки по словам, которое помещается в budget токенов."""
+    words = line.split(' ')
+    low, high = 0, len(words)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(' '.join(words[:middle]), model) <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    return ' '.join(words[:low])
+
+
+def _fit_lines(text: str, budget: int, model: str) -> str:
+    """
+    Первые строки текста, которые помещаются в budget токенов. Строка, на
+    которой бюджет заканчивается, обрезается по словам: иначе длинный текст
+    без переводов строк (например, из сканированного PDF) пропадал бы целиком.
+    """
+    kept = []
+    used = 0
+    for line in text.split('\n'):
+        tokens = count_tokens(line, model) + 1
+        if used + tokens > budget:
+            partial = _fit_words(line, budget - used - 1, model)
+            if partial:
+                kept.append(partial)
+            break
+        kept.append(line)
+        used += tokens
+    return '\n'.join(kept)
+
+
+def fit_to_budget(text: str, budget: int, model: str = 'gpt-3.5-turbo') -> str:
+    """
+    Сокращает текст резюме до budget токенов. Бюджет распределяется между
+    разделами в порядке SECTION_PRIORITY; раздел, который не поместился
+    целиком, обрезается по строкам. От пропущенных разделов остается заголовок
+    с отметкой [...], чтобы модель знала о них. Разделы выводятся в исходном порядке.
+    """
+    if count_tokens(text, model) <= budget:
+        return text
+
+    sections = segment_resume(text)
+    if not sections:
+        return _fit_lines(text, budget, model)
+
+    headings = [text[section.start:section.content_start].strip() for section in sections]
+    bodies = [text[section.content_start:section.end].strip() for section in sections]
+
+    # Заголовки и отметки о сокращении резервируются заранее: они сообщают
+    # модели о структуре резюме и не должны выводить промпт за бюджет
+    marker_tokens = count_tokens(OMITTED_MARKER, model) + 1
+    remaining = budget - sum(count_tokens(heading, model) + 2 + marker_tokens for heading in headings)
+    kept: List[Optional[str]] = [None] * len(sections)
+
+    order = sorted(
+        range(len(sections)),
+        key=lambda index: (
+            SECTION_PRIORITY.index(sections[index].name)
+            if sections[index].name in SECTION_PRIORITY else len(SECTION_PRIORITY),
+            index,
+        ),
+    )
+    tokens = [count_tokens(body, model) for body in bodies]
+    granted = [0] * len(sections)
+
+    # Первый проход: короткие разделы (до десятой части бюджета) включаются целиком,
+    # чтобы длинный опыт работы не вытеснил навыки и контакты. Второй проход
+    # распределяет остаток по приоритету.
+    small = budget // 10
+    for index in order:
+        if tokens[index] <= min(small, remaining):
+            granted[index] = tokens[index]
+            remaining -= tokens[index]
+    for index in order:
+        if remaining <= 0:
+            break
+        grant = min(tokens[index] - granted[index], remaining)
+        granted[index] += grant
+        remaining -= grant
+
+    for index in order:
+        if granted[index] >= tokens[index]:
+            kept[index] = bodies[index]
+        elif granted[index] > 0:
+            kept[index] = _fit_lines(bodies[index], granted[index], model)
+
+    parts = []
+    for heading, body, kept_body in zip(headings, bodies, kept):
+        if kept_body != body:
+            kept_body = f'{kept_body}\n{OMITTED_MARKER}' if kept_body else OMITTED_MARKER
+        parts.append('\n'.join(part for part in (heading, kept_body) if part))
+    return '\n\n'.join(parts)
+
+
+def build_analysis_prompt(resume_text: str, job_description: Optional[str] = None,
+                          token_budget: int = DEFAULT_TOKEN_BUDGET,
+                          model: str = 'gpt-3.5-turbo') -> PromptBuild:
+    """
+    Промпт анализа резюме в пределах token_budget токенов. Текст резюме и
+    описание вакансии сжимаются (compact_text); если текст все равно не
+    помещается, сохраняются приоритетные разделы (fit_to_budget).
+    original_tokens - размер промпта с исходным текстом, для оценки экономии.
+    """
+    instructions = ANALYSIS_INSTRUCTIONS
+    job_text = compact_text(job_description)
+    if job_text:
+        # Описание вакансии получает не больше трети бюджета
+        job_text = _fit_lines(job_text, token_budget // 3, model)
+        instructions = f'{instructions}\n\n{JOB_INSTRUCTIONS}'
+
+    def render(text: str) -> str:
+        prompt = f'{instructions}\n\nResume:\n```\n{text}\n```'
+        if job_text:
+            prompt += f'\n\nJob description:\n```\n{job_text}\n```'
+        return prompt
+
+    fixed_tokens = count_tokens(render(''), model)
+    original_tokens = fixed_tokens + count_tokens(resume_text, model) + count_tokens(job_description or '', model)
+
+    compacted = compact_text(resume_text)
+    fitted = fit_to_budget(compacted, max(0, token_budget - fixed_tokens), model)
+    prompt = render(fitted)
+
+    return PromptBuild(
+        prompt=prompt,
+        original_tokens=original_tokens,
+        prompt_tokens=count_tokens(prompt, model),
+        truncated=fitted != compacted,
+    )
@@ -0,0 +1,80 @@
+import copy
+import logging
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Веса правил оценки резюме. Используются и поштучным расчетом
+# (text_analysis, resumes.tasks), и пакетным (batch_scoring),
+# поэтому изменение весов одинаково влияет на оба пути.
+# Переопределяются частично через settings.RESUME_SCORING_WEIGHTS.
+DEFAULT_SCORING_WEIGHTS: Dict[str, Dict[str, float]] = {
+    # text_analysis.calculate_resume_score
+    'resume': {
+        'base': 50.0,
+        'short_words': 100,
+        'short_bonus': -15.0,
+        'medium_words': 300,
+        'medium_bonus': -5.0,
+        'long_words': 500,
+        'long_bonus': 10.0,
+        'email': 5.0,
+        'phone': 5.0,
+        'education': 10.0,
+        'experience': 15.0,
+        'skills': 10.0,
+    },
+    # text_analysis.calculate_content_score
+    'content': {
+        'words_per_point': 10.0,
+    },
+    # text_analysis.calculate_format_score
+    'format': {
+        'base': 50.0,
+        'education': 10.0,
+        'experience': 10.0,
+        'skills': 10.0,
+        'bullets': 10.0,
+    },
+    # text_analysis.calculate_completeness_score
+    'completeness': {
+        'base': 0.0,
+        'email': 20.0,
+        'phone': 20.0,
+        'education': 20.0,
+        'experience': 20.0,
+        'skills': 20.0,
+    },
+    # resumes.tasks.simple_resume_analysis
+    'simple': {
+        'skills_target': 5,
+        'skill_points': 50.0,
+        'words_target': 500,
+        'volume_points': 50.0,
+    },
+}
+
+
+def get_scoring_weights(overrides: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Dict[str, float]]:
+    """
+    Возвращает веса оценки: значения по умолчанию, поверх которых
+    накладываются settings.RESUME_SCORING_WEIGHTS и явно переданные overrides.
+    """
+    weights = copy.deepcopy(DEFAULT_SCORING_WEIGHTS)
+
+    layers = []
+    try:
+        from django.conf import settings
+        layers.append(getattr(settings, 'RESUME_SCORING_WEIGHTS', None))
+    except Exception as e:
+        logger.debug(f"Настройки Django недоступны, используются веса по умолчанию: {e}")
+    layers.append(overrides)
+
+    for layer in layers:
+        for group, values in (layer or {}).items():
+            if group not in weights:
+                logger.warning(f"Неизвестная группа весов оценки: {group}")
+                continue
+            weights[group].update(values)
+
+    return weights
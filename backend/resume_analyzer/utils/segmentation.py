@@ -0,0 +1,129 @@
+import re
+import logging
+from typing import Any, Dict, Iterable, List, NamedTuple, Sequence, Union
+
+logger = logging.getLogger(__name__)
+
+CONTACTS = 'contacts'
+SUMMARY = 'summary'
+EXPERIENCE = 'experience'
+EDUCATION = 'education'
+SKILLS = 'skills'
+PROJECTS = 'projects'
+
+SECTION_NAMES = (CONTACTS, SUMMARY, EXPERIENCE, EDUCATION, SKILLS, PROJECTS)
+
+# Заголовки разделов на русском и английском языках
+SECTION_HEADINGS = {
+    CONTACTS: [
+        'контакты', 'контактная информация', 'контактные данные',
+        'contacts', 'contact', 'contact information', 'contact details',
+    ],
+    SUMMARY: [
+        'о себе', 'обо мне', 'цель', 'профиль', 'краткая информация',
+        'summary', 'professional summary', 'profile', 'about me', 'about', 'objective',
+    ],
+    EXPERIENCE: [
+        'опыт работы', 'опыт', 'профессиональный опыт', 'трудовая деятельность', 'места работы',
+        'experience', 'work experience', 'professional experience', 'employment history',
+        'employment', 'work history',
+    ],
+    EDUCATION: [
+        'образование', 'обучение', 'курсы', 'сертификаты', 'повышение квалификации',
+        'education', 'courses', 'certifications', 'certificates', 'training',
+    ],
+    SKILLS: [
+        'навыки', 'ключевые навыки', 'профессиональные навыки', 'технические навыки', 'умения',
+        'технологии', 'стек технологий',
+        'skills', 'key skills', 'technical skills', 'core competencies', 'technologies', 'tech stack',
+    ],
+    PROJECTS: [
+        'проекты', 'личные проекты', 'портфолио',
+        'projects', 'personal projects', 'pet projects', 'portfolio',
+    ],
+}
+
+
+def _heading_alternatives(headings: Iterable[str]) -> str:
+    # Длинные варианты первыми, чтобы "опыт работы" не распознавался как "опыт"
+    ordered = sorted(set(headings), key=len, reverse=True)
+    return '|'.join(re.escape(heading).replace(r'\ ', r'[ \t]+') for heading in ordered)
+
+
+# Заголовок - отдельная строка (возможно, с маркером в начале), содержащая только
+# название раздела, либо название с двоеточием и содержимым раздела на той же строке
+HEADING_PATTERN = re.compile(
+    r'^[ \t]*(?:[#*•▪►\-–—]+[ \t]*)?'
+    r'(?:' + '|'.join(
+        f'(?P<{name}>{_heading_alternatives(headings)})'
+        for name, headings in SECTION_HEADINGS.items()
+    ) + r')'
+    r'[ \t]*(?P<inline>:[^\n]*)?$',
+    re.IGNORECASE | re.MULTILINE,
+)
+
+
+class ResumeSection(NamedTuple):
+    name: str
+    start: int
+    content_start: int
+    end: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._asdict()
+
+
+SectionLike = Union[ResumeSection, Dict[str, Any]]
+
+
+def segment_resume(text: str) -> List[ResumeSection]:
+    """
+    Разбивает текст резюме на разделы за один проход скомпилированным шаблоном заголовков.
+    Текст до первого заголовка считается разделом контактов.
+    Смещения указываются в символах исходного текста: start - начало заголовка,
+    content_start - начало содержимого, end - начало следующего раздела.
+    """
+    if not text:
+        return []
+
+    headings = []
+    for match in HEADING_PATTERN.finditer(text):
+        name = next(section for section in SECTION_NAMES if match.group(section) is not None)
+
+        if match.group('inline') is not None:
+            content_start = match.start('inline') + 1
+        else:
+            content_start = min(match.end() + 1, len(text))
+        headings.append((name, match.start(), content_start))
+
+    sections = []
+    first_heading = headings[0][1] if headings else len(text)
+    if text[:first_heading].strip():
+        sections.append(ResumeSection(CONTACTS, 0, 0, first_heading))
+
+    for index, (name, start, content_start) in enumerate(headings):
+        end = headings[index + 1][1] if index + 1 < len(headings) else len(text)
+        sections.append(ResumeSection(name, start, min(content_start, end), end))
+
+    return sections
+
+
+def _as_section(section: SectionLike) -> ResumeSection:
+    if isinstance(section, ResumeSection):
+        return section
+    return ResumeSection(section['name'], section['start'], section['content_start'], section['end'])
+
+
+def get_section_text(text: str, sections: Sequence[SectionLike],
+                     names: Union[str, Iterable[str]], include_headings: bool = False) -> str:
+    """Возвращает объединенный текст разделов с указанными названиями."""
+    if isinstance(names, str):
+        names = (names,)
+    names = set(names)
+
+    parts = []
+    for section in map(_as_section, sections):
+        if section.name in names:
+            start = section.start if include_headings else section.content_start
+            parts.append(text[start:section.end].strip())
+    return '\n\n'.join(part for part in parts if part)
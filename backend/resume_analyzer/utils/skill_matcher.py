@@ -0,0 +1,142 @@
+import logging
+from collections import deque
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, NamedTuple, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SkillMatch(NamedTuple):
+    value: Any
+    start: int
+    end: int
+
+
+def _is_word_char(char: str) -> bool:
+    """Аналог класса \\w из модуля re для одного символа."""
+    return char.isalnum() or char == '_'
+
+
+def fold_case(text: str) -> str:
+    """
+    Приводит текст к нижнему регистру с сохранением длины строки,
+    чтобы смещения совпадений соответствовали исходному тексту.
+    """
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    # Редкие символы (например, 'İ') при lower() превращаются в несколько символов
+    return ''.join(c if len(c.lower()) != 1 else c.lower() for c in text)
+
+
+class SkillMatcher:
+    """
+    Многошаблонный поиск навыков по алгоритму Ахо-Корасик.
+
+    Автомат строится один раз по списку терминов и за один проход по тексту
+    находит все вхождения без учета регистра. Граница слова проверяется только
+    с той стороны термина, где стоит буквенно-цифровой символ, поэтому
+    "C++" и "C#" находятся так же, как "Python".
+    """
+
+    __slots__ = ('_goto', '_fail', '_output', '_values', '_order', '_size')
+
+    def __init__(self, terms: Iterable[Tuple[str, Hashable]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Для каждого состояния: список (длина термина, индекс значения, граница слева, граница справа)
+        self._output: List[List[Tuple[int, int, bool, bool]]] = [[]]
+        self._values: List[Hashable] = []
+        self._order: Dict[Hashable, int] = {}
+        self._size = 0
+
+        for term, value in terms:
+            self._add(term, value)
+        self._build()
+
+    @classmethod
+    def from_names(cls, names: Iterable[str]) -> 'SkillMatcher':
+        return cls((name, name) for name in names)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _add(self, term: str, value: Hashable) -> None:
+        term = fold_case(term.strip())
+        if not term:
+            return
+
+        state = 0
+        for char in term:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+
+        self._values.append(value)
+        self._order.setdefault(value, len(self._order))
+        self._output[state].append((
+            len(term),
+            len(self._values) - 1,
+            _is_word_char(term[0]),
+            _is_word_char(term[-1]),
+        ))
+        self._size += 1
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                candidate = self._goto[fail].get(char, 0)
+                self._fail[next_state] = candidate if candidate != next_state else 0
+                if self._output[self._fail[next_state]]:
+                    self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def finditer(self, text: str) -> Iterator[SkillMatch]:
+        """Возвращает все совпадения с учетом границ слов и смещениями в исходном тексте."""
+        if not text or not self._size:
+            return
+
+        folded = fold_case(text)
+        length = len(folded)
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        values = self._values
+
+        state = 0
+        for position, char in enumerate(folded):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            if not output[state]:
+                continue
+
+            end = position + 1
+            for term_length, value_index, left_word, right_word in output[state]:
+                start = end - term_length
+                if left_word and start > 0 and _is_word_char(folded[start - 1]):
+                    continue
+                if right_word and end < length and _is_word_char(folded[end]):
+                    continue
+                yield SkillMatch(values[value_index], start, end)
+
+    def find_all(self, text: str) -> List[SkillMatch]:
+        return list(self.finditer(text))
+
+    def find_values(self, text: str) -> List[Any]:
+        """
+        Возвращает уникальные найденные значения в порядке добавления терминов
+        (для навыков из БД это порядок каталога).
+        """
+        found = {match.value for match in self.finditer(text)}
+        return sorted(found, key=self._order.__getitem__)
@@ -1,148 +1,232 @@
 import re
 import logging
-from typing import Dict, Any, List, Set, Tuple
+from typing import Dict, Any, List, Set, Tuple, FrozenSet, Optional
+
+from resume_analyzer.utils.scoring_weights import get_scoring_weights
 
 logger = logging.getLogger(__name__)
 
+EMAIL_PATTERN = re.compile(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+# Упрощенный паттерн для поиска телефонов
+PHONE_PATTERN = re.compile(r'(?:\+7|8)[\s-]?\(?\d{3}\)?[\s-]?\d{3}[\s-]?\d{2}[\s-]?\d{2}')
+
+# Ключевые слова разделов. Основные формы используются всеми оценками,
+# расширенные (*_extra) - только общей оценкой резюме.
+SECTION_KEYWORDS = {
+    'education': ('образование', 'education'),
+    'education_extra': ('обучение', 'учеба'),
+    'experience': ('опыт работы', 'experience'),
+    'experience_extra': ('стаж',),
+    'skills': ('навыки', 'skills'),
+    'skills_extra': ('умения',),
+}
+
+BULLET_MARKERS = ('•', '*', '–', '-')
+
+
+class TextFeatures:
+    """
+    Признаки текста резюме, вычисляемые один раз и используемые всеми оценками.
+    """
+    __slots__ = (
+        'text', 'lower', 'word_count', 'line_count',
+        'emails', 'phones', 'section_hits', 'has_bullets',
+    )
+
+    def __init__(self, text: str):
+        self.text = text
+        self.lower = text.lower()
+        self.word_count = len(text.split())
+        self.line_count = text.count('\n') + 1 if text else 0
+        self.emails = EMAIL_PATTERN.findall(text) if '@' in text else []
+        self.phones = PHONE_PATTERN.findall(text)
+        self.section_hits = self._find_sections(self.lower)
+        self.has_bullets = any(marker in text for marker in BULLET_MARKERS)
+
+    @staticmethod
+    def _find_sections(lower: str) -> FrozenSet[str]:
+        # Поиск подстрок в уже приведенном к нижнему регистру тексте
+        # дает тот же результат, что и прежние re.search по text.lower()
+        return frozenset(
+            key for key, keywords in SECTION_KEYWORDS.items()
+            if any(keyword in lower for keyword in keywords)
+        )
+
+    @property
+    def has_contact_info(self) -> bool:
+        return bool(self.emails or self.phones)
+
+    @property
+    def has_education(self) -> bool:
+        return 'education' in self.section_hits
+
+    @property
+    def has_experience(self) -> bool:
+        return 'experience' in self.section_hits
+
+    @property
+    def has_skills(self) -> bool:
+        return 'skills' in self.section_hits
+
+    @property
+    def mentions_education(self) -> bool:
+        return self.has_education or 'education_extra' in self.section_hits
+
+    @property
+    def mentions_experience(self) -> bool:
+        return self.has_experience or 'experience_extra' in self.section_hits
+
+    @property
+    def mentions_skills(self) -> bool:
+        return self.has_skills or 'skills_extra' in self.section_hits
+
+
+def extract_text_features(text: str) -> TextFeatures:
+    """Вычисляет все признаки текста резюме за один проход."""
+    return TextFeatures(text or '')
+
+
 def analyze_resume_text(text: str) -> Dict[str, Any]:
     """
     Анализирует текст резюме и возвращает результаты анализа.
     """
+    features = extract_text_features(text)
+    weights = get_scoring_weights()
     results = {}
     
     # Базовые метрики текста
-    results['word_count'] = len(text.split())
+    results['word_count'] = features.word_count
     
     # Поиск контактной информации
-    emails = extract_emails(text)
-    phones = extract_phone_numbers(text)
     results['contact_info'] = {
-        'emails': emails,
-        'phones': phones
+        'emails': features.emails,
+        'phones': features.phones
     }
     
     # Оценка общего качества резюме
-    results['overall_score'] = calculate_resume_score(text, emails, phones)
+    results['overall_score'] = calculate_resume_score(features, weights)
     
     # Рекомендации для улучшения
-    results['recommendations'] = generate_recommendations(text, results)
+    results['recommendations'] = generate_recommendations(features, results)
     
     # Анализ структуры
-    results['structure_analysis'] = analyze_resume_structure(text)
+    results['structure_analysis'] = analyze_resume_structure(features)
     
     # Детали анализа
     results['analysis_details'] = {
-        'content_score': calculate_content_score(text),
-        'format_score': calculate_format_score(text),
-        'completeness_score': calculate_completeness_score(text, emails, phones)
+        'content_score': calculate_content_score(features, weights),
+        'format_score': calculate_format_score(features, weights),
+        'completeness_score': calculate_completeness_score(features, weights)
     }
     
     return results
 
 def extract_emails(text: str) -> List[str]:
     """Извлекает email адреса из текста."""
-    email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-    return re.findall(email_pattern, text)
+    return EMAIL_PATTERN.findall(text)
 
 def extract_phone_numbers(text: str) -> List[str]:
     """Извлекает номера телефонов из текста."""
-    # Упрощенный паттерн для поиска телефонов
-    phone_pattern = r'(?:\+7|8)[\s-]?\(?\d{3}\)?[\s-]?\d{3}[\s-]?\d{2}[\s-]?\d{2}'
-    return re.findall(phone_pattern, text)
+    return PHONE_PATTERN.findall(text)
 
-def calculate_resume_score(text: str, emails: List[str], phones: List[str]) -> float:
+def calculate_resume_score(features: TextFeatures, weights: Optional[Dict[str, Any]] = None) -> float:
     """
     Рассчитывает общую оценку резюме на основе различных факторов.
     Возвращает значение от 0 до 100.
     """
+    w = (weights or get_scoring_weights())['resume']
+    
     # Базовый скор
-    score = 50.0
+    score = w['base']
     
     # Длина текста
-    word_count = len(text.split())
-    if word_count < 100:
-        score -= 15
-    elif word_count < 300:
-        score -= 5
-    elif word_count > 500:
-        score += 10
+    word_count = features.word_count
+    if word_count < w['short_words']:
+        score += w['short_bonus']
+    elif word_count < w['medium_words']:
+        score += w['medium_bonus']
+    elif word_count > w['long_words']:
+        score += w['long_bonus']
     
     # Наличие контактной информации
-    if emails:
-        score += 5
-    if phones:
-        score += 5
+    if features.emails:
+        score += w['email']
+    if features.phones:
+        score += w['phone']
         
     # Ключевые секции резюме
-    if re.search(r'образование|education|обучение|учеба', text.lower()):
-        score += 10
-    if re.search(r'опыт работы|experience|стаж', text.lower()):
-        score += 15
-    if re.search(r'навыки|skills|умения', text.lower()):
-        score += 10
+    if features.mentions_education:
+        score += w['education']
+    if features.mentions_experience:
+        score += w['experience']
+    if features.mentions_skills:
+        score += w['skills']
         
     # Ограничиваем значение между 0 и 100
     return max(0, min(100, score))
 
-def calculate_content_score(text: str) -> float:
+def calculate_content_score(features: TextFeatures, weights: Optional[Dict[str, Any]] = None) -> float:
     """Рассчитывает оценку содержимого резюме."""
+    w = (weights or get_scoring_weights())['content']
     # Упрощенная реализация для примера
-    return min(100, len(text.split()) / 10)
+    return min(100, features.word_count / w['words_per_point'])
 
-def calculate_format_score(text: str) -> float:
+def calculate_format_score(features: TextFeatures, weights: Optional[Dict[str, Any]] = None) -> float:
     """Рассчитывает оценку форматирования резюме."""
+    w = (weights or get_scoring_weights())['format']
     # Упрощенная реализация для примера
-    score = 50.0
+    score = w['base']
     
     # Проверяем наличие заголовков и разделов
-    if re.search(r'образование|education', text.lower()):
-        score += 10
-    if re.search(r'опыт работы|experience', text.lower()):
-        score += 10
-    if re.search(r'навыки|skills', text.lower()):
-        score += 10
+    if features.has_education:
+        score += w['education']
+    if features.has_experience:
+        score += w['experience']
+    if features.has_skills:
+        score += w['skills']
         
     # Проверяем наличие маркированных списков
-    if re.search(r'•|\*|–|-', text):
-        score += 10
+    if features.has_bullets:
+        score += w['bullets']
         
     # Ограничиваем значение между 0 и 100
     return max(0, min(100, score))
 
-def calculate_completeness_score(text: str, emails: List[str], phones: List[str]) -> float:
+def calculate_completeness_score(features: TextFeatures, weights: Optional[Dict[str, Any]] = None) -> float:
     """Рассчитывает оценку полноты резюме."""
+    w = (weights or get_scoring_weights())['completeness']
     # Упрощенная реализация для примера
-    score = 0.0
+    score = w['base']
     
     # Проверяем наличие контактной информации
-    if emails:
-        score += 20
-    if phones:
-        score += 20
+    if features.emails:
+        score += w['email']
+    if features.phones:
+        score += w['phone']
         
     # Проверяем наличие основных разделов
-    if re.search(r'образование|education', text.lower()):
-        score += 20
-    if re.search(r'опыт работы|experience', text.lower()):
-        score += 20
-    if re.search(r'навыки|skills', text.lower()):
-        score += 20
+    if features.has_education:
+        score += w['education']
+    if features.has_experience:
+        score += w['experience']
+    if features.has_skills:
+        score += w['skills']
         
     # Ограничиваем значение между 0 и 100
     return max(0, min(100, score))
 
-def analyze_resume_structure(text: str) -> Dict[str, Any]:
+def analyze_resume_structure(features: TextFeatures) -> Dict[str, Any]:
     """Анализирует структуру резюме."""
     structure = {
-        'has_contact_info': bool(extract_emails(text) or extract_phone_numbers(text)),
-        'has_education': bool(re.search(r'образование|education', text.lower())),
-        'has_experience': bool(re.search(r'опыт работы|experience', text.lower())),
-        'has_skills': bool(re.search(r'навыки|skills', text.lower())),
+        'has_contact_info': features.has_contact_info,
+        'has_education': features.has_education,
+        'has_experience': features.has_experience,
+        'has_skills': features.has_skills,
     }
     
     return structure
 
-def generate_recommendations(text: str, analysis_results: Dict[str, Any]) -> List[str]:
+def generate_recommendations(features: TextFeatures, analysis_results: Dict[str, Any]) -> List[str]:
     """Генерирует рекомендации для улучшения резюме."""
     recommendations = []
     
@@ -159,11 +243,11 @@ def generate_recommendations(text: str, analysis_results: Dict[str, Any]) -> Lis
         recommendations.append('Добавьте номер телефона для связи')
     
     # Рекомендации по структуре
-    if not re.search(r'образование|education', text.lower()):
+    if not features.has_education:
         recommendations.append('Добавьте раздел с информацией об образовании')
-    if not re.search(r'опыт работы|experience', text.lower()):
+    if not features.has_experience:
         recommendations.append('Добавьте раздел с описанием опыта работы')
-    if not re.search(r'навыки|skills', text.lower()):
+    if not features.has_skills:
         recommendations.append('Добавьте раздел, перечисляющий ваши навыки')
     
     return recommendations
\ No newline at end of file
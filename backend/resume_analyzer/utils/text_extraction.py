@@ -1,97 +1,582 @@
+import io
 import os
+import re
+import time
+import codecs
+import select
+import shutil
 import logging
+import threading
 import subprocess
-import tempfile
-from typing import Optional
+import zipfile
+from typing import Any, BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Tuple, Type, Union
 
 logger = logging.getLogger(__name__)
 
-def extract_text_from_file(file_path: str, file_type: Optional[str] = None) -> str:
+# Увеличивается при изменении логики извлечения, чтобы не использовать устаревший кэш
+EXTRACTOR_VERSION = 2
+
+DEFAULT_MAX_PAGES = 20
+DEFAULT_MAX_CHARS = 100_000
+
+PDFTOTEXT_TIMEOUT = 30
+PDFTOTEXT_MAX_OUTPUT_BYTES = 16 * 1024 * 1024
+PIPE_CHUNK_SIZE = 64 * 1024
+
+# Путь к файлу или открытый двоичный файловый объект
+Source = Union[str, os.PathLike, BinaryIO]
+
+
+class ExtractedPage(NamedTuple):
+    number: int
+    text: str
+    backend: str
+
+
+class ExtractionResult:
+    """Результат извлечения текста: страницы с указанием источника и признак обрезки по бюджету."""
+
+    __slots__ = ('file_type', 'pages', 'truncated')
+
+    def __init__(self, file_type: str, pages: List[ExtractedPage], truncated: bool = False):
+        self.file_type = file_type
+        self.pages = pages
+        self.truncated = truncated
+
+    @property
+    def text(self) -> str:
+        return '\n'.join(page.text for page in self.pages).strip()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Метаданные извлечения без самого текста (для сохранения рядом с результатом анализа)."""
+        return {
+            'file_type': self.file_type,
+            'truncated': self.truncated,
+            'pages': [
+                {'page': page.number, 'backend': page.backend, 'chars': len(page.text)}
+                for page in self.pages
+            ],
+        }
+
+
+def _get_budget(name: str, default: int) -> int:
+    try:
+        from django.conf import settings
+        return int(getattr(settings, name, default))
+    except Exception:
+        return default
+
+
+class PdfBackend:
     """
-    Извлекает текст из файла резюме. 
-    Поддерживает форматы PDF, DOC и DOCX.
+    Источник текста PDF. Умеет выдавать страницы потоком, начиная с заданной,
+    и выбранные страницы за один проход - для постраничного резервного извлечения.
+    """
+    name = ''
+
+    def __init__(self, source: Source):
+        self.source = source
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return True
+
+    def iter_pages(self, start: int, stop: int) -> Iterator[str]:
+        raise NotImplementedError
+
+    def iter_page_texts(self, indices: List[int]) -> Iterator[Tuple[int, str]]:
+        """Выдает (индекс, текст) для отсортированного списка страниц."""
+        wanted = set(indices)
+        for index, text in enumerate(self.iter_pages(indices[0], indices[-1] + 1), indices[0]):
+            if index in wanted:
+                yield index, text
+
+    def close(self) -> None:
+        pass
+
+
+class PdftotextBackend(PdfBackend):
+    """
+    pdftotext с выводом в stdout: текст декодируется из канала по мере поступления
+    и выдается постранично, без временных файлов. Источник может быть путем
+    или файловым объектом - тогда PDF передается через stdin.
+    Ограничены время работы и объем вывода; при досрочной остановке итерации
+    процесс завершается.
+    """
+    name = 'pdftotext'
+    timeout = PDFTOTEXT_TIMEOUT
+    max_output_bytes = PDFTOTEXT_MAX_OUTPUT_BYTES
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return shutil.which('pdftotext') is not None
+
+    def _feed_stdin(self, stdin: BinaryIO) -> None:
+        try:
+            if hasattr(self.source, 'seek'):
+                self.source.seek(0)
+            for chunk in iter(lambda: self.source.read(PIPE_CHUNK_SIZE), b''):
+                stdin.write(chunk)
+        except (BrokenPipeError, ValueError):
+            # pdftotext завершился раньше, чем прочитал весь ввод
+            pass
+        finally:
+            try:
+                stdin.close()
+            except (BrokenPipeError, ValueError):
+                pass
+
+    def iter_pages(self, start: int, stop: int) -> Iterator[str]:
+        from_stdin = not isinstance(self.source, (str, os.PathLike))
+
+        # Диапазон страниц нумеруется с 1; '-' вместо выходного файла - вывод в stdout
+        process = subprocess.Popen(
+            ['pdftotext', '-layout', '-enc', 'UTF-8', '-f', str(start + 1), '-l', str(stop),
+             '-' if from_stdin else os.fspath(self.source), '-'],
+            stdin=subprocess.PIPE if from_stdin else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+
+        writer = None
+        if from_stdin:
+            writer = threading.Thread(target=self._feed_stdin, args=(process.stdin,), daemon=True)
+            writer.start()
+
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        deadline = time.monotonic() + self.timeout
+        streams = {process.stdout.fileno(): process.stdout, process.stderr.fileno(): process.stderr}
+        stdout_fd = process.stdout.fileno()
+        output_bytes = 0
+        errors = b''
+        pending: List[str] = []
+
+        try:
+            while streams:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RuntimeError(f"pdftotext не завершился за {self.timeout} с")
+
+                ready, _, _ = select.select(list(streams), [], [], remaining)
+                for fd in ready:
+                    chunk = os.read(fd, PIPE_CHUNK_SIZE)
+                    if not chunk:
+                        del streams[fd]
+                        continue
+
+                    if fd != stdout_fd:
+                        # Сообщения об ошибках читаются параллельно, чтобы канал stderr не переполнился
+                        errors = (errors + chunk)[-PIPE_CHUNK_SIZE:]
+                        continue
+
+                    output_bytes += len(chunk)
+                    if output_bytes > self.max_output_bytes:
+                        raise RuntimeError(f"Вывод pdftotext превысил {self.max_output_bytes} байт")
+
+                    # Страницы разделяются символом перевода формата
+                    text = decoder.decode(chunk)
+                    if '\f' not in text:
+                        pending.append(text)
+                        continue
+
+                    pages = text.split('\f')
+                    pages[0] = ''.join(pending) + pages[0]
+                    pending = [pages.pop()]
+                    if writer is not None:
+                        # Весь ввод уже прочитан pdftotext: файловый объект свободен
+                        writer.join()
+                        writer = None
+                    yield from pages
+
+            pending.append(decoder.decode(b'', final=True))
+            pending = ''.join(pending)
+            returncode = process.wait(timeout=max(deadline - time.monotonic(), 0.1))
+            if returncode != 0:
+                raise RuntimeError(
+                    f"Ошибка при выполнении pdftotext: {errors.decode('utf-8', errors='replace').strip()}"
+                )
+
+            if pending.strip():
+                yield pending
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            if writer is not None:
+                writer.join()
+            process.stdout.close()
+            process.stderr.close()
+
+
+class PdfminerBackend(PdfBackend):
+    name = 'pdfminer'
+
+    @classmethod
+    def is_available(cls) -> bool:
+        try:
+            import pdfminer.high_level  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def _iter_layouts(self, page_numbers, maxpages: int) -> Iterator[str]:
+        from pdfminer.high_level import extract_pages
+        from pdfminer.layout import LTTextContainer
+
+        if hasattr(self.source, 'seek'):
+            self.source.seek(0)
+
+        # extract_pages разбирает документ лениво и только страницы из page_numbers
+        for layout in extract_pages(self.source, page_numbers=page_numbers, maxpages=maxpages):
+            yield ''.join(
+                element.get_text() for element in layout if isinstance(element, LTTextContainer)
+            )
+
+    def iter_pages(self, start: int, stop: int) -> Iterator[str]:
+        return self._iter_layouts(range(start, stop), stop)
+
+    def iter_page_texts(self, indices: List[int]) -> Iterator[Tuple[int, str]]:
+        # Пропущенные страницы не разбираются: один проход по документу на все выбранные
+        return zip(indices, self._iter_layouts(set(indices), indices[-1] + 1))
+
+
+class PyPDF2Backend(PdfBackend):
+    name = 'pypdf2'
+
+    def __init__(self, source: Source):
+        super().__init__(source)
+        self._file = None
+        self._reader = None
+
+    @classmethod
+    def is_available(cls) -> bool:
+        try:
+            import PyPDF2  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def _get_reader(self):
+        if self._reader is None:
+            import PyPDF2
+            if _is_path(self.source):
+                self._file = open(self.source, 'rb')
+                self._reader = PyPDF2.PdfReader(self._file)
+            else:
+                self._reader = PyPDF2.PdfReader(self.source)
+        return self._reader
+
+    def iter_pages(self, start: int, stop: int) -> Iterator[str]:
+        reader = self._get_reader()
+        for index in range(start, min(stop, len(reader.pages))):
+            yield reader.pages[index].extract_text() or ""
+
+    def iter_page_texts(self, indices: List[int]) -> Iterator[Tuple[int, str]]:
+        reader = self._get_reader()
+        for index in indices:
+            if index < len(reader.pages):
+                yield index, reader.pages[index].extract_text() or ""
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        self._reader = None
+
+
+def _is_path(source: Source) -> bool:
+    return isinstance(source, (str, os.PathLike))
+
+
+def _describe(source: Source) -> str:
+    return os.fspath(source) if _is_path(source) else getattr(source, 'name', '<поток>')
+
+
+# Порядок - от самого быстрого источника к самому медленному
+PDF_BACKENDS: List[Type[PdfBackend]] = [PdftotextBackend, PdfminerBackend, PyPDF2Backend]
+
+
+class _PageBudget:
+    def __init__(self, max_pages: int, max_chars: int):
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self.chars = 0
+        self.pages: List[ExtractedPage] = []
+        self.truncated = False
+
+    @property
+    def exhausted(self) -> bool:
+        return self.truncated or len(self.pages) >= self.max_pages
+
+    def add(self, text: str, backend: str) -> None:
+        remaining = self.max_chars - self.chars
+        if len(text) > remaining:
+            text = text[:max(remaining, 0)]
+            self.truncated = True
+        self.chars += len(text)
+        self.pages.append(ExtractedPage(len(self.pages) + 1, text, backend))
+
+
+def _fill_blank_pages(pages: List[Tuple[str, str]], start: int, fallbacks: List[PdfBackend]) -> None:
+    """
+    Заменяет пустые страницы основного источника текстом резервных. Каждый
+    резервный источник читает все оставшиеся пустые страницы за один проход.
+    """
+    for fallback in fallbacks:
+        blank = [start + offset for offset, (text, _) in enumerate(pages) if not text.strip()]
+        if not blank:
+            return
+        try:
+            for index, text in fallback.iter_page_texts(blank):
+                if text.strip():
+                    pages[index - start] = (text, fallback.name)
+        except MemoryError:
+            raise
+        except Exception as e:
+            logger.warning(f"{fallback.name}: ошибка при извлечении пустых страниц {[i + 1 for i in blank]}: {e}")
+
+
+def _extract_pdf(source: Source, budget: _PageBudget) -> None:
+    available = [backend for backend in PDF_BACKENDS if backend.is_available()]
+    if _is_path(source):
+        backends = [backend(source) for backend in available]
+    else:
+        # Источники читают документ независимо друг от друга, поэтому каждый
+        # получает собственный поток поверх одних и тех же байтов
+        data = source.read()
+        backends = [backend(io.BytesIO(data)) for backend in available]
+    if not backends:
+        raise RuntimeError("Не найдено ни одной библиотеки для извлечения текста из PDF")
+
+    try:
+        primary_index = 0
+        while primary_index < len(backends) and not budget.exhausted:
+            primary = backends[primary_index]
+            start = len(budget.pages)
+            pages: List[Tuple[str, str]] = []
+            chars = budget.chars
+            more_pages = False
+            error = None
+            try:
+                # Запрашиваем на одну страницу больше бюджета, чтобы узнать об обрезке
+                for text in primary.iter_pages(start, budget.max_pages + 1):
+                    if start + len(pages) >= budget.max_pages:
+                        more_pages = True
+                        break
+                    pages.append((text, primary.name))
+                    chars += len(text)
+                    if chars > budget.max_chars:
+                        break
+            except MemoryError:
+                # Нехватка памяти не зависит от источника - не пробуем остальные
+                raise
+            except Exception as e:
+                error = e
+
+            # Резервный источник выбирается для каждой пустой страницы отдельно;
+            # страницы, полученные до ошибки основного источника, сохраняются
+            _fill_blank_pages(pages, start, backends[primary_index + 1:])
+            for text, backend_name in pages:
+                budget.add(text, backend_name)
+                if budget.truncated:
+                    break
+            if error is None:
+                budget.truncated = budget.truncated or more_pages
+                return
+
+            logger.warning(
+                f"{primary.name}: ошибка при извлечении текста из PDF {_describe(source)} "
+                f"(страница {start + len(pages) + 1}): {error}"
+            )
+            primary_index += 1
+    finally:
+        for backend in backends:
+            backend.close()
+
+
+WORD_NAMESPACE = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+MC_NAMESPACE = 'http://schemas.openxmlformats.org/markup-compatibility/2006'
+
+
+def _w(tag: str) -> str:
+    return f'{{{WORD_NAMESPACE}}}{tag}'
+
+
+W_P, W_T, W_R, W_TAB, W_BR, W_CR = _w('p'), _w('t'), _w('r'), _w('tab'), _w('br'), _w('cr')
+W_TBL, W_TR, W_TC = _w('tbl'), _w('tr'), _w('tc')
+W_PART_ROOTS = (_w('body'), _w('hdr'), _w('ftr'))
+MC_FALLBACK = f'{{{MC_NAMESPACE}}}Fallback'
+DOCX_TAGS = (W_P, W_T, W_TAB, W_BR, W_CR, W_TBL, W_TR, W_TC, MC_FALLBACK)
+
+
+def _docx_parts(archive: zipfile.ZipFile) -> List[str]:
+    # Колонтитулы часто содержат контакты, поэтому идут перед основным текстом
+    names = archive.namelist()
+    headers = sorted(name for name in names if re.fullmatch(r'word/header\d*\.xml', name))
+    footers = sorted(name for name in names if re.fullmatch(r'word/footer\d*\.xml', name))
+    return headers + ['word/document.xml'] + footers
+
+
+def _iter_docx_lines(stream: BinaryIO) -> Iterator[str]:
+    """
+    Потоково разбирает XML части документа и выдает строки текста: абзацы,
+    в том числе из надписей, и строки таблиц (ячейки разделяются табуляцией).
+    Разобранные элементы сразу удаляются из дерева, поэтому память не растет
+    с размером документа.
+    """
+    from lxml import etree
+
+    # Стек контейнеров: абзацы (список фрагментов текста), строки и ячейки таблиц
+    paragraphs: List[List[str]] = []
+    containers: List[Tuple[str, List[str]]] = []
+    fallback_depth = 0
+
+    def emit(line: str) -> Optional[str]:
+        if containers and containers[-1][0] == W_TC:
+            containers[-1][1].append(line)
+            return None
+        return line
+
+    for event, elem in etree.iterparse(stream, events=('start', 'end'), tag=DOCX_TAGS,
+                                       resolve_entities=False, huge_tree=True):
+        tag = elem.tag
+        if tag == MC_FALLBACK:
+            # Альтернативное представление надписей дублирует основное
+            fallback_depth += 1 if event == 'start' else -1
+            continue
+        if fallback_depth:
+            if event == 'end' and tag in (W_P, W_TBL):
+                elem.clear(keep_tail=True)
+            continue
+
+        if event == 'start':
+            if tag == W_P:
+                paragraphs.append([])
+            elif tag in (W_TR, W_TC):
+                containers.append((tag, []))
+            continue
+
+        if tag == W_T:
+            if paragraphs and elem.text:
+                paragraphs[-1].append(elem.text)
+        elif tag in (W_TAB, W_BR, W_CR):
+            # w:tab встречается и в описании позиций табуляции абзаца - учитываем только в тексте
+            parent = elem.getparent()
+            if paragraphs and parent is not None and parent.tag == W_R:
+                paragraphs[-1].append('\t' if tag == W_TAB else '\n')
+        elif tag == W_P:
+            line = emit(''.join(paragraphs.pop()))
+            if line is not None:
+                yield line
+        elif tag == W_TC:
+            _, cell = containers.pop()
+            if containers and containers[-1][0] == W_TR:
+                containers[-1][1].append(' '.join(part for part in cell if part))
+        elif tag == W_TR:
+            _, cells = containers.pop()
+            line = emit('\t'.join(cells))
+            if line is not None:
+                yield line
+
+        if tag in (W_P, W_TBL):
+            elem.clear(keep_tail=True)
+            parent = elem.getparent()
+            if parent is not None and parent.tag in W_PART_ROOTS:
+                while elem.getprevious() is not None:
+                    del parent[0]
+
+
+def _extract_docx(source: Source, budget: _PageBudget) -> None:
+    # DOCX разбирается потоково, без построения полного дерева документа
+    lines: List[str] = []
+    chars = 0
+    limit = budget.max_chars - budget.chars
+
+    with zipfile.ZipFile(source) as archive:
+        names = set(archive.namelist())
+        for part in _docx_parts(archive):
+            if part not in names:
+                continue
+            with archive.open(part) as stream:
+                for line in _iter_docx_lines(stream):
+                    lines.append(line)
+                    chars += len(line) + 1
+                    if chars > limit:
+                        break
+            if chars > limit:
+                break
+
+    budget.add('\n'.join(lines), 'docx')
+
+
+def _extract_doc(source: Source, budget: _PageBudget) -> None:
+    if not _is_path(source):
+        raise ValueError("Для извлечения текста из DOC требуется путь к файлу")
+
+    # Для DOC используем antiword
+    result = subprocess.run(
+        ['antiword', os.fspath(source)],
+        capture_output=True,
+        text=True
+    )
+
+    if result.returncode != 0:
+        raise RuntimeError(f"Ошибка при выполнении antiword: {result.stderr}")
+
+    budget.add(result.stdout, 'antiword')
+
+
+EXTRACTORS = {
+    'pdf': _extract_pdf,
+    'docx': _extract_docx,
+    'doc': _extract_doc,
+}
+
+
+def extract_resume_text(file_path: Source, file_type: Optional[str] = None,
+                        max_pages: Optional[int] = None, max_chars: Optional[int] = None) -> ExtractionResult:
+    """
+    Извлекает текст резюме постранично в пределах бюджета страниц и символов
+    (RESUME_EXTRACTION_MAX_PAGES и RESUME_EXTRACTION_MAX_CHARS по умолчанию).
+    Для PDF используется самый быстрый доступный источник, а для пустых страниц -
+    следующие по списку источники. Вместо пути можно передать открытый двоичный
+    файловый объект. Вызывает ValueError для неподдерживаемых типов файлов.
     """
-    if not file_path or not os.path.exists(file_path):
-        logger.error(f"Файл не существует: {file_path}")
-        return ""
-    
     # Если тип файла не указан, определяем его по расширению
     if not file_type:
-        _, extension = os.path.splitext(file_path)
+        _, extension = os.path.splitext(_describe(file_path))
         file_type = extension[1:].lower()  # удаляем точку
-    
-    try:
-        if file_type == 'pdf':
-            return extract_text_from_pdf(file_path)
-        elif file_type in ['doc', 'docx']:
-            return extract_text_from_doc(file_path, file_type)
-        else:
-            logger.error(f"Неподдерживаемый тип файла: {file_type}")
-            return ""
-    except Exception as e:
-        logger.error(f"Ошибка при извлечении текста из файла {file_path}: {str(e)}")
-        return ""
 
-def extract_text_from_pdf(file_path: str) -> str:
-    """Извлекает текст из PDF файла."""
-    try:
-        # Проверяем наличие pdftotext
-        import subprocess
-        
-        # Создаем временный файл для вывода текста
-        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-            temp_path = temp_file.name
-        
-        # Вызываем pdftotext
-        result = subprocess.run(
-            ['pdftotext', '-layout', '-enc', 'UTF-8', file_path, temp_path],
-            capture_output=True,
-            text=True
+    extractor = EXTRACTORS.get(file_type)
+    if extractor is None:
+        raise ValueError(f"Неподдерживаемый тип файла: {file_type}")
+
+    budget = _PageBudget(
+        max_pages if max_pages is not None else _get_budget('RESUME_EXTRACTION_MAX_PAGES', DEFAULT_MAX_PAGES),
+        max_chars if max_chars is not None else _get_budget('RESUME_EXTRACTION_MAX_CHARS', DEFAULT_MAX_CHARS),
+    )
+    extractor(file_path, budget)
+
+    if budget.truncated:
+        logger.info(
+            f"Извлечение текста из {_describe(file_path)} остановлено по бюджету: "
+            f"{len(budget.pages)} страниц, {budget.chars} символов"
         )
-        
-        if result.returncode != 0:
-            logger.error(f"Ошибка при выполнении pdftotext: {result.stderr}")
-            return ""
-        
-        # Читаем извлеченный текст
-        with open(temp_path, 'r', encoding='utf-8') as f:
-            text = f.read()
-        
-        # Удаляем временный файл
-        os.unlink(temp_path)
-        
-        return text
-    except FileNotFoundError:
-        logger.error("pdftotext не найден. Установите poppler-utils: sudo apt-get install poppler-utils")
-        return ""
-    except Exception as e:
-        logger.error(f"Ошибка при извлечении текста из PDF: {str(e)}")
+
+    return ExtractionResult(file_type, budget.pages, budget.truncated)
+
+
+def extract_text_from_file(file_path: str, file_type: Optional[str] = None) -> str:
+    """
+    Извлекает текст из файла резюме.
+    Поддерживает форматы PDF, DOC и DOCX.
+    """
+    if not file_path or not os.path.exists(file_path):
+        logger.error(f"Файл не существует: {file_path}")
         return ""
 
-def extract_text_from_doc(file_path: str, file_type: str) -> str:
-    """Извлекает текст из DOC или DOCX файла."""
     try:
-        if file_type == 'docx':
-            # Для DOCX используем python-docx
-            from docx import Document
-            doc = Document(file_path)
-            return '\n'.join([para.text for para in doc.paragraphs])
-        elif file_type == 'doc':
-            # Для DOC используем antiword
-            result = subprocess.run(
-                ['antiword', file_path],
-                capture_output=True,
-                text=True
-            )
-            
-            if result.returncode != 0:
-                logger.error(f"Ошибка при выполнении antiword: {result.stderr}")
-                return ""
-                
-            return result.stdout
-    except ImportError:
-        logger.error("Необходимые библиотеки не установлены. Установите python-docx для DOCX или antiword для DOC.")
-        return ""
+        return extract_resume_text(file_path, file_type).text
     except Exception as e:
-        logger.error(f"Ошибка при извлечении текста из {file_type.upper()}: {str(e)}")
-        return ""
\ No newline at end of file
+        logger.error(f"Ошибка при извлечении текста из файла {file_path}: {str(e)}")
+        return ""
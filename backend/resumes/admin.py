@@ -3,16 +3,25 @@ from django.utils.translation import gettext_lazy as _
 from django.utils.html import format_html
 from django.urls import reverse
 
-from resumes.models import Skill, Resume
+from resumes.models import Skill, SkillAlias, Resume
+
+
+class SkillAliasInline(admin.TabularInline):
+    model = SkillAlias
+    verbose_name = _("Синоним")
+    verbose_name_plural = _("Синонимы")
+    fields = ('name',)
+    extra = 1
 
 
 @admin.register(Skill)
 class SkillAdmin(admin.ModelAdmin):
     list_display = ('name', 'category', 'related_resumes_count', 'related_jobs_count')
     list_filter = ('category', 'created_at')
-    search_fields = ('name', 'description')
+    search_fields = ('name', 'description', 'aliases__name')
     prepopulated_fields = {'slug': ('name',)}
     readonly_fields = ('created_at', 'updated_at')
+    inlines = [SkillAliasInline]
     
     fieldsets = (
         (_('Основная информация'), {
@@ -57,6 +66,14 @@ class SkillAdmin(admin.ModelAdmin):
         return super().has_delete_permission(request, obj)
 
 
+@admin.register(SkillAlias)
+class SkillAliasAdmin(admin.ModelAdmin):
+    list_display = ('name', 'skill', 'normalized_name', 'created_at')
+    search_fields = ('name', 'normalized_name', 'skill__name')
+    autocomplete_fields = ['skill']
+    readonly_fields = ('normalized_name', 'created_at')
+
+
 class SkillInline(admin.TabularInline):
     model = Resume.skills.through
     verbose_name = _("Навык")
@@ -115,8 +132,8 @@ class ResumeAdmin(admin.ModelAdmin):
         
         if not change or 'file' in form.changed_data:
             try:
-                from resumes.tasks import analyze_resume
-                analyze_resume.delay(obj.id)
+                from resumes.dispatch import request_analysis
+                request_analysis(obj)
             except Exception as e:
                 self.message_user(request, 
                                  f"Произошла ошибка при запуске анализа: {str(e)}", 
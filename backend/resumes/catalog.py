@@ -0,0 +1,152 @@
+import time
+import logging
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from resume_analyzer.utils.skill_matcher import SkillMatcher, fold_case
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION_KEY = 'resumes:skill_catalog:version'
+
+
+class SkillEntry(NamedTuple):
+    id: int
+    name: str
+    category: str
+    normalized: str
+
+
+def normalize_skill_name(name: str) -> str:
+    """Нормализованная форма названия навыка: нижний регистр и одиночные пробелы."""
+    return ' '.join(fold_case(name).split())
+
+
+def _relaxed_skill_name(normalized: str) -> str:
+    """
+    Ослабленная форма для свободных строк из ответа LLM:
+    без уточнений в скобках и без обрамляющей пунктуации ("Python (3.x)" -> "python").
+    """
+    if '(' in normalized:
+        normalized = normalized.split('(', 1)[0]
+    return normalized.strip(' .,;:-–—"\'«»')
+
+
+class SkillCatalog:
+    """
+    Неизменяемый снимок каталога навыков, который хранится в памяти процесса.
+    Содержит индексы по id и нормализованному названию (включая синонимы)
+    и готовый автомат поиска, сводящий все формы навыка к одному id.
+    """
+
+    __slots__ = ('version', 'loaded_at', 'entries', 'by_id', 'by_normalized', 'matcher')
+
+    def __init__(self, entries: Iterable[SkillEntry], aliases: Iterable[Tuple[str, int]] = (),
+                 version: Optional[int] = None):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.entries: List[SkillEntry] = list(entries)
+        self.by_id: Dict[int, SkillEntry] = {entry.id: entry for entry in self.entries}
+        self.by_normalized: Dict[str, SkillEntry] = {}
+        for entry in self.entries:
+            self.by_normalized.setdefault(entry.normalized, entry)
+
+        # Названия навыков имеют приоритет над синонимами
+        terms = [(entry.normalized, entry.id) for entry in self.entries]
+        for alias, skill_id in aliases:
+            entry = self.by_id.get(skill_id)
+            normalized = normalize_skill_name(alias)
+            if entry is None or not normalized:
+                continue
+            self.by_normalized.setdefault(normalized, entry)
+            terms.append((normalized, skill_id))
+
+        self.matcher = SkillMatcher(terms)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def find_skills(self, text: str) -> List[SkillEntry]:
+        """Находит навыки каталога в тексте за один проход (в порядке каталога)."""
+        return [self.by_id[skill_id] for skill_id in self.matcher.find_values(text)]
+
+    def resolve_names(self, names: Iterable[str]) -> List[SkillEntry]:
+        """Сопоставляет произвольные названия навыкам каталога без запросов к БД."""
+        resolved = {}
+        for name in names:
+            if not isinstance(name, str):
+                continue
+            normalized = normalize_skill_name(name)
+            entry = self.by_normalized.get(normalized)
+            if entry is None:
+                entry = self.by_normalized.get(_relaxed_skill_name(normalized))
+            if entry is not None:
+                resolved.setdefault(entry.id, entry)
+        return list(resolved.values())
+
+
+_catalog: Optional[SkillCatalog] = None
+
+
+def _get_shared_version() -> Optional[int]:
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        # Ключ отсутствует (первый запуск или вытеснение) - инициализируем значением,
+        # которое не совпадет ни с одной ранее выданной версией
+        cache.add(CATALOG_VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def load_skill_catalog(version: Optional[int] = None) -> SkillCatalog:
+    from resumes.models import Skill, SkillAlias
+
+    rows = Skill.objects.order_by('category', 'name').values_list('id', 'name', 'category')
+    aliases = list(SkillAlias.objects.values_list('name', 'skill_id'))
+    catalog = SkillCatalog(
+        (SkillEntry(skill_id, name, category, normalize_skill_name(name)) for skill_id, name, category in rows),
+        aliases=aliases,
+        version=version,
+    )
+    logger.info(
+        f"Загружен каталог навыков: {len(catalog)} навыков, {len(aliases)} синонимов (версия {version})"
+    )
+    return catalog
+
+
+def get_skill_catalog() -> SkillCatalog:
+    """
+    Возвращает снимок каталога навыков текущего процесса.
+    Каталог перезагружается лениво, когда сигналы модели Skill увеличивают общую версию.
+    Если общий кэш недоступен, снимок перезагружается не чаще SKILL_CATALOG_MAX_AGE секунд.
+    """
+    global _catalog
+
+    try:
+        version = _get_shared_version()
+    except Exception as e:
+        logger.warning(f"Не удалось получить версию каталога навыков из кэша: {e}")
+        max_age = getattr(settings, 'SKILL_CATALOG_MAX_AGE', 60)
+        if _catalog is None or time.monotonic() - _catalog.loaded_at > max_age:
+            _catalog = load_skill_catalog()
+        return _catalog
+
+    if _catalog is None or _catalog.version != version:
+        _catalog = load_skill_catalog(version)
+
+    return _catalog
+
+
+def bump_catalog_version() -> None:
+    global _catalog
+    _catalog = None
+
+    try:
+        try:
+            cache.incr(CATALOG_VERSION_KEY)
+        except ValueError:
+            cache.add(CATALOG_VERSION_KEY, int(time.time() * 1000), timeout=None)
+    except Exception as e:
+        logger.error(f"Не удалось обновить версию каталога навыков: {e}")
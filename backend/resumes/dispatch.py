@@ -0,0 +1,108 @@
+import logging
+from typing import Any, Dict, Optional, Union
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from resumes.models import Resume
+
+logger = logging.getLogger(__name__)
+
+PENDING_KEY = 'resumes:analysis:pending:{resume_id}'
+DEFAULT_PENDING_TTL = 60 * 10
+
+
+def _pending_key(resume_id: int) -> str:
+    return PENDING_KEY.format(resume_id=resume_id)
+
+
+def request_analysis(resume: Union[Resume, int]) -> Dict[str, Any]:
+    """
+    Запрашивает анализ резюме. Единственная точка запуска анализа для
+    представлений, админки и пакетной обработки.
+
+    Каждый запрос увеличивает analysis_generation. Пока запущенная цепочка еще
+    ожидает в очереди (ключ в общем кэше, поставленный через cache.add),
+    новые запросы не ставят задач: цепочка при старте возьмет последнее поколение.
+    Запуски устаревших поколений прерываются до дорогостоящих этапов.
+    """
+    resume_id = resume.id if isinstance(resume, Resume) else resume
+
+    Resume.objects.filter(id=resume_id).update(
+        analysis_generation=F('analysis_generation') + 1,
+        status=Resume.PENDING,
+    )
+    generation = Resume.objects.filter(id=resume_id).values_list('analysis_generation', flat=True).first()
+    if isinstance(resume, Resume) and generation is not None:
+        resume.analysis_generation = generation
+        resume.status = Resume.PENDING
+
+    # Задача ставится только после фиксации транзакции, иначе воркер может не увидеть резюме
+    transaction.on_commit(lambda: _enqueue(resume_id))
+
+    return {'resume_id': resume_id, 'generation': generation}
+
+
+def _enqueue(resume_id: int) -> None:
+    try:
+        ttl = getattr(settings, 'ANALYSIS_PENDING_TTL', DEFAULT_PENDING_TTL)
+        if not cache.add(_pending_key(resume_id), True, ttl):
+            logger.info(f"Анализ резюме {resume_id} уже ожидает в очереди, запрос объединен с ним")
+            return
+    except Exception as e:
+        # Без общего кэша дубликаты отсекаются при взятии поколения в работу
+        logger.warning(f"Кэш недоступен при постановке анализа резюме {resume_id}: {e}")
+
+    from resumes.tasks import build_analysis_pipeline
+
+    try:
+        build_analysis_pipeline(resume_id).apply_async()
+        logger.info(f"Задача анализа запущена для резюме {resume_id}")
+    except Exception as e:
+        logger.error(f"Ошибка при запуске задачи анализа резюме {resume_id}: {e}")
+        cache.delete(_pending_key(resume_id))
+        Resume.objects.filter(id=resume_id).update(status=Resume.FAILED)
+
+
+def claim_analysis(resume_id: int, retrying: bool = False) -> Optional[int]:
+    """
+    Берет в работу последнее запрошенное поколение анализа резюме.
+    Возвращает его номер или None, если резюме нет или это поколение уже
+    обрабатывается другим запуском.
+    """
+    # Снимаем отметку об ожидании до чтения поколения: запросы, пришедшие
+    # после этого момента, поставят новую цепочку
+    try:
+        cache.delete(_pending_key(resume_id))
+    except Exception as e:
+        logger.warning(f"Кэш недоступен при запуске анализа резюме {resume_id}: {e}")
+
+    with transaction.atomic():
+        row = (
+            Resume.objects.select_for_update()
+            .filter(id=resume_id)
+            .values('analysis_generation', 'analysis_claimed_generation')
+            .first()
+        )
+        if row is None:
+            return None
+
+        generation = row['analysis_generation']
+        claimed = row['analysis_claimed_generation']
+        if claimed > generation or (claimed == generation and not retrying):
+            logger.info(f"Поколение {generation} анализа резюме {resume_id} уже запущено, дубликат пропущен")
+            return None
+
+        Resume.objects.filter(id=resume_id).update(
+            analysis_claimed_generation=generation,
+            status=Resume.ANALYZING,
+        )
+
+    return generation
+
+
+def is_current(resume_id: int, generation: int) -> bool:
+    """Поколение все еще последнее запрошенное - результаты запуска актуальны."""
+    return Resume.objects.filter(id=resume_id, analysis_generation=generation).exists()
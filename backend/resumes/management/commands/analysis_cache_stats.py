@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from resume_analyzer.utils.analysis_cache import get_analysis_cache
+
+
+class Command(BaseCommand):
+    help = 'Показывает статистику кэша извлечения текста и анализа резюме'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clear', action='store_true', help='Очистить кэш и счетчики')
+
+    def handle(self, *args, **options):
+        cache = get_analysis_cache()
+        if not cache.enabled:
+            raise CommandError('MongoDB недоступна')
+
+        if options['clear']:
+            deleted = cache.clear()
+            self.stdout.write(self.style.SUCCESS(f"Удалено записей кэша: {deleted}"))
+            return
+
+        stats = cache.stats()
+        if not stats:
+            self.stdout.write("Кэш пока не использовался")
+            return
+
+        for kind, values in sorted(stats.items()):
+            self.stdout.write(
+                f"{kind:<12} записей={values['entries']:<8} попаданий={values['hits']:<8} "
+                f"промахов={values['misses']:<8} доля попаданий={values['hit_rate']:.1%}"
+            )
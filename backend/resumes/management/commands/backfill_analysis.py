@@ -0,0 +1,98 @@
+import os
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from resumes.models import Resume
+from resumes.tasks import analyze_resumes_batch, analyze_resumes_chunk
+
+DEFAULT_CHECKPOINT = '.backfill_analysis.json'
+
+
+class Command(BaseCommand):
+    help = (
+        'Пакетный повторный анализ резюме. Обрабатывает резюме пачками по возрастанию id, '
+        'после каждой пачки сохраняет контрольную точку и продолжает с нее при повторном запуске'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=200)
+        parser.add_argument('--limit', type=int, default=0, help='Максимальное число резюме за запуск')
+        parser.add_argument('--status', action='append', default=[],
+                            help='Обрабатывать только резюме с указанным статусом (можно несколько раз)')
+        parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT, help='Файл контрольной точки')
+        parser.add_argument('--reset', action='store_true', help='Начать с начала, игнорируя контрольную точку')
+        parser.add_argument('--celery', action='store_true',
+                            help='Ставить пачки в очередь analyze_resumes_batch вместо обработки в этом процессе')
+
+    def load_checkpoint(self, path: str, reset: bool) -> dict:
+        if reset or not os.path.exists(path):
+            return {'last_id': 0, 'processed': 0, 'completed': 0, 'failed': 0, 'skipped': 0}
+        with open(path) as f:
+            return json.load(f)
+
+    def save_checkpoint(self, path: str, checkpoint: dict) -> None:
+        # Запись через временный файл, чтобы прерванный запуск не оставил поврежденную точку
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(checkpoint, f)
+        os.replace(temp_path, path)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if chunk_size <= 0:
+            raise CommandError('--chunk-size должен быть положительным')
+
+        checkpoint_path = options['checkpoint']
+        checkpoint = self.load_checkpoint(checkpoint_path, options['reset'])
+        if checkpoint['last_id']:
+            self.stdout.write(
+                f"Продолжение с резюме id > {checkpoint['last_id']} "
+                f"(уже обработано {checkpoint['processed']})"
+            )
+
+        queryset = Resume.objects.order_by('id')
+        if options['status']:
+            queryset = queryset.filter(status__in=options['status'])
+
+        limit = options['limit']
+        started = time.perf_counter()
+        processed = 0
+
+        while not limit or processed < limit:
+            size = min(chunk_size, limit - processed) if limit else chunk_size
+            ids = list(
+                queryset.filter(id__gt=checkpoint['last_id']).values_list('id', flat=True)[:size]
+            )
+            if not ids:
+                break
+
+            chunk_started = time.perf_counter()
+            if options['celery']:
+                analyze_resumes_batch.delay(ids)
+                stats = {'completed': 0, 'failed': 0, 'skipped': 0}
+            else:
+                stats = analyze_resumes_chunk(ids)
+            chunk_elapsed = time.perf_counter() - chunk_started
+
+            processed += len(ids)
+            checkpoint['last_id'] = ids[-1]
+            checkpoint['processed'] += len(ids)
+            for key in ('completed', 'failed', 'skipped'):
+                checkpoint[key] += stats[key]
+            self.save_checkpoint(checkpoint_path, checkpoint)
+
+            total_elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"id <= {ids[-1]:>8}  пачка={len(ids):>5}  "
+                f"успешно={stats['completed']:>5}  ошибок={stats['failed']:>4}  пропущено={stats['skipped']:>4}  "
+                f"{len(ids) / chunk_elapsed:8.1f} резюме/с  (в среднем {processed / total_elapsed:8.1f} резюме/с)"
+            )
+
+        total_elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Обработано {processed} резюме за {total_elapsed:.1f} с"
+            f"{f' ({processed / total_elapsed:.1f} резюме/с)' if processed else ''}. "
+            f"Всего с начала: {checkpoint['processed']}, ошибок {checkpoint['failed']}"
+        ))
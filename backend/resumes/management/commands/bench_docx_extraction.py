@@ -0,0 +1,119 @@
+import os
+import sys
+import json
+import zipfile
+import tempfile
+import subprocess
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from django.core.management.base import BaseCommand
+
+PROJECT_DIR = Path(__file__).resolve().parents[3]
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+PACKAGE_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+
+# Извлечение выполняется в отдельном процессе, чтобы пиковая память не смешивалась между вариантами
+MEASURE_SCRIPT = '''
+import sys, json, time, resource
+mode, path = sys.argv[1], sys.argv[2]
+if mode == 'python-docx':
+    from docx import Document
+    def extract():
+        return '\\n'.join(p.text for p in Document(path).paragraphs)
+else:
+    from resume_analyzer.utils.text_extraction import extract_resume_text
+    def extract():
+        return extract_resume_text(path, 'docx', max_pages=1, max_chars=10 ** 9).text
+def peak_rss_kb():
+    # VmHWM сбрасывается при exec, а ru_maxrss в Linux наследует пик родительского процесса
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+baseline = peak_rss_kb()
+started = time.perf_counter()
+text = extract()
+elapsed = time.perf_counter() - started
+peak = peak_rss_kb()
+print(json.dumps({'elapsed': elapsed, 'peak_kb': peak, 'delta_kb': peak - baseline, 'chars': len(text)}))
+'''
+
+
+def write_docx(path: str, paragraphs: int) -> None:
+    """Документ из абзацев опыта работы и таблицы навыков на каждые 20 абзацев."""
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', CONTENT_TYPES)
+        archive.writestr('_rels/.rels', PACKAGE_RELS)
+
+        with archive.open('word/document.xml', 'w') as document:
+            document.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+            )
+            for index in range(paragraphs):
+                text = escape(f'{index}. Разработка REST API на Django, оптимизация запросов к PostgreSQL')
+                document.write(f'<w:p><w:r><w:t>{text}</w:t></w:r></w:p>'.encode('utf-8'))
+                if index % 20 == 19:
+                    cells = ''.join(
+                        f'<w:tc><w:p><w:r><w:t>{skill}</w:t></w:r></w:p></w:tc>'
+                        for skill in ('Python', 'Redis', 'Docker')
+                    )
+                    document.write(f'<w:tbl><w:tr>{cells}</w:tr></w:tbl>'.encode('utf-8'))
+            document.write(b'<w:sectPr/></w:body></w:document>')
+
+
+class Command(BaseCommand):
+    help = 'Сравнение скорости и пиковой памяти потокового извлечения DOCX и python-docx'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--paragraphs', default='1000,10000,100000',
+                            help='Размеры документов в абзацах через запятую')
+
+    def measure(self, mode: str, path: str) -> dict:
+        result = subprocess.run(
+            [sys.executable, '-c', MEASURE_SCRIPT, mode, path],
+            capture_output=True, text=True, cwd=str(PROJECT_DIR),
+        )
+        if result.returncode != 0:
+            return {'error': result.stderr.strip().splitlines()[-1]}
+        return json.loads(result.stdout)
+
+    def handle(self, *args, **options):
+        for paragraphs in [int(p) for p in options['paragraphs'].split(',') if p]:
+            with tempfile.NamedTemporaryFile(suffix='.docx', delete=False) as f:
+                path = f.name
+            try:
+                write_docx(path, paragraphs)
+                for mode in ('python-docx', 'stream'):
+                    stats = self.measure(mode, path)
+                    if 'error' in stats:
+                        self.stdout.write(f"абзацев={paragraphs:>7}  {mode:<12} ошибка: {stats['error']}")
+                        continue
+                    self.stdout.write(
+                        f"абзацев={paragraphs:>7}  {mode:<12} размер={os.path.getsize(path) / 1024:>8.0f} КБ  "
+                        f"время={stats['elapsed'] * 1000:9.1f} мс  символов={stats['chars']:>9}  "
+                        f"пик RSS={stats['peak_kb'] / 1024:7.1f} МБ  прирост={stats['delta_kb'] / 1024:7.1f} МБ"
+                    )
+            finally:
+                os.unlink(path)
@@ -0,0 +1,66 @@
+import time
+import asyncio
+
+import openai
+from django.core.management.base import BaseCommand
+
+from resume_analyzer.utils.llm_client import AsyncLLMClient
+from resume_analyzer.utils.llm_stub import StubLLMServer
+
+MESSAGES = [
+    {"role": "system", "content": "You are an expert resume analyzer."},
+    {"role": "user", "content": "Python developer, 5 years of Django and PostgreSQL"},
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Пропускная способность асинхронного клиента LLM в зависимости от числа '
+        'одновременных запросов, на локальной заглушке с искусственной задержкой'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--latency', type=float, default=0.2, help='Задержка ответа заглушки, секунды')
+        parser.add_argument('--concurrency', default='1,4,16,64', help='Уровни параллельности через запятую')
+        parser.add_argument('--rate-limit', type=float, default=0, help='Ограничение запросов в секунду')
+        parser.add_argument('--base-url', default='', help='Внешний сервер вместо встроенной заглушки')
+
+    async def run_async(self, base_url: str, requests: int, concurrency: int, rate_limit: float) -> float:
+        async with AsyncLLMClient('stub', base_url, max_concurrency=concurrency,
+                                  rate_limit=rate_limit, max_retries=0) as client:
+            started = time.perf_counter()
+            await asyncio.gather(*(client.complete(MESSAGES, 'stub', 0.5) for _ in range(requests)))
+            return time.perf_counter() - started
+
+    def handle(self, *args, **options):
+        server = None
+        base_url = options['base_url']
+        if not base_url:
+            server = StubLLMServer(latency=options['latency']).start()
+            base_url = server.base_url
+
+        requests = options['requests']
+        try:
+            # Прежний путь: последовательные блокирующие запросы
+            client = openai.OpenAI(api_key='stub', base_url=base_url, max_retries=0)
+            serial_requests = min(requests, 20)
+            started = time.perf_counter()
+            for _ in range(serial_requests):
+                client.chat.completions.create(model='stub', messages=MESSAGES)
+            elapsed = time.perf_counter() - started
+            client.close()
+            self.stdout.write(
+                f"{'последовательно':<18} запросов={serial_requests:>5}  время={elapsed:7.2f} с  "
+                f"запросов/с={serial_requests / elapsed:8.1f}"
+            )
+
+            for concurrency in [int(c) for c in options['concurrency'].split(',') if c]:
+                elapsed = asyncio.run(self.run_async(base_url, requests, concurrency, options['rate_limit']))
+                self.stdout.write(
+                    f"{f'параллельно={concurrency}':<18} запросов={requests:>5}  время={elapsed:7.2f} с  "
+                    f"запросов/с={requests / elapsed:8.1f}"
+                )
+        finally:
+            if server is not None:
+                server.stop()
@@ -0,0 +1,85 @@
+import io
+import os
+import time
+import tempfile
+
+from django.core.management.base import BaseCommand
+
+from resume_analyzer.utils.text_extraction import PDF_BACKENDS
+from resumes.management.pdf_fixtures import build_pdf
+
+PAGE_LINES = [
+    'Ivanov Ivan, Senior Python Developer, page {page}',
+    'Experience: 2019 - 2023 Company {page}, lead developer',
+    'Designed REST APIs, optimized PostgreSQL queries, introduced Celery queues',
+    'Skills: Python, Django, PostgreSQL, Redis, Docker, Kubernetes',
+    'Education: Kazakh National University, Computer Science, 2015 - 2019',
+]
+
+
+def make_resume_pdf(pages: int) -> bytes:
+    count = pages
+    kids = b' '.join(b'%d 0 R' % (4 + 2 * index) for index in range(count))
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [' + kids + b'] /Count %d >>' % count,
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+    for page in range(count):
+        lines = [line.format(page=page + 1) for line in PAGE_LINES] * 8
+        content = (
+            b'BT /F1 10 Tf 40 760 Td 14 TL '
+            + b' '.join(b'(' + line.encode('latin-1') + b') Tj T*' for line in lines)
+            + b' ET'
+        )
+        objects.append(
+            b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+            b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>' % (5 + 2 * page)
+        )
+        objects.append(b'<< /Length %d >>\nstream\n' % len(content) + content + b'\nendstream')
+    return build_pdf(objects)
+
+
+class Command(BaseCommand):
+    help = 'Замер пропускной способности источников текста PDF (страниц в секунду)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', default='1,10,50', help='Размеры документов в страницах через запятую')
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        backends = [backend for backend in PDF_BACKENDS if backend.is_available()]
+        missing = [backend.name for backend in PDF_BACKENDS if backend not in backends]
+        if missing:
+            self.stdout.write(f"Недоступны: {', '.join(missing)}")
+
+        repeat = max(1, options['repeat'])
+        for pages in [int(p) for p in options['pages'].split(',') if p]:
+            data = make_resume_pdf(pages)
+            with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as f:
+                f.write(data)
+                path = f.name
+
+            try:
+                for backend_class in backends:
+                    modes = [('файл', lambda: path)]
+                    if backend_class.name == 'pdftotext':
+                        modes.append(('stdin', lambda: io.BytesIO(data)))
+
+                    for mode, make_source in modes:
+                        started = time.perf_counter()
+                        for _ in range(repeat):
+                            backend = backend_class(make_source())
+                            try:
+                                extracted = sum(1 for _ in backend.iter_pages(0, pages))
+                            finally:
+                                backend.close()
+                        elapsed = (time.perf_counter() - started) / repeat
+
+                        self.stdout.write(
+                            f"страниц={pages:>4}  {backend_class.name:<10} {mode:<6} "
+                            f"извлечено={extracted:>4}  время={elapsed * 1000:9.1f} мс  "
+                            f"страниц/с={extracted / elapsed:8.1f}"
+                        )
+            finally:
+                os.unlink(path)
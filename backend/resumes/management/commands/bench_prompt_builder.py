@@ -0,0 +1,56 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from resume_analyzer.utils.mongodb import get_mongodb_db
+from resume_analyzer.utils.prompt_builder import DEFAULT_TOKEN_BUDGET, build_analysis_prompt
+
+
+class Command(BaseCommand):
+    help = 'Экономия токенов промпта AI-анализа на сохраненных текстах резюме'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=100)
+        parser.add_argument('--budget', type=int,
+                            default=getattr(settings, 'LLM_PROMPT_TOKEN_BUDGET', DEFAULT_TOKEN_BUDGET))
+        parser.add_argument('--verbose', action='store_true', help='Показывать каждое резюме')
+
+    def handle(self, *args, **options):
+        db = get_mongodb_db()
+        if db is None:
+            raise CommandError('MongoDB недоступна')
+
+        model = getattr(settings, 'OPENAI_MODEL', 'gpt-3.5-turbo')
+        records = db.resume_analysis.find(
+            {'extracted_text': {'$nin': [None, '']}}, {'resume_id': 1, 'extracted_text': 1}
+        ).limit(options['limit'])
+
+        count = truncated = original_total = prompt_total = 0
+        elapsed = 0.0
+        for record in records:
+            started = time.perf_counter()
+            build = build_analysis_prompt(record['extracted_text'], token_budget=options['budget'], model=model)
+            elapsed += time.perf_counter() - started
+
+            count += 1
+            truncated += build.truncated
+            original_total += build.original_tokens
+            prompt_total += build.prompt_tokens
+            if options['verbose']:
+                self.stdout.write(
+                    f"резюме {record.get('resume_id')!s:>8}  токенов {build.original_tokens:>6} -> "
+                    f"{build.prompt_tokens:>6}  сэкономлено {build.tokens_saved:>6}"
+                    f"{'  (сокращено до бюджета)' if build.truncated else ''}"
+                )
+
+        if not count:
+            self.stdout.write('Нет сохраненных текстов резюме')
+            return
+
+        saved = original_total - prompt_total
+        self.stdout.write(self.style.SUCCESS(
+            f"Резюме: {count}, сокращено до бюджета {options['budget']}: {truncated}. "
+            f"Токенов: {original_total} -> {prompt_total}, сэкономлено {saved} ({saved / original_total:.1%}), "
+            f"в среднем {saved / count:.0f} на резюме. Сборка промпта: {elapsed / count * 1000:.2f} мс"
+        ))
@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from resume_analyzer.utils.segmentation import segment_resume
+
+PAGE_TEMPLATE = """Иванов Иван, Senior Python Developer
+ivan{n}@example.com | +7 701 123 45 67
+
+О себе
+Разработчик с опытом построения высоконагруженных сервисов. Experience with Django and Celery.
+
+Опыт работы
+2019 - 2023  ООО "Компания {n}", ведущий разработчик
+• Проектирование REST API, оптимизация запросов к PostgreSQL
+• Внедрение очередей задач и кэширования
+
+Education
+Kazakh National University, Computer Science, 2015 - 2019
+
+Навыки: Python, Django, PostgreSQL, Redis, Docker, Kubernetes
+
+Projects
+- AI-CV: анализ резюме и подбор вакансий
+"""
+
+
+class Command(BaseCommand):
+    help = 'Замер скорости сегментации длинных многостраничных резюме'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', default='1,10,50,200', help='Размеры резюме в страницах через запятую')
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        for pages in [int(p) for p in options['pages'].split(',') if p]:
+            text = '\f'.join(PAGE_TEMPLATE.format(n=page) for page in range(pages))
+            repeat = max(1, options['repeat'])
+
+            started = time.perf_counter()
+            for _ in range(repeat):
+                sections = segment_resume(text)
+            elapsed = (time.perf_counter() - started) / repeat
+
+            self.stdout.write(
+                f"страниц={pages:>4}  символов={len(text):>8}  разделов={len(sections):>5}  "
+                f"время={elapsed * 1000:8.3f} мс  "
+                f"на 1000 символов={elapsed * 1e6 / (len(text) / 1000):6.1f} мкс"
+            )
@@ -0,0 +1,79 @@
+import random
+import re
+import string
+import time
+from typing import List
+
+from django.core.management.base import BaseCommand
+
+from resume_analyzer.utils.skill_matcher import SkillMatcher
+
+
+def _random_skill(rng: random.Random) -> str:
+    words = rng.randint(1, 3)
+    return ' '.join(
+        ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9))).capitalize()
+        for _ in range(words)
+    )
+
+
+def _build_resume(rng: random.Random, skills: List[str], words: int) -> str:
+    filler = ['опыт', 'работы', 'разработка', 'проект', 'команда', 'experience',
+              'developed', 'service', 'using', 'and', 'the', 'with', 'в', 'и', 'на']
+    tokens = []
+    for _ in range(words):
+        if rng.random() < 0.05:
+            tokens.append(rng.choice(skills))
+        else:
+            tokens.append(rng.choice(filler))
+    return ' '.join(tokens)
+
+
+def _legacy_match(text: str, skills: List[str]) -> List[str]:
+    # Прежняя реализация из simple_resume_analysis: отдельное регулярное выражение на каждый навык
+    skills_regex = {
+        skill: re.compile(r'\b' + re.escape(skill) + r'\b', re.IGNORECASE)
+        for skill in skills
+    }
+    return [skill for skill, pattern in skills_regex.items() if pattern.search(text)]
+
+
+class Command(BaseCommand):
+    help = 'Сравнение скорости поиска навыков: цикл регулярных выражений против автомата Ахо-Корасик'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,50000',
+                            help='Размеры каталога навыков через запятую')
+        parser.add_argument('--resumes', type=int, default=20, help='Количество резюме на замер')
+        parser.add_argument('--words', type=int, default=600, help='Количество слов в резюме')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',') if size]
+
+        for size in sizes:
+            rng = random.Random(options['seed'])
+            skills = list({_random_skill(rng) for _ in range(size)})
+            texts = [_build_resume(rng, skills, options['words']) for _ in range(options['resumes'])]
+
+            started = time.perf_counter()
+            matcher = SkillMatcher.from_names(skills)
+            build_time = time.perf_counter() - started
+
+            started = time.perf_counter()
+            fast_results = [set(matcher.find_values(text)) for text in texts]
+            fast_time = (time.perf_counter() - started) / len(texts)
+
+            started = time.perf_counter()
+            legacy_results = [set(_legacy_match(text, skills)) for text in texts]
+            legacy_time = (time.perf_counter() - started) / len(texts)
+
+            same = fast_results == legacy_results
+            self.stdout.write(
+                f"навыков={len(skills):>6}  "
+                f"построение={build_time * 1000:8.1f} мс  "
+                f"автомат={fast_time * 1000:8.2f} мс/резюме  "
+                f"regex-цикл={legacy_time * 1000:9.2f} мс/резюме  "
+                f"ускорение=x{legacy_time / fast_time if fast_time else 0:.0f}  "
+                f"совпадают={'да' if same else 'нет'}"
+            )
@@ -0,0 +1,98 @@
+import math
+import time
+import random
+from collections import Counter
+
+import numpy as np
+
+from django.core.management.base import BaseCommand
+
+from jobs.matching import METRIC_RELEVANCE, METRICS, SkillMatrix, match_all
+
+
+class Command(BaseCommand):
+    help = (
+        'Скорость подбора по разреженным матрицам навыков на синтетических данных: '
+        'одиночные запросы в обе стороны, обновление строк и лучшие кандидаты для всех вакансий'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--resumes', type=int, default=100000)
+        parser.add_argument('--jobs', type=int, default=20000)
+        parser.add_argument('--skills', type=int, default=2000)
+        parser.add_argument('--skills-per-row', type=int, default=12)
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--candidates', type=int, default=50, help='Кандидатов на вакансию в пакетном подборе')
+        parser.add_argument('--batch-jobs', type=int, default=2000,
+                            help='Вакансий в пакетном подборе (0 - все), время для всех оценивается по ним')
+        parser.add_argument('--block-size', type=int, default=256)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        # Популярность навыков неравномерна: частые навыки встречаются в большинстве строк
+        skill_ids = list(range(1, options['skills'] + 1))
+        weights = [1 / (rank + 1) for rank in range(options['skills'])]
+
+        def random_skills():
+            return set(rng.choices(skill_ids, weights, k=rng.randint(1, options['skills_per_row'] * 2)))
+
+        def build(rows, importance=False):
+            # У вакансий часть навыков желательные (вес 0.5)
+            pairs = [
+                (row_id, skill_id, 0.5 if importance and rng.random() < 0.3 else 1.0)
+                for row_id in range(1, rows + 1) for skill_id in random_skills()
+            ]
+            started = time.perf_counter()
+            matrix = SkillMatrix(pairs)
+            return matrix, len(pairs), time.perf_counter() - started
+
+        resumes, resume_pairs, resume_build = build(options['resumes'])
+        jobs, job_pairs, job_build = build(options['jobs'], importance=True)
+        self.stdout.write(
+            f"Резюме: {len(resumes)} ({resume_pairs} связей, {resume_build:.2f} с), "
+            f"вакансии: {len(jobs)} ({job_pairs} связей, {job_build:.2f} с)"
+        )
+
+        # Веса IDF, как их считает refresh_skill_idf_weights
+        frequency = Counter(skill_id for matrix in (resumes, jobs) for skills in matrix.row_skills.values()
+                            for skill_id in skills)
+        documents = len(resumes) + len(jobs)
+        idf = np.ones(options['skills'] + 1, dtype=np.float32)
+        for skill_id in skill_ids:
+            idf[skill_id] = math.log((1 + documents) / (1 + frequency[skill_id])) + 1
+
+        queries = [random_skills() for _ in range(options['queries'])]
+        for name, matrix in (('вакансии для резюме', jobs), ('резюме для вакансии', resumes)):
+            for metric in METRICS:
+                latencies = []
+                for query in queries:
+                    started = time.perf_counter()
+                    matrix.match(query, metric, options['limit'], idf=idf)
+                    latencies.append(time.perf_counter() - started)
+                latencies.sort()
+                self.stdout.write(
+                    f"{name:<20} {metric:<9} p50={latencies[len(latencies) // 2] * 1000:7.2f} мс  "
+                    f"p99={latencies[int(len(latencies) * 0.99)] * 1000:7.2f} мс"
+                )
+
+        updates = 200
+        started = time.perf_counter()
+        for _ in range(updates):
+            resumes.update_row(rng.randint(1, options['resumes'] * 2), random_skills())
+        self.stdout.write(f"Обновление строки резюме: {(time.perf_counter() - started) / updates * 1000:.2f} мс")
+
+        batch_jobs = options['batch_jobs'] or len(jobs)
+        source = SkillMatrix(
+            (job_id, skill_id, weight) for job_id, skills in list(jobs.row_skills.items())[:batch_jobs]
+            for skill_id, weight in skills.items()
+        )
+        started = time.perf_counter()
+        processed = sum(1 for _ in match_all(source, resumes, METRIC_RELEVANCE, limit=options['candidates'],
+                                             block_size=options['block_size'], idf=idf))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Топ-{options['candidates']} кандидатов: {processed} вакансий за {elapsed:.2f} с "
+            f"({processed / elapsed:.0f} вакансий/с), для всех {len(jobs)} вакансий ~{elapsed / processed * len(jobs):.0f} с"
+        ))
@@ -0,0 +1,125 @@
+import random
+import re
+import time
+from typing import Any, Dict, List
+
+from django.core.management.base import BaseCommand
+
+from resume_analyzer.utils.text_analysis import analyze_resume_text
+
+PAGE_TEMPLATE = """Иванов Иван
+email: ivan.ivanov{n}@example.com, телефон: +7 (701) 123-45-{n:02d}
+
+Опыт работы
+• 2019-2023 Backend-разработчик, ООО "Компания {n}"
+– Разработка REST API на Python/Django, PostgreSQL, Redis
+- Оптимизация запросов, снижение времени ответа на 40%
+
+Experience
+* Senior developer at Company {n}: microservices, Docker, Kubernetes
+
+Образование
+Университет, факультет информационных технологий, 2015-2019
+
+Навыки
+Python, Django, SQL, Git, Linux, Docker, Celery, MongoDB
+"""
+
+
+def _build_resume(pages: int, rng: random.Random) -> str:
+    filler = ' '.join(rng.choice(['проект', 'команда', 'сервис', 'delivered', 'system', 'data'])
+                      for _ in range(250))
+    return '\n\n'.join(PAGE_TEMPLATE.format(n=page) + filler for page in range(pages))
+
+
+def _legacy_analyze(text: str) -> Dict[str, Any]:
+    # Прежняя реализация: каждая оценка заново вызывает lower() и регулярные выражения
+    def emails_of(t: str) -> List[str]:
+        return re.findall(r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}', t)
+
+    def phones_of(t: str) -> List[str]:
+        return re.findall(r'(?:\+7|8)[\s-]?\(?\d{3}\)?[\s-]?\d{3}[\s-]?\d{2}[\s-]?\d{2}', t)
+
+    results = {'word_count': len(text.split())}
+    emails, phones = emails_of(text), phones_of(text)
+    results['contact_info'] = {'emails': emails, 'phones': phones}
+
+    score = 50.0
+    word_count = len(text.split())
+    if word_count < 100:
+        score -= 15
+    elif word_count < 300:
+        score -= 5
+    elif word_count > 500:
+        score += 10
+    score += 5 if emails else 0
+    score += 5 if phones else 0
+    score += 10 if re.search(r'образование|education|обучение|учеба', text.lower()) else 0
+    score += 15 if re.search(r'опыт работы|experience|стаж', text.lower()) else 0
+    score += 10 if re.search(r'навыки|skills|умения', text.lower()) else 0
+    results['overall_score'] = max(0, min(100, score))
+
+    recommendations = []
+    for pattern, message in ((r'образование|education', 'education'),
+                             (r'опыт работы|experience', 'experience'),
+                             (r'навыки|skills', 'skills')):
+        if not re.search(pattern, text.lower()):
+            recommendations.append(message)
+    results['recommendations'] = recommendations
+
+    results['structure_analysis'] = {
+        'has_contact_info': bool(emails_of(text) or phones_of(text)),
+        'has_education': bool(re.search(r'образование|education', text.lower())),
+        'has_experience': bool(re.search(r'опыт работы|experience', text.lower())),
+        'has_skills': bool(re.search(r'навыки|skills', text.lower())),
+    }
+
+    format_score = 50.0
+    format_score += 10 if re.search(r'образование|education', text.lower()) else 0
+    format_score += 10 if re.search(r'опыт работы|experience', text.lower()) else 0
+    format_score += 10 if re.search(r'навыки|skills', text.lower()) else 0
+    format_score += 10 if re.search(r'•|\*|–|-', text) else 0
+
+    completeness = 20.0 * bool(emails) + 20.0 * bool(phones)
+    completeness += 20 if re.search(r'образование|education', text.lower()) else 0
+    completeness += 20 if re.search(r'опыт работы|experience', text.lower()) else 0
+    completeness += 20 if re.search(r'навыки|skills', text.lower()) else 0
+
+    results['analysis_details'] = {
+        'content_score': min(100, len(text.split()) / 10),
+        'format_score': max(0, min(100, format_score)),
+        'completeness_score': max(0, min(100, completeness)),
+    }
+    return results
+
+
+def _measure(func, text: str, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func(text)
+    return (time.perf_counter() - started) / repeat
+
+
+class Command(BaseCommand):
+    help = 'Замер задержки анализа текста резюме до и после перехода на TextFeatures'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', default='1,20', help='Размеры резюме в страницах через запятую')
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+
+        for pages in [int(p) for p in options['pages'].split(',') if p]:
+            text = _build_resume(pages, rng)
+            repeat = max(1, options['repeat'] // pages)
+
+            legacy = _measure(_legacy_analyze, text, repeat)
+            current = _measure(analyze_resume_text, text, repeat)
+
+            self.stdout.write(
+                f"страниц={pages:>3}  символов={len(text):>7}  "
+                f"до={legacy * 1000:7.3f} мс  после={current * 1000:7.3f} мс  "
+                f"ускорение=x{legacy / current if current else 0:.1f}"
+            )
@@ -0,0 +1,90 @@
+import os
+import time
+import tempfile
+from typing import Callable, Dict, Tuple
+
+from django.core.management.base import BaseCommand, CommandError
+
+from resume_analyzer.utils.extraction_pool import (
+    CRASHED, ERROR, MEMORY_LIMIT, OK, TIMEOUT, TOO_DEEP, ExtractionPool,
+)
+from resumes.management.pdf_fixtures import (
+    cyclic_page_tree, decompression_bomb, deep_nesting, huge_page_count, normal_resume, operator_flood,
+)
+
+
+# Имя -> (генератор, допустимые исходы). Любой исход должен укладываться в срок пула.
+CORPUS: Dict[str, Tuple[Callable[[], bytes], Tuple[str, ...]]] = {
+    'normal': (normal_resume, (OK,)),
+    'huge_page_count': (huge_page_count, (OK, TIMEOUT)),
+    'deep_nesting': (deep_nesting, (OK, TOO_DEEP, CRASHED, MEMORY_LIMIT)),
+    'decompression_bomb': (decompression_bomb, (MEMORY_LIMIT, TIMEOUT, ERROR, CRASHED)),
+    'operator_flood': (operator_flood, (OK, TIMEOUT, MEMORY_LIMIT)),
+    'cyclic_page_tree': (cyclic_page_tree, (OK, ERROR, TIMEOUT)),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверка лимитов изолированного извлечения текста на наборе '
+        'вредоносных PDF (глубокая вложенность, огромное число страниц и т.д.)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--timeout', type=float, default=10)
+        parser.add_argument('--memory-limit-mb', type=int, default=512)
+        parser.add_argument('--max-pages', type=int, default=20)
+        parser.add_argument('--max-chars', type=int, default=100000)
+        parser.add_argument('--only', default='', help='Имена файлов набора через запятую')
+        parser.add_argument('--keep', default='', help='Каталог для сохранения сгенерированных файлов')
+
+    def handle(self, *args, **options):
+        names = [name for name in options['only'].split(',') if name] or list(CORPUS)
+        unknown = set(names) - set(CORPUS)
+        if unknown:
+            raise CommandError(f"Неизвестные файлы набора: {', '.join(sorted(unknown))}")
+
+        pool = ExtractionPool(
+            timeout=options['timeout'],
+            memory_limit_mb=options['memory_limit_mb'],
+            max_files_per_child=1,
+        )
+        # Запас на запуск интерпретатора и завершение процесса
+        deadline = options['timeout'] + 2
+
+        directory = options['keep'] or tempfile.mkdtemp(prefix='extraction-limits-')
+        os.makedirs(directory, exist_ok=True)
+
+        failures = []
+        try:
+            for name in names:
+                generate, expected = CORPUS[name]
+                path = os.path.join(directory, f'{name}.pdf')
+                with open(path, 'wb') as f:
+                    f.write(generate())
+
+                started = time.monotonic()
+                result = pool.extract(path, 'pdf', options['max_pages'], options['max_chars'])
+                elapsed = time.monotonic() - started
+
+                passed = result.status in expected and elapsed <= deadline
+                if not passed:
+                    failures.append(name)
+
+                chars = len(result.extraction.text) if result.extraction else 0
+                self.stdout.write(
+                    f"{'OK  ' if passed else 'FAIL'} {name:<20} размер={os.path.getsize(path) / 1024:>9.0f} КБ  "
+                    f"исход={result.status:<13} время={elapsed:6.2f} с  символов={chars:>7}  {result.error[:80]}"
+                )
+        finally:
+            pool.close()
+            if not options['keep']:
+                for name in names:
+                    path = os.path.join(directory, f'{name}.pdf')
+                    if os.path.exists(path):
+                        os.unlink(path)
+                os.rmdir(directory)
+
+        if failures:
+            raise CommandError(f"Лимиты не соблюдены: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS('Все лимиты соблюдены'))
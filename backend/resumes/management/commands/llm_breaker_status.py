@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from resume_analyzer.utils.circuit_breaker import OPEN, get_circuit_breaker
+
+
+class Command(BaseCommand):
+    help = 'Показывает состояние выключателя LLM: ошибки и задержки в окне, число размыканий'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Замкнуть выключатель и очистить окно')
+        parser.add_argument('--trip', action='store_true', help='Разомкнуть выключатель вручную')
+
+    def handle(self, *args, **options):
+        breaker = get_circuit_breaker()
+
+        if options['reset']:
+            breaker.reset()
+            self.stdout.write(self.style.SUCCESS('Выключатель LLM замкнут'))
+        elif options['trip']:
+            breaker.trip()
+            self.stdout.write(self.style.WARNING(f'Выключатель LLM разомкнут на {breaker.open_seconds} с'))
+
+        snapshot = breaker.snapshot()
+        self.stdout.write(
+            f"состояние={snapshot['state']:<10} вызовов за {snapshot['window_seconds']} с={snapshot['requests']:<6} "
+            f"ошибок={snapshot['error_rate']:.1%}  p95<={snapshot['p95_latency']} с  "
+            f"размыканий={snapshot['times_opened']}  отклонено={snapshot['rejected_calls']}"
+        )
+        if snapshot['state'] == OPEN:
+            self.stdout.write(f"до пробного вызова {snapshot['open_for_seconds']} с")
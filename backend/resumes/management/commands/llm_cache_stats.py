@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from resume_analyzer.utils.llm_cache import get_llm_cache
+
+
+class Command(BaseCommand):
+    help = 'Показывает статистику кэша ответов LLM по всем процессам'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Сбросить счетчики')
+
+    def handle(self, *args, **options):
+        cache = get_llm_cache()
+
+        if options['reset']:
+            cache.reset_stats()
+            self.stdout.write(self.style.SUCCESS('Счетчики кэша LLM сброшены'))
+            return
+
+        stats = cache.stats()
+        self.stdout.write(
+            f"попаданий в памяти={stats['local_hits']:<8} попаданий в Redis={stats['shared_hits']:<8} "
+            f"промахов={stats['misses']:<8} обходов={stats['bypassed']:<8} "
+            f"доля попаданий={stats['hit_rate']:.1%}"
+        )
@@ -0,0 +1,118 @@
+import os
+import time
+import random
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+from resume_analyzer.utils.ai_analyzer import COMMON_SKILLS, AIResumeAnalyzer
+from resume_analyzer.utils.circuit_breaker import CircuitBreaker
+from resume_analyzer.utils.llm_cache import LLMResponseCache
+from resumes.management.commands.run_llm_stub import add_stub_arguments, make_stub_server
+
+JOB_DESCRIPTION = "Backend developer: Python, Django, PostgreSQL, Redis, Docker, REST API, Git"
+
+
+def make_resumes(count: int, seed: int):
+    """Разные синтетические резюме, чтобы запросы не совпадали по ключу кэша."""
+    rng = random.Random(seed)
+    resumes = []
+    for index in range(count):
+        skills = rng.sample(COMMON_SKILLS, rng.randint(3, 12))
+        experience = '\n'.join(
+            f"- {rng.randint(1, 6)} years of {skill} in project #{rng.randint(1, 10000)}" for skill in skills
+        )
+        resumes.append(
+            f"Candidate {index}\ncandidate{index}@example.com\n\n"
+            f"Summary\nSoftware engineer with {rng.randint(1, 15)} years of experience.\n\n"
+            f"Experience\n{experience}\n\n"
+            f"Skills\n{', '.join(skills)}\n\n"
+            f"Education\nState University, {rng.randint(2000, 2022)}"
+        )
+    return resumes
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест AI-анализа резюме: пропускная способность, p50/p99 задержки и доля '
+        'запасного анализа при разном числе рабочих потоков (как потоки воркера очереди llm). '
+        'По умолчанию запросы идут на встроенную заглушку LLM с заданными задержками и ошибками'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Запросов на каждый уровень')
+        parser.add_argument('--workers', default='1,4,8,16', help='Числа рабочих потоков через запятую')
+        parser.add_argument('--with-job', action='store_true', help='Анализ с описанием вакансии')
+        parser.add_argument('--base-url', default='',
+                            help='Внешний сервер вместо встроенной заглушки (ключ из OPENAI_API_KEY)')
+        add_stub_arguments(parser)
+
+    def make_analyzer(self, base_url: str, api_key: str, level: int) -> AIResumeAnalyzer:
+        analyzer = AIResumeAnalyzer()
+        analyzer.base_url = base_url
+        analyzer.api_key = api_key
+        # Кэш и выключатель на уровень теста: общие из Redis не засоряются, а размыкание
+        # выключателя на одном уровне не влияет на следующий
+        local_cache = LocMemCache(f'loadtest-ai-{os.getpid()}-{level}', {})
+        analyzer.llm_cache = LLMResponseCache(local_size=0, shared=local_cache)
+        analyzer.breaker = CircuitBreaker(f'loadtest-{level}', cache=local_cache)
+        return analyzer
+
+    def handle(self, *args, **options):
+        server = None
+        base_url = options['base_url']
+        api_key = os.getenv('OPENAI_API_KEY', '') if base_url else 'stub'
+        if not base_url:
+            server = make_stub_server(options).start()
+            base_url = server.base_url
+            self.stdout.write(
+                f"Заглушка {base_url}: задержка {options['distribution']} {options['latency']} с "
+                f"(разброс {options['spread']}), 500={options['error_rate']:.0%}, "
+                f"429={options['rate_limit_rate']:.0%}, битый JSON={options['malformed_rate']:.0%}"
+            )
+
+        job_description = JOB_DESCRIPTION if options['with_job'] else None
+        resumes = make_resumes(options['requests'], options['seed'])
+        try:
+            for level, workers in enumerate(int(w) for w in options['workers'].split(',') if w):
+                analyzer = self.make_analyzer(base_url, api_key, level)
+                outcomes_before = Counter(server.outcomes) if server else Counter()
+
+                def run(text):
+                    started = time.perf_counter()
+                    # То же, что analyze_resume, но с учетом, откуда взят результат
+                    result = analyzer.analyze_with_llm(text, job_description, use_cache=False)
+                    fallback = result is None
+                    if fallback:
+                        analyzer._fallback_analysis(text)
+                    return time.perf_counter() - started, fallback
+
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    results = list(executor.map(run, resumes))
+                elapsed = time.perf_counter() - started
+
+                latencies = [latency for latency, _ in results]
+                fallbacks = sum(fallback for _, fallback in results)
+                breaker = analyzer.breaker.snapshot()
+                line = (
+                    f"потоков={workers:<4} запросов={len(results):<5} время={elapsed:7.2f} с  "
+                    f"запросов/с={len(results) / elapsed:7.1f}  p50={percentile(latencies, 0.5) * 1000:7.0f} мс  "
+                    f"p99={percentile(latencies, 0.99) * 1000:7.0f} мс  запасной анализ={fallbacks / len(results):6.1%}  "
+                    f"размыканий={breaker['times_opened']}"
+                )
+                if server:
+                    outcomes = Counter(server.outcomes)
+                    outcomes.subtract(outcomes_before)
+                    line += '  ответы: ' + ', '.join(f'{name}={count}' for name, count in sorted(outcomes.items()))
+                self.stdout.write(line)
+        finally:
+            if server is not None:
+                server.stop()
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from jobs.match_table import rebuild_matches
+from jobs.tasks import rebuild_resume_job_matches
+
+
+class Command(BaseCommand):
+    help = (
+        'Полный пересчет таблицы совпадений резюме и вакансий (лучшие резюме каждой активной вакансии). '
+        'Нужен после первого развертывания; дальше таблица обновляется фоновыми задачами'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--celery', action='store_true', help='Поставить пересчет в очередь вместо этого процесса')
+
+    def handle(self, *args, **options):
+        if options['celery']:
+            rebuild_resume_job_matches.delay()
+            self.stdout.write(self.style.SUCCESS('Пересчет таблицы совпадений поставлен в очередь'))
+            return
+
+        started = time.perf_counter()
+        changed = rebuild_matches()
+        self.stdout.write(self.style.SUCCESS(
+            f"Таблица совпадений пересчитана за {time.perf_counter() - started:.1f} с, изменено строк: {changed}"
+        ))
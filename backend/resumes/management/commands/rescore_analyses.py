@@ -0,0 +1,73 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from pymongo import UpdateOne
+
+from resume_analyzer.utils.batch_scoring import build_feature_matrix, score_feature_matrix
+from resume_analyzer.utils.mongodb import get_mongodb_db
+from resume_analyzer.utils.scoring_weights import get_scoring_weights
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает оценки всех сохраненных в MongoDB результатов анализа по текущим весам'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--dry-run', action='store_true', help='Посчитать оценки без записи в MongoDB')
+
+    def handle(self, *args, **options):
+        db = get_mongodb_db()
+        if db is None:
+            raise CommandError('MongoDB недоступна')
+
+        collection = db.resume_analysis
+        weights = get_scoring_weights()
+        batch_size = options['batch_size']
+
+        # Оценки правилами хранятся только у результатов simple_resume_analysis
+        query = {'analysis_results.analysis_details.volume_score': {'$exists': True}}
+        projection = {'analysis_results.word_count': 1, 'analysis_results.skills_found': 1}
+
+        started = time.perf_counter()
+        processed = 0
+        changed = 0
+        batch = []
+
+        def flush():
+            nonlocal processed, changed
+            if not batch:
+                return
+            matrix = build_feature_matrix(
+                {
+                    'word_count': doc['analysis_results'].get('word_count') or 0,
+                    'skill_count': len(doc['analysis_results'].get('skills_found') or []),
+                }
+                for doc in batch
+            )
+            scores = score_feature_matrix(matrix, weights)
+            operations = [
+                UpdateOne({'_id': doc['_id']}, {'$set': {
+                    'analysis_results.overall_score': float(scores['overall_score'][i]),
+                    'analysis_results.analysis_details.skill_score': float(scores['skill_score'][i]),
+                    'analysis_results.analysis_details.volume_score': float(scores['volume_score'][i]),
+                }})
+                for i, doc in enumerate(batch)
+            ]
+            if not options['dry_run']:
+                result = collection.bulk_write(operations, ordered=False)
+                changed += result.modified_count
+            processed += len(batch)
+            batch.clear()
+            self.stdout.write(f"Обработано {processed} результатов анализа")
+
+        for document in collection.find(query, projection, batch_size=batch_size):
+            batch.append(document)
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+
+        elapsed = time.perf_counter() - started
+        rate = processed / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Готово: {processed} результатов, изменено {changed}, {elapsed:.1f} с ({rate:.0f} в секунду)"
+        ))
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from resume_analyzer.utils.llm_stub import LATENCY_DISTRIBUTIONS, StubLLMServer
+
+
+def add_stub_arguments(parser):
+    parser.add_argument('--latency', type=float, default=0.5, help='Задержка ответа (медиана для lognormal), секунды')
+    parser.add_argument('--distribution', choices=LATENCY_DISTRIBUTIONS, default='lognormal')
+    parser.add_argument('--spread', type=float, default=0.5,
+                        help='Разброс задержки: полуширина, отклонение или параметр формы')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Доля ответов 500')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='Доля ответов 429')
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help='Доля ответов с оборванным JSON')
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def make_stub_server(options, host: str = '127.0.0.1', port: int = 0) -> StubLLMServer:
+    try:
+        return StubLLMServer(
+            host, port, latency=options['latency'], latency_distribution=options['distribution'],
+            latency_spread=options['spread'], error_rate=options['error_rate'],
+            rate_limit_rate=options['rate_limit_rate'], malformed_rate=options['malformed_rate'],
+            seed=options['seed'],
+        )
+    except ValueError as e:
+        raise CommandError(str(e))
+
+
+class Command(BaseCommand):
+    help = (
+        'Локальная заглушка OpenAI chat completions для нагрузочных тестов AI-анализа. '
+        'Чтобы направить на нее приложение, задайте OPENAI_BASE_URL=<адрес>/v1 и любой OPENAI_API_KEY'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8089)
+        add_stub_arguments(parser)
+
+    def handle(self, *args, **options):
+        server = make_stub_server(options, options['host'], options['port']).start()
+        self.stdout.write(self.style.SUCCESS(f"Заглушка LLM слушает {server.base_url}, Ctrl+C для остановки"))
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.stop()
+
+        outcomes = ', '.join(f'{name}={count}' for name, count in sorted(server.outcomes.items()))
+        self.stdout.write(f"Обработано запросов: {server.requests}{f' ({outcomes})' if outcomes else ''}")
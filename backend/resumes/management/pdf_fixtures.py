@@ -0,0 +1,102 @@
+"""
+Генераторы PDF для команд проверки и замеров извлечения текста: минимальный
+сборщик документа и набор вредоносных файлов для проверки лимитов.
+"""
+import zlib
+from typing import List
+
+
+def build_pdf(objects: List[bytes]) -> bytes:
+    """Собирает PDF из тел объектов; объект 1 - каталог документа."""
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def _stream(data: bytes, compressed: bool = False) -> bytes:
+    if compressed:
+        data = zlib.compress(data, 9)
+        return b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(data) + data + b'\nendstream'
+    return b'<< /Length %d >>\nstream\n' % len(data) + data + b'\nendstream'
+
+
+def _page(contents: int, extra: bytes = b'') -> bytes:
+    return (
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+        b'/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R %s>>' % (contents, extra)
+    )
+
+
+def _document(page_contents: List[bytes], compressed: bool = False, page_extra: bytes = b'') -> bytes:
+    count = len(page_contents)
+    kids = b' '.join(b'%d 0 R' % (4 + 2 * index) for index in range(count))
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [' + kids + b'] /Count %d >>' % count,
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+    for index, content in enumerate(page_contents):
+        objects.append(_page(5 + 2 * index, page_extra))
+        objects.append(_stream(content, compressed))
+    return build_pdf(objects)
+
+
+def _text_content(line: str) -> bytes:
+    return b'BT /F1 12 Tf 50 750 Td (' + line.encode('latin-1') + b') Tj ET'
+
+
+def normal_resume() -> bytes:
+    return _document([_text_content(f'Python Django developer, page {page + 1}') for page in range(3)])
+
+
+def huge_page_count(pages: int = 200_000) -> bytes:
+    # Дерево страниц с сотнями тысяч листов: бюджет страниц должен остановить разбор
+    return _document([_text_content('page') for _ in range(pages)])
+
+
+def deep_nesting(depth: int = 200_000) -> bytes:
+    # Массив глубокой вложенности в ресурсах страницы
+    nested = b'[' * depth + b']' * depth
+    return _document([_text_content('nested')], page_extra=b'/Nested ' + nested + b' ')
+
+
+def decompression_bomb(size_mb: int = 2048) -> bytes:
+    # Поток содержимого, который распаковывается в гигабайты пробелов
+    compressor = zlib.compressobj(9)
+    chunk = b' ' * (1024 * 1024)
+    data = b''.join(compressor.compress(chunk) for _ in range(size_mb)) + compressor.flush()
+    content = b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(data) + data + b'\nendstream'
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [4 0 R] /Count 1 >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+        _page(5),
+        content,
+    ]
+    return build_pdf(objects)
+
+
+def operator_flood(operators: int = 3_000_000) -> bytes:
+    # Миллионы операторов вывода текста на одной странице
+    body = b'BT /F1 1 Tf ' + b'1 0 Td (x) Tj ' * operators + b'ET'
+    return _document([body], compressed=True)
+
+
+def cyclic_page_tree() -> bytes:
+    # Узел дерева страниц ссылается сам на себя
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [2 0 R 4 0 R] /Count 2 >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+        _page(5),
+        _stream(_text_content('cycle')),
+    ]
+    return build_pdf(objects)
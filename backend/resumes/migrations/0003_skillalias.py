@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-18 04:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resumes', '0002_alter_resume_options_alter_skill_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SkillAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='синоним')),
+                ('normalized_name', models.CharField(editable=False, max_length=100, unique=True, verbose_name='нормализованный синоним')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='дата создания')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='resumes.skill', verbose_name='навык')),
+            ],
+            options={
+                'verbose_name': 'синоним навыка',
+                'verbose_name_plural': 'синонимы навыков',
+                'ordering': ['name'],
+            },
+        ),
+    ]
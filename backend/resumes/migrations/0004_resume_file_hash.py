@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 04:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resumes', '0003_skillalias'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resume',
+            name='file_hash',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=64, verbose_name='SHA-256 файла'),
+        ),
+    ]
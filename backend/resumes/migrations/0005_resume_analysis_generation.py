@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 04:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resumes', '0004_resume_file_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='resume',
+            name='analysis_claimed_generation',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='поколение запущенного анализа'),
+        ),
+        migrations.AddField(
+            model_name='resume',
+            name='analysis_generation',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='поколение анализа'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 05:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resumes', '0005_resume_analysis_generation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='skill',
+            name='idf_weight',
+            field=models.FloatField(default=1.0, editable=False, verbose_name='вес IDF'),
+        ),
+    ]
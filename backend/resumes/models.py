@@ -5,6 +5,8 @@ from django.core.exceptions import ValidationError
 from django.utils.text import slugify
 from typing import List, Set, Dict, Any, Optional
 
+from resume_analyzer.utils.analysis_cache import compute_content_hash
+
 
 class Skill(models.Model):
     PROGRAMMING = 'programming'
@@ -34,6 +36,8 @@ class Skill(models.Model):
     )
     slug = models.SlugField(_('URL-идентификатор'), max_length=110, unique=True, blank=True)
     description = models.TextField(_('описание'), blank=True, null=True)
+    # Обратная частота навыка среди активных вакансий и резюме, пересчитывается задачей по расписанию
+    idf_weight = models.FloatField(_('вес IDF'), default=1.0, editable=False)
     
     created_at = models.DateTimeField(_('дата создания'), auto_now_add=True)
     updated_at = models.DateTimeField(_('дата изменения'), auto_now=True)
@@ -61,6 +65,49 @@ class Skill(models.Model):
         super().save(*args, **kwargs)
 
 
+class SkillAlias(models.Model):
+    skill = models.ForeignKey(
+        Skill,
+        on_delete=models.CASCADE,
+        related_name='aliases',
+        verbose_name=_('навык')
+    )
+    name = models.CharField(_('синоним'), max_length=100)
+    normalized_name = models.CharField(
+        _('нормализованный синоним'),
+        max_length=100,
+        unique=True,
+        editable=False
+    )
+    
+    created_at = models.DateTimeField(_('дата создания'), auto_now_add=True)
+    
+    class Meta:
+        verbose_name = _('синоним навыка')
+        verbose_name_plural = _('синонимы навыков')
+        ordering = ['name']
+    
+    def __str__(self) -> str:
+        return f"{self.name} → {self.skill.name}"
+    
+    def clean(self) -> None:
+        from resumes.catalog import normalize_skill_name
+        
+        normalized_name = normalize_skill_name(self.name)
+        if not normalized_name:
+            raise ValidationError({'name': _("Синоним не может быть пустым.")})
+        if Skill.objects.filter(name__iexact=self.name.strip()).exclude(pk=self.skill_id).exists():
+            raise ValidationError({
+                'name': _("Синоним совпадает с названием другого навыка.")
+            })
+    
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        from resumes.catalog import normalize_skill_name
+        
+        self.normalized_name = normalize_skill_name(self.name)
+        super().save(*args, **kwargs)
+
+
 class Resume(models.Model):
     PENDING = 'pending'
     ANALYZING = 'analyzing'
@@ -110,6 +157,27 @@ class Resume(models.Model):
         null=True
     )
     
+    file_hash = models.CharField(
+        _('SHA-256 файла'),
+        max_length=64,
+        blank=True,
+        default='',
+        db_index=True,
+        editable=False
+    )
+    
+    # Номер последнего запрошенного анализа и номер анализа, взятого в работу
+    analysis_generation = models.PositiveIntegerField(
+        _('поколение анализа'),
+        default=0,
+        editable=False
+    )
+    analysis_claimed_generation = models.PositiveIntegerField(
+        _('поколение запущенного анализа'),
+        default=0,
+        editable=False
+    )
+    
     skills = models.ManyToManyField(
         Skill, 
         blank=True,
@@ -152,8 +220,23 @@ class Resume(models.Model):
                 self.file_type = self.PDF
             elif file_ext == 'docx':
                 self.file_type = self.DOCX
+        
+        # Новый загруженный файл еще не сохранен в хранилище - считаем хэш содержимого
+        if self.file and not getattr(self.file, '_committed', True):
+            self.file_hash = compute_content_hash(self.file)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'file' in update_fields:
+                kwargs['update_fields'] = set(update_fields) | {'file_hash'}
+        
         super().save(*args, **kwargs)
     
+    def ensure_file_hash(self) -> str:
+        if not self.file_hash and self.file:
+            with self.file.open('rb') as f:
+                self.file_hash = compute_content_hash(f)
+            self.save(update_fields=['file_hash'])
+        return self.file_hash
+    
     def get_skills_list(self) -> List[str]:
         return list(self.skills.values_list('name', flat=True))
     
@@ -87,5 +87,13 @@ class AnalysisResultSerializer(serializers.Serializer):
     analysis_results = serializers.DictField(read_only=True)
     extracted_text = serializers.CharField(read_only=True)
     
+    # Версия результата увеличивается, когда результат правил дополнен ответом LLM
+    analysis_version = serializers.IntegerField(read_only=True, default=1)
+    analysis_stage = serializers.CharField(read_only=True, default='rules')
+    enrichment_status = serializers.CharField(read_only=True, allow_null=True, default=None)
+    
     class Meta:
-        fields = ['_id', 'resume_id', 'user_id', 'created_at', 'analysis_results', 'extracted_text']
\ No newline at end of file
+        fields = [
+            '_id', 'resume_id', 'user_id', 'created_at', 'analysis_results', 'extracted_text',
+            'analysis_version', 'analysis_stage', 'enrichment_status',
+        ]
\ No newline at end of file
@@ -1,52 +1,90 @@
-import os
 import logging
-from django.db.models.signals import pre_delete, post_save
+from django.db import transaction
+from django.db.models.signals import pre_delete, post_save, post_delete, m2m_changed
 from django.dispatch import receiver
-from django.conf import settings
 
-from resumes.models import Resume, Skill
-from resumes.tasks import analyze_resume
+from jobs.match_table import schedule_refresh
+from jobs.matching import JOBS, RESUMES, publish_changes
+from resumes.catalog import bump_catalog_version
+from resumes.models import Resume, Skill, SkillAlias
 
 logger = logging.getLogger(__name__)
 
 
 @receiver(pre_delete, sender=Resume)
 def resume_delete_handler(sender, instance, **kwargs):
+    # Файл и результаты анализа удаляются только после фиксации удаления резюме
+    resume_id = instance.id
+    storage, file_name = instance.file.storage, instance.file.name
+    mongodb_id = instance.mongodb_id
+    transaction.on_commit(lambda: _delete_resume_data(resume_id, storage, file_name, mongodb_id))
+
+
+def _delete_resume_data(resume_id, storage, file_name, mongodb_id):
     try:
-        if instance.file:
-            if os.path.isfile(instance.file.path):
-                os.remove(instance.file.path)
+        if file_name:
+            storage.delete(file_name)
     except Exception as e:
-        logger.error(f"Ошибка при удалении файла резюме {instance.id}: {str(e)}")
-    
-    if instance.mongodb_id:
-        try:
-            from resume_analyzer.utils.mongodb import get_mongodb_db
-            db = get_mongodb_db()
-            collection = db.resume_analysis
-            
-            collection.delete_one({"_id": instance.mongodb_id})
-            logger.info(f"Результаты анализа для резюме {instance.id} удалены из MongoDB")
-        except Exception as e:
-            logger.error(f"Ошибка при удалении результатов анализа из MongoDB для резюме {instance.id}: {str(e)}")
-
-
-@receiver(post_save, sender=Resume)
-def resume_file_changed_handler(sender, instance, created, **kwargs):
-    update_fields = kwargs.get('update_fields')
+        logger.error(f"Ошибка при удалении файла резюме {resume_id}: {str(e)}")
     
-    if created or (update_fields is None or 'file' in update_fields):
-        if instance.status == Resume.PENDING:
-            try:
-                if 'celery' in settings.INSTALLED_APPS:
-                    analyze_resume.delay(instance.id)
-                    logger.info(f"Задача анализа резюме {instance.id} запущена")
-            except Exception as e:
-                logger.error(f"Ошибка при запуске задачи анализа резюме {instance.id}: {str(e)}")
+    if mongodb_id:
+        from resumes.tasks import delete_analysis_from_mongodb
+        delete_analysis_from_mongodb(mongodb_id)
 
 
 @receiver(post_save, sender=Skill)
 def skill_created_handler(sender, instance, created, **kwargs):
     if created:
         logger.info(f"Создан новый навык: {instance.name} (категория: {instance.category})")
-        
\ No newline at end of file
+    
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_delete, sender=Skill)
+def skill_deleted_handler(sender, instance, **kwargs):
+    logger.info(f"Удален навык: {instance.name}")
+    
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=SkillAlias)
+@receiver(post_delete, sender=SkillAlias)
+def skill_alias_changed_handler(sender, instance, **kwargs):
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(pre_delete, sender=Resume)
+def resume_matches_delete_handler(sender, instance, **kwargs):
+    # Строки резюме в таблице совпадений удаляются каскадом: вакансии запоминаются до удаления
+    from jobs.models import ResumeJobMatch
+    instance._matched_job_ids = list(
+        ResumeJobMatch.objects.filter(resume_id=instance.id).values_list('job_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Resume)
+def resume_matrix_delete_handler(sender, instance, **kwargs):
+    # id запоминается сразу: после удаления Django обнуляет pk экземпляра
+    resume_ids = [instance.id]
+    transaction.on_commit(lambda: publish_changes(RESUMES, resume_ids))
+    # Лучшие резюме вакансий пересчитываются после обновления матрицы, уже без удаленного резюме
+    job_ids = getattr(instance, '_matched_job_ids', None)
+    if job_ids:
+        schedule_refresh(JOBS, job_ids)
+
+
+@receiver(m2m_changed, sender=Resume.skills.through)
+def resume_skills_changed_handler(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    
+    if not reverse:
+        resume_ids = [instance.id]
+    elif pk_set is not None:
+        resume_ids = list(pk_set)
+    else:
+        # skill.resumes.clear(): затронутые резюме неизвестны, матрица перестраивается
+        resume_ids = None
+    transaction.on_commit(lambda: publish_changes(RESUMES, resume_ids))
+    # В том числе после update_resume_skills при анализе резюме
+    schedule_refresh(RESUMES, resume_ids)
@@ -1,144 +1,629 @@
 import os
 import io
 import re
+import json
+import hashlib
 import logging
 import tempfile
 from datetime import datetime
 from typing import Dict, List, Any, Optional, Tuple
 
-from celery import shared_task
+from celery import chain, shared_task
+from celery.exceptions import Ignore
 from django.conf import settings
+from django.db import transaction
+from django.db.models import F
 from django.utils import timezone
 from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
 
+from jobs.match_table import schedule_refresh
+from jobs.matching import RESUMES, publish_changes
+from resume_analyzer.utils.analysis_cache import ANALYSIS, EXTRACTION, compute_content_hash, get_analysis_cache
+from resume_analyzer.utils.extraction_pool import ExtractionAborted, get_extraction_pool
 from resume_analyzer.utils.mongodb import get_mongodb_db
+from resume_analyzer.utils.scoring_weights import get_scoring_weights
+from resume_analyzer.utils.segmentation import segment_resume
+from resume_analyzer.utils.text_extraction import EXTRACTOR_VERSION, extract_resume_text
+from resumes.catalog import get_skill_catalog
+from resumes.dispatch import claim_analysis, is_current, request_analysis
 from resumes.models import Resume, Skill
 from resume_analyzer.utils import ai_analyzer
 
 logger = logging.getLogger(__name__)
 
-try:
-    import PyPDF2
-    import docx
-    from pdfminer.high_level import extract_text as pdf_extract_text
-except ImportError:
-    logger.warning("Не удалось импортировать необходимые библиотеки для обработки файлов")
+# Увеличивается при изменении правил анализа, чтобы не использовать устаревший кэш
+ANALYZER_VERSION = 1
+
+
+STAGE_RETRY_COUNTDOWN = 60 * 5
+ENRICHMENT_RETRY_COUNTDOWN = 60
+
+# Режимы анализа (settings.ANALYSIS_MODE): только правила, только LLM или
+# гибридный - результат правил сразу, дополнение от LLM следующей задачей
+ANALYSIS_MODE_RULES = 'rules'
+ANALYSIS_MODE_AI = 'ai'
+ANALYSIS_MODE_HYBRID = 'hybrid'
+ANALYSIS_MODES = (ANALYSIS_MODE_RULES, ANALYSIS_MODE_AI, ANALYSIS_MODE_HYBRID)
+
+# Источник текущего результата в документе resume_analysis (analysis_stage);
+# analysis_version увеличивается при каждом обновлении результата
+ANALYSIS_STAGE_RULES = 'rules'
+ANALYSIS_STAGE_LLM = 'llm'
+
+# Состояние дополнения результата от LLM в гибридном режиме (enrichment_status)
+ENRICHMENT_PENDING = 'pending'
+ENRICHMENT_COMPLETED = 'completed'
+ENRICHMENT_UNAVAILABLE = 'unavailable'
+
+# Поля ответа LLM, которые заменяют поля результата правил
+LLM_MERGED_FIELDS = ('format_quality', 'structure_analysis', 'improvement_suggestions')
+
+
+def get_analysis_mode() -> str:
+    mode = getattr(settings, 'ANALYSIS_MODE', None)
+    if mode in ANALYSIS_MODES:
+        return mode
+    return ANALYSIS_MODE_AI if getattr(settings, 'USE_AI_ANALYSIS', False) else ANALYSIS_MODE_RULES
+
+
+def build_analysis_pipeline(resume_id: int):
+    """
+    Цепочка этапов анализа резюме. Каждый этап выполняется в своей очереди
+    (см. CELERY_TASK_ROUTES). Между этапами передаются ссылки - хэш содержимого
+    файла и ID документа MongoDB, а текст берется из кэша извлечения.
+    """
+    return chain(
+        extract_resume_stage.s(resume_id),
+        analyze_resume_stage.s(),
+        persist_analysis_stage.s(),
+        index_resume_skills_stage.s(),
+    )
+
+
+@shared_task
+def analyze_resume(resume_id: int) -> Dict[str, Any]:
+    # Точка входа для прежних вызовов analyze_resume.delay(id)
+    return request_analysis(resume_id)
+
+
+def _abort_if_stale(resume_id: int, generation: int, stage: str) -> None:
+    if not is_current(resume_id, generation):
+        logger.info(
+            f"Анализ резюме {resume_id} (поколение {generation}) устарел, "
+            f"этап {stage} и последующие пропущены"
+        )
+        raise Ignore()
+
+
+def _fail_stage(task, resume_id: int, generation: Optional[int], stage: str, exc: Exception) -> None:
+    if isinstance(exc, Ignore):
+        raise exc
+
+    logger.error(f"Ошибка на этапе {stage} анализа резюме {resume_id}: {str(exc)}", exc_info=True)
+    # Статус меняет только актуальный запуск
+    Resume.objects.filter(id=resume_id, analysis_generation=generation).update(status=Resume.FAILED)
+
+    if isinstance(exc, ExtractionAborted):
+        # Файл, на котором извлечение превысило лимиты, не отправляется на повтор
+        raise exc
+
+    # Повтор этапа сохраняет оставшуюся часть цепочки
+    raise task.retry(countdown=STAGE_RETRY_COUNTDOWN, exc=exc)
 
 
 @shared_task(bind=True, max_retries=3)
-def analyze_resume(self, resume_id: int) -> Dict[str, Any]:
-    logger.info(f"Начат анализ резюме {resume_id}")
-    
+def extract_resume_stage(self, resume_id: int) -> Dict[str, Any]:
+    generation = claim_analysis(resume_id, retrying=self.request.retries > 0)
+    if generation is None:
+        raise Ignore()
+
+    logger.info(f"Начат анализ резюме {resume_id} (поколение {generation})")
+
     try:
         resume = Resume.objects.get(id=resume_id)
-        
-        resume.status = Resume.ANALYZING
-        resume.save(update_fields=['status'])
-        
-        file_path = resume.file.path
-        file_type = resume.file_type
-        
-        extracted_text = extract_text_from_file(file_path, file_type)
-        
-        if not extracted_text:
+
+        content_hash = resume.ensure_file_hash()
+        extracted = extract_resume_content(resume.file.path, resume.file_type, content_hash)
+
+        if not extracted['text']:
             raise ValueError("Не удалось извлечь текст из файла")
-        
-        analysis_result = analyze_resume_text(extracted_text)
-        
-        mongodb_id = save_analysis_to_mongodb(resume_id, resume.user_id, extracted_text, analysis_result)
-        
-        update_resume_skills(resume, analysis_result)
-        
-        resume.status = Resume.COMPLETED
-        resume.mongodb_id = mongodb_id
-        resume.save(update_fields=['status', 'mongodb_id'])
-        
+
+        return {'resume_id': resume_id, 'generation': generation, 'content_hash': content_hash}
+    except Exception as e:
+        _fail_stage(self, resume_id, generation, 'extract', e)
+
+
+def _load_extracted(resume_id: int, content_hash: str) -> Tuple[Resume, Dict[str, Any]]:
+    # Обычно это попадание в кэш извлечения; без кэша текст извлекается заново
+    resume = Resume.objects.get(id=resume_id)
+    return resume, extract_resume_content(resume.file.path, resume.file_type, content_hash)
+
+
+@shared_task(bind=True, max_retries=3)
+def analyze_resume_stage(self, ref: Dict[str, Any]) -> Dict[str, Any]:
+    resume_id, generation = ref['resume_id'], ref['generation']
+    try:
+        _abort_if_stale(resume_id, generation, 'analyze')
+
+        _, extracted = _load_extracted(resume_id, ref['content_hash'])
+        analysis_result, analysis_stage = analyze_resume_content(extracted['text'], ref['content_hash'])
+
+        # Результат анализа (оценки и названия навыков) невелик и передается дальше целиком
+        return {**ref, 'analysis': analysis_result, 'analysis_stage': analysis_stage}
+    except Exception as e:
+        _fail_stage(self, resume_id, generation, 'analyze', e)
+
+
+@shared_task(bind=True, max_retries=3)
+def persist_analysis_stage(self, ref: Dict[str, Any]) -> Dict[str, Any]:
+    resume_id, generation = ref['resume_id'], ref['generation']
+    try:
+        _abort_if_stale(resume_id, generation, 'persist')
+
+        resume, extracted = _load_extracted(resume_id, ref['content_hash'])
+
+        # Повтор этапа после успешной записи обновляет тот же документ (ключ - резюме и поколение)
+        mongodb_id = save_analysis_to_mongodb(
+            resume_id, resume.user_id, extracted['text'], ref['analysis'],
+            sections=extracted['sections'], extraction=extracted['extraction'], generation=generation,
+            analysis_stage=ref.get('analysis_stage'),
+        )
+
+        # mongodb_id обновляется, только если за время анализа не запросили новый
+        updated = Resume.objects.filter(id=resume_id, analysis_generation=generation).update(
+            mongodb_id=mongodb_id
+        )
+        if not updated:
+            # Запрошен новый анализ: сохраненный документ никому не принадлежит
+            delete_analysis_from_mongodb(mongodb_id)
+            logger.info(f"Анализ резюме {resume_id} (поколение {generation}) устарел во время сохранения")
+            raise Ignore()
+
+        # Навыки передаются дальше вместе со ссылкой: при недоступной MongoDB
+        # документ не сохранен, но навыки резюме все равно индексируются
+        return {
+            'resume_id': resume_id, 'generation': generation, 'mongodb_id': mongodb_id,
+            'skills_found': ref['analysis'].get('skills_found', []),
+        }
+    except Exception as e:
+        _fail_stage(self, resume_id, generation, 'persist', e)
+
+
+@shared_task(bind=True, max_retries=3)
+def index_resume_skills_stage(self, ref: Dict[str, Any]) -> Dict[str, Any]:
+    resume_id, generation = ref['resume_id'], ref['generation']
+    mongodb_id = ref['mongodb_id']
+    try:
+        _abort_if_stale(resume_id, generation, 'index_skills')
+
+        analysis_results = {'skills_found': ref['skills_found']}
+        with transaction.atomic():
+            resume = Resume.objects.select_for_update().get(id=resume_id)
+            _abort_if_stale(resume_id, generation, 'index_skills')
+
+            update_resume_skills(resume, analysis_results)
+            resume.status = Resume.COMPLETED
+            resume.save(update_fields=['status'])
+
         logger.info(f"Анализ резюме {resume_id} успешно завершен")
+        if get_analysis_mode() == ANALYSIS_MODE_HYBRID:
+            enrich_analysis_with_llm.delay(resume_id, generation, mongodb_id)
         return {
             'resume_id': resume_id,
             'status': 'success',
             'mongodb_id': mongodb_id
         }
-        
-    except Resume.DoesNotExist:
-        logger.error(f"Резюме с ID {resume_id} не существует")
-        return {
-            'resume_id': resume_id,
-            'status': 'error',
-            'error': 'Resume does not exist'
-        }
     except Exception as e:
-        logger.error(f"Ошибка при анализе резюме {resume_id}: {str(e)}", exc_info=True)
+        _fail_stage(self, resume_id, generation, 'index_skills', e)
+
+
+@shared_task(bind=True, max_retries=3)
+def analyze_resumes_batch(self, resume_ids: List[int]) -> Dict[str, Any]:
+    """Пакетный анализ резюме для переобработки корпуса (см. команду backfill_analysis)."""
+    try:
+        return analyze_resumes_chunk(resume_ids)
+    except Exception as e:
+        logger.error(f"Ошибка при пакетном анализе {len(resume_ids)} резюме: {str(e)}", exc_info=True)
+        raise self.retry(countdown=STAGE_RETRY_COUNTDOWN, exc=e)
+
+
+def analyze_resumes_chunk(resume_ids: List[int]) -> Dict[str, Any]:
+    """
+    Анализирует пачку резюме и сохраняет результаты пакетно: один bulk_write
+    в MongoDB, один bulk_update резюме, одно удаление и одна массовая вставка
+    в таблицу связей с навыками. Резюме, для которых запрошен отдельный анализ
+    (см. resumes.dispatch) до или во время обработки пачки, пропускаются.
+    Прежние документы анализа обновленных резюме удаляются.
+    """
+    resumes = list(
+        Resume.objects.filter(id__in=resume_ids)
+        .exclude(status=Resume.ANALYZING)
+        .filter(analysis_claimed_generation__gte=F('analysis_generation'))
+        .only('id', 'user_id', 'file', 'file_type', 'file_hash', 'status', 'mongodb_id', 'analysis_generation')
+    )
+
+    catalog = get_skill_catalog()
+    analyzed: List[Tuple[Resume, Dict[str, Any], List[int]]] = []
+    documents = []
+    failed = []
+
+    for resume in resumes:
         try:
-            resume = Resume.objects.get(id=resume_id)
+            if not resume.file_hash:
+                with resume.file.open('rb') as f:
+                    resume.file_hash = compute_content_hash(f)
+
+            extracted = extract_resume_content(resume.file.path, resume.file_type, resume.file_hash)
+            if not extracted['text']:
+                raise ValueError("Не удалось извлечь текст из файла")
+
+            analysis_result, analysis_stage = analyze_resume_content(extracted['text'], resume.file_hash)
+        except Exception as e:
+            logger.error(f"Ошибка при пакетном анализе резюме {resume.id}: {str(e)}")
             resume.status = Resume.FAILED
-            resume.save(update_fields=['status'])
-        except:
-            pass
-            
-        try:
-            self.retry(countdown=60 * 5, exc=e)  
-        except:
-            pass
-            
-        return {
-            'resume_id': resume_id,
-            'status': 'error',
-            'error': str(e)
+            failed.append(resume)
+            continue
+
+        skill_ids = [skill.id for skill in catalog.resolve_names(analysis_result.get('skills_found', []))]
+        analyzed.append((resume, analysis_result, skill_ids))
+        documents.append(build_analysis_document(
+            resume.id, resume.user_id, extracted['text'], analysis_result,
+            extracted['sections'], extracted['extraction'], generation=resume.analysis_generation,
+            analysis_stage=analysis_stage,
+        ))
+
+    db = None
+    if documents:
+        db = get_mongodb_db()
+        if db is None:
+            raise RuntimeError("MongoDB недоступна")
+        # Повтор задачи после успешной записи перезаписывает те же документы
+        inserted_ids = upsert_analysis_documents(db, documents)
+
+        for (resume, _, _), inserted_id in zip(analyzed, inserted_ids):
+            resume.mongodb_id = str(inserted_id)
+            resume.status = Resume.COMPLETED
+
+    Through = Resume.skills.through
+    with transaction.atomic():
+        # Поколение проверяется повторно под блокировкой: отдельный анализ, запрошенный
+        # или завершенный за время обработки пачки, не перезаписывается ее результатом
+        current = {
+            row['id']: row for row in Resume.objects.select_for_update()
+            .filter(id__in=[resume.id for resume in resumes])
+            .values('id', 'analysis_generation', 'analysis_claimed_generation', 'status', 'mongodb_id')
         }
 
+        def is_unchanged(resume: Resume) -> bool:
+            row = current.get(resume.id)
+            return (
+                row is not None
+                and row['analysis_generation'] == resume.analysis_generation
+                and row['analysis_claimed_generation'] >= row['analysis_generation']
+                and row['status'] != Resume.ANALYZING
+            )
+
+        stale = [resume for resume, _, _ in analyzed if not is_unchanged(resume)]
+        analyzed = [item for item in analyzed if is_unchanged(item[0])]
+        failed = [resume for resume in failed if is_unchanged(resume)]
+
+        # Документы устаревших резюме никому не принадлежат, а прежние документы
+        # обновленных резюме заменены новыми
+        orphaned = [
+            resume.mongodb_id for resume in stale
+            if resume.id not in current or resume.mongodb_id != current[resume.id]['mongodb_id']
+        ] + [
+            current[resume.id]['mongodb_id'] for resume, _, _ in analyzed
+            if current[resume.id]['mongodb_id'] and current[resume.id]['mongodb_id'] != resume.mongodb_id
+        ]
+        if orphaned:
+            transaction.on_commit(lambda: delete_analysis_documents(orphaned))
+
+        Resume.objects.bulk_update(
+            [resume for resume, _, _ in analyzed] + failed,
+            ['status', 'mongodb_id', 'file_hash'],
+        )
+
+        # Навыки заменяются только у успешно проанализированных резюме
+        Through.objects.filter(resume_id__in=[resume.id for resume, _, _ in analyzed]).delete()
+        Through.objects.bulk_create(
+            [
+                Through(resume_id=resume.id, skill_id=skill_id)
+                for resume, _, skill_ids in analyzed
+                for skill_id in set(skill_ids)
+            ],
+            ignore_conflicts=True,
+        )
+        # Массовые операции со связями не вызывают m2m_changed, матрица навыков резюме обновляется явно
+        analyzed_ids = [resume.id for resume, _, _ in analyzed]
+        transaction.on_commit(lambda: publish_changes(RESUMES, analyzed_ids))
+        schedule_refresh(RESUMES, analyzed_ids)
+
+    if get_analysis_mode() == ANALYSIS_MODE_HYBRID:
+        for resume, _, _ in analyzed:
+            enrich_analysis_with_llm.delay(resume.id, resume.analysis_generation, resume.mongodb_id)
+
+    return {
+        'requested': len(resume_ids),
+        'completed': len(analyzed),
+        'failed': len(failed),
+        'skipped': len(resume_ids) - len(resumes) + len(stale),
+    }
+
+
+GPT_JOB_QUEUED = 'queued'
+GPT_JOB_RUNNING = 'running'
+GPT_JOB_COMPLETED = 'completed'
+GPT_JOB_FAILED = 'failed'
+
+
+@shared_task(bind=True, max_retries=3)
+def gpt_analyze_resume(self, resume_id: int, mongodb_id: str, job_id: str, refresh: bool = False) -> Dict[str, Any]:
+    """
+    AI-анализ резюме по запросу пользователя (очередь llm). Состояние задания
+    хранится в документе resume_analysis (gpt_analysis_status), результат -
+    в поле gpt_analysis. Задание, замененное более новым, не выполняется.
+    refresh=True - запрос к LLM в обход кэша ответов. При недоступной MongoDB
+    задача повторяется, а затем задание отмечается как failed.
+    """
+    object_id = _analysis_object_id(mongodb_id)
+    if object_id is None:
+        logger.error(f"AI-анализ {job_id} резюме {resume_id}: результат анализа {mongodb_id} не сохранен в MongoDB")
+        return {'resume_id': resume_id, 'job_id': job_id, 'status': GPT_JOB_FAILED}
+    job_filter = {'_id': object_id, 'gpt_analysis_job_id': job_id}
+
+    def fail(error: str) -> Dict[str, Any]:
+        try:
+            db = get_mongodb_db()
+            if db is not None:
+                db.resume_analysis.update_one(job_filter, {'$set': {
+                    'gpt_analysis_status': GPT_JOB_FAILED,
+                    'gpt_analysis_error': error,
+                }})
+        except PyMongoError as e:
+            logger.error(f"Не удалось отметить AI-анализ {job_id} резюме {resume_id} как failed: {e}")
+        return {'resume_id': resume_id, 'job_id': job_id, 'status': GPT_JOB_FAILED}
+
+    def retry_or_fail(error: str) -> Dict[str, Any]:
+        logger.warning(f"MongoDB недоступна при AI-анализе {job_id} резюме {resume_id}: {error}")
+        if self.request.retries < self.max_retries:
+            raise self.retry(countdown=ENRICHMENT_RETRY_COUNTDOWN)
+        return fail(f"MongoDB недоступна: {error}")
+
+    try:
+        db = get_mongodb_db()
+        if db is None:
+            return retry_or_fail('нет подключения')
+        collection = db.resume_analysis
+        record = collection.find_one_and_update(
+            job_filter,
+            {'$set': {'gpt_analysis_status': GPT_JOB_RUNNING, 'gpt_analysis_started_at': datetime.now()}},
+            projection={'extracted_text': 1},
+        )
+    except PyMongoError as e:
+        return retry_or_fail(str(e))
+    if record is None:
+        logger.info(f"AI-анализ {job_id} резюме {resume_id} заменен более новым запросом")
+        return {'resume_id': resume_id, 'job_id': job_id, 'status': 'superseded'}
+
+    try:
+        ai_analysis = ai_analyzer.AIResumeAnalyzer().analyze_resume(
+            record.get('extracted_text', ''), use_cache=not refresh
+        )
+    except Exception as e:
+        logger.error(f"Ошибка при выполнении AI анализа резюме {resume_id}: {str(e)}", exc_info=True)
+        return fail(str(e))
+
+    try:
+        collection.update_one(job_filter, {'$set': {
+            'gpt_analysis': ai_analysis,
+            'gpt_analysis_date': datetime.now(),
+            'gpt_analysis_status': GPT_JOB_COMPLETED,
+        }})
+    except PyMongoError as e:
+        # Повтор берет ответ LLM из кэша, если он не отключен
+        return retry_or_fail(str(e))
+
+    logger.info(f"AI-анализ {job_id} резюме {resume_id} завершен")
+    return {'resume_id': resume_id, 'job_id': job_id, 'status': GPT_JOB_COMPLETED}
+
+
+@shared_task(bind=True, max_retries=3)
+def enrich_analysis_with_llm(self, resume_id: int, generation: int, mongodb_id: str) -> Dict[str, Any]:
+    """
+    Гибридный режим: дополняет сохраненный результат анализа правилами ответом
+    LLM (очередь llm). Поля ответа объединяются с результатом в том же документе
+    resume_analysis, analysis_version увеличивается, analysis_stage становится llm.
+    Если LLM недоступна, задача повторяется, а затем результат правил остается
+    окончательным (enrichment_status = unavailable).
+    """
+    if not is_current(resume_id, generation):
+        logger.info(f"Дополнение анализа резюме {resume_id} (поколение {generation}) устарело")
+        return {'resume_id': resume_id, 'status': 'superseded'}
+
+    # Результат, сохраненный с фиктивным ID при недоступной MongoDB, дополнить нельзя
+    object_id = _analysis_object_id(mongodb_id)
+    db = get_mongodb_db() if object_id is not None else None
+    if db is None:
+        logger.warning(f"Результат анализа {mongodb_id} резюме {resume_id} не сохранен в MongoDB, дополнение пропущено")
+        return {'resume_id': resume_id, 'status': 'skipped'}
+
+    collection = db.resume_analysis
+    pending_filter = {'_id': object_id, 'enrichment_status': ENRICHMENT_PENDING}
+    record = collection.find_one(pending_filter, {'extracted_text': 1, 'analysis_results': 1})
+    if record is None:
+        return {'resume_id': resume_id, 'status': 'skipped'}
+
+    analyzer = ai_analyzer.AIResumeAnalyzer()
+    llm_result = analyzer.analyze_with_llm(record.get('extracted_text', ''))
+    if llm_result is None:
+        # Повтор имеет смысл только при временной недоступности (ошибка API, выключатель разомкнут)
+        if analyzer.api_key and self.request.retries < self.max_retries:
+            raise self.retry(countdown=ENRICHMENT_RETRY_COUNTDOWN)
+        collection.update_one(pending_filter, {'$set': {'enrichment_status': ENRICHMENT_UNAVAILABLE}})
+        logger.warning(f"LLM недоступна, для резюме {resume_id} остается результат анализа правилами")
+        return {'resume_id': resume_id, 'status': ENRICHMENT_UNAVAILABLE}
+
+    merged = merge_llm_analysis(record.get('analysis_results') or {}, llm_result)
+    updated = collection.update_one(pending_filter, {
+        '$set': {
+            'analysis_results': merged,
+            'llm_analysis': llm_result,
+            'analysis_stage': ANALYSIS_STAGE_LLM,
+            'enrichment_status': ENRICHMENT_COMPLETED,
+            'enriched_at': datetime.now(),
+        },
+        '$inc': {'analysis_version': 1},
+    })
+    if not updated.modified_count:
+        return {'resume_id': resume_id, 'status': 'skipped'}
+
+    # Навыки, найденные LLM, добавляются к индексу, пока этот анализ остается текущим
+    with transaction.atomic():
+        resume = (
+            Resume.objects.select_for_update()
+            .filter(id=resume_id, analysis_generation=generation, mongodb_id=mongodb_id)
+            .first()
+        )
+        if resume is not None:
+            update_resume_skills(resume, merged)
+
+    logger.info(f"Анализ резюме {resume_id} дополнен результатом LLM")
+    return {'resume_id': resume_id, 'status': ENRICHMENT_COMPLETED}
+
+
+def merge_llm_analysis(analysis_result: Dict[str, Any], llm_result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Объединяет результат правил с ответом LLM. Оценка правил сохраняется, чтобы
+    оценки резюме оставались сопоставимыми; оценка LLM - в ai_overall_score.
+    """
+    merged = dict(analysis_result)
+    for field in LLM_MERGED_FIELDS:
+        if field in llm_result:
+            merged[field] = llm_result[field]
+
+    skills = list(analysis_result.get('skills_found', []))
+    known = {skill.casefold() for skill in skills}
+    for skill in llm_result.get('skills_found', []):
+        if isinstance(skill, str) and skill.casefold() not in known:
+            known.add(skill.casefold())
+            skills.append(skill)
+    merged['skills_found'] = skills
+    merged['skill_count'] = len(skills)
+
+    if 'overall_score' in llm_result:
+        merged['ai_overall_score'] = llm_result['overall_score']
+    return merged
+
+
+def delete_analysis_from_mongodb(mongodb_id: str) -> None:
+    object_id = _analysis_object_id(mongodb_id)
+    if object_id is None:
+        return
+    try:
+        db = get_mongodb_db()
+        if db is not None:
+            db.resume_analysis.delete_one({'_id': object_id})
+            logger.info(f"Результат анализа {mongodb_id} удален из MongoDB")
+    except Exception as e:
+        logger.error(f"Ошибка при удалении результата анализа {mongodb_id} из MongoDB: {str(e)}")
+
+
+def _analysis_object_id(mongodb_id: Optional[str]) -> Optional[ObjectId]:
+    """ObjectId документа resume_analysis; None - фиктивный ID, выданный при недоступной MongoDB."""
+    try:
+        return ObjectId(mongodb_id)
+    except (InvalidId, TypeError):
+        return None
+
 
 def extract_text_from_file(file_path: str, file_type: str) -> str:
-    text = ""
+    return extract_resume_text(file_path, file_type).text
+
+
+def extract_resume_content(file_path: str, file_type: str, content_hash: str = '') -> Dict[str, Any]:
+    cache = get_analysis_cache()
+    max_pages = settings.RESUME_EXTRACTION_MAX_PAGES
+    max_chars = settings.RESUME_EXTRACTION_MAX_CHARS
+    variant = (EXTRACTOR_VERSION, max_pages, max_chars)
     
-    try:
-        if file_type == 'pdf':
-            text = pdf_extract_text(file_path)
-            
-            if not text.strip():
-                with open(file_path, 'rb') as f:
-                    pdf_reader = PyPDF2.PdfReader(f)
-                    for page_num in range(len(pdf_reader.pages)):
-                        text += pdf_reader.pages[page_num].extract_text() or ""
-        
-        elif file_type == 'docx':
-            doc = docx.Document(file_path)
-            paragraphs = [para.text for para in doc.paragraphs]
-            text = "\n".join(paragraphs)
-        
-        else:
-            raise ValueError(f"Неподдерживаемый тип файла: {file_type}")
+    cached = cache.get(EXTRACTION, content_hash, variant)
+    if cached is not None:
+        logger.info(f"Текст файла {content_hash[:12]} взят из кэша")
+        return cached
     
-    except Exception as e:
-        logger.error(f"Ошибка при извлечении текста из файла: {str(e)}", exc_info=True)
-        raise
+    if settings.RESUME_EXTRACTION_ISOLATED:
+        extraction = get_extraction_pool().extract_or_raise(file_path, file_type, max_pages, max_chars)
+    else:
+        extraction = extract_resume_text(file_path, file_type, max_pages=max_pages, max_chars=max_chars)
+    text = extraction.text
+    extracted = {
+        'text': text,
+        'extraction': extraction.to_dict(),
+        'sections': [section.to_dict() for section in segment_resume(text)],
+    }
+    
+    if text:
+        cache.set(EXTRACTION, content_hash, extracted, variant)
+    
+    return extracted
+
+
+def _analysis_cache_variant() -> Optional[Tuple[Any, ...]]:
+    catalog_version = get_skill_catalog().version
+    if catalog_version is None:
+        # Без общей версии каталога нельзя гарантировать актуальность результата
+        return None
     
-    return text.strip()
+    weights = json.dumps(get_scoring_weights(), sort_keys=True)
+    weights_hash = hashlib.sha256(weights.encode('utf-8')).hexdigest()[:12]
+    return (ANALYZER_VERSION, catalog_version, weights_hash)
 
 
-def analyze_resume_text(text: str) -> Dict[str, Any]:
-    if hasattr(settings, 'USE_AI_ANALYSIS') and settings.USE_AI_ANALYSIS:
+def analyze_resume_content(text: str, content_hash: str = '') -> Tuple[Dict[str, Any], str]:
+    """Результат анализа и его источник (ANALYSIS_STAGE_RULES или ANALYSIS_STAGE_LLM)."""
+    # Кэшируются только результаты анализа правилами: ответы LLM недетерминированы.
+    # В гибридном режиме здесь выполняется только анализ правилами.
+    if get_analysis_mode() == ANALYSIS_MODE_AI:
+        return analyze_resume_text(text)
+    
+    cache = get_analysis_cache()
+    variant = _analysis_cache_variant()
+    
+    if variant is not None:
+        cached = cache.get(ANALYSIS, content_hash, variant)
+        if cached is not None:
+            logger.info(f"Результат анализа файла {content_hash[:12]} взят из кэша")
+            return cached, ANALYSIS_STAGE_RULES
+    
+    analysis_result = simple_resume_analysis(text)
+    
+    if variant is not None:
+        cache.set(ANALYSIS, content_hash, analysis_result, variant)
+    
+    return analysis_result, ANALYSIS_STAGE_RULES
+
+
+def analyze_resume_text(text: str) -> Tuple[Dict[str, Any], str]:
+    if get_analysis_mode() == ANALYSIS_MODE_AI:
         try:
-            return ai_analyzer.analyze_resume(text)
+            llm_result = ai_analyzer.AIResumeAnalyzer().analyze_with_llm(text)
         except Exception as e:
             logger.error(f"Ошибка при анализе через AI: {str(e)}")
-            return simple_resume_analysis(text)
+            llm_result = None
+        if llm_result is not None:
+            return llm_result, ANALYSIS_STAGE_LLM
+        # Ответ LLM не получен: результат правил и помечается соответственно
+        logger.warning("LLM недоступна, резюме проанализировано правилами")
     
-    return simple_resume_analysis(text)
+    return simple_resume_analysis(text), ANALYSIS_STAGE_RULES
 
 
 def simple_resume_analysis(text: str) -> Dict[str, Any]:
-    skills_in_db = list(Skill.objects.values_list('name', flat=True))
-    
-    skills_regex = {
-        skill: re.compile(r'\b' + re.escape(skill) + r'\b', re.IGNORECASE) 
-        for skill in skills_in_db
-    }
-    
-    skills_found = []
-    for skill, pattern in skills_regex.items():
-        if pattern.search(text):
-            skills_found.append(skill)
+    skills_found = [skill.name for skill in get_skill_catalog().find_skills(text)]
     
     email_pattern = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
     phone_pattern = re.compile(r'\b(?:\+?\d{1,3}[-.\s]?)?\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4}\b')
@@ -148,9 +633,7 @@ def simple_resume_analysis(text: str) -> Dict[str, Any]:
     
     word_count = len(text.split())
     
-    skill_score = min(len(skills_found) / 5, 1) * 50  # максимум 50 баллов за навыки
-    volume_score = min(word_count / 500, 1) * 50  # максимум 50 баллов за объем
-    overall_score = (skill_score + volume_score) / 2
+    skill_score, volume_score, overall_score = calculate_simple_scores(len(skills_found), word_count)
     
     result = {
         'overall_score': overall_score,
@@ -172,6 +655,17 @@ def simple_resume_analysis(text: str) -> Dict[str, Any]:
     return result
 
 
+def calculate_simple_scores(skill_count: int, word_count: int,
+                            weights: Optional[Dict[str, Any]] = None) -> Tuple[float, float, float]:
+    w = (weights or get_scoring_weights())['simple']
+    
+    skill_score = min(skill_count / w['skills_target'], 1) * w['skill_points']  # максимум 50 баллов за навыки
+    volume_score = min(word_count / w['words_target'], 1) * w['volume_points']  # максимум 50 баллов за объем
+    overall_score = (skill_score + volume_score) / 2
+    
+    return skill_score, volume_score, overall_score
+
+
 def find_missing_key_skills(found_skills: List[str]) -> List[str]:
     key_programming_skills = ["Python", "Java", "JavaScript", "C++", "C#"]
     key_framework_skills = ["Django", "React", "Angular", "Vue.js", "Spring"]
@@ -201,19 +695,104 @@ def generate_recommendations(skills_found: List[str], word_count: int) -> List[s
     return recommendations
 
 
+def build_analysis_document(resume_id: int, user_id: int,
+                            extracted_text: str, analysis_result: Dict[str, Any],
+                            sections: Optional[List[Dict[str, Any]]] = None,
+                            extraction: Optional[Dict[str, Any]] = None,
+                            generation: Optional[int] = None,
+                            analysis_stage: Optional[str] = None) -> Dict[str, Any]:
+    mode = get_analysis_mode()
+    if analysis_stage is None:
+        analysis_stage = ANALYSIS_STAGE_LLM if mode == ANALYSIS_MODE_AI else ANALYSIS_STAGE_RULES
+    document = {
+        "resume_id": resume_id,
+        "analysis_generation": generation,
+        "user_id": user_id,
+        "extracted_text": extracted_text,
+        "sections": sections or [],
+        "extraction": extraction,
+        "analysis_results": analysis_result,
+        "analysis_version": 1,
+        "analysis_stage": analysis_stage,
+        "created_at": datetime.now()
+    }
+    if mode == ANALYSIS_MODE_HYBRID:
+        document["enrichment_status"] = ENRICHMENT_PENDING
+    return document
+
+
+_analysis_indexes_ready = False
+
+
+def _ensure_analysis_indexes(db) -> None:
+    global _analysis_indexes_ready
+    if _analysis_indexes_ready:
+        return
+    # Документы до появления поколений в ключе не участвуют
+    db.resume_analysis.create_index(
+        [('resume_id', 1), ('analysis_generation', 1)],
+        unique=True,
+        partialFilterExpression={'analysis_generation': {'$type': 'number'}},
+    )
+    _analysis_indexes_ready = True
+
+
+def upsert_analysis_documents(db, documents: List[Dict[str, Any]]) -> List[str]:
+    """
+    Сохраняет документы анализа с ключом (resume_id, analysis_generation):
+    повтор задачи после успешной записи обновляет те же документы, а не
+    создает новые. Возвращает ID документов в порядке documents.
+    """
+    _ensure_analysis_indexes(db)
+    keys = [
+        {'resume_id': document['resume_id'], 'analysis_generation': document['analysis_generation']}
+        for document in documents
+    ]
+    db.resume_analysis.bulk_write([
+        UpdateOne(key, {
+            '$set': {field: value for field, value in document.items() if field != 'analysis_version'},
+            '$inc': {'analysis_version': 1},
+        }, upsert=True)
+        for key, document in zip(keys, documents)
+    ], ordered=False)
+
+    ids = {
+        (record['resume_id'], record['analysis_generation']): str(record['_id'])
+        for record in db.resume_analysis.find({'$or': keys}, {'resume_id': 1, 'analysis_generation': 1})
+    }
+    return [ids[key['resume_id'], key['analysis_generation']] for key in keys]
+
+
+def delete_analysis_documents(mongodb_ids: List[str]) -> None:
+    object_ids = [object_id for object_id in map(_analysis_object_id, mongodb_ids) if object_id is not None]
+    if not object_ids:
+        return
+    try:
+        db = get_mongodb_db()
+        if db is not None:
+            deleted = db.resume_analysis.delete_many({'_id': {'$in': object_ids}}).deleted_count
+            logger.info(f"Удалено устаревших результатов анализа: {deleted}")
+    except Exception as e:
+        logger.error(f"Ошибка при удалении устаревших результатов анализа из MongoDB: {str(e)}")
+
+
 def save_analysis_to_mongodb(resume_id: int, user_id: int, 
-                            extracted_text: str, analysis_result: Dict[str, Any]) -> str:
+                            extracted_text: str, analysis_result: Dict[str, Any],
+                            sections: Optional[List[Dict[str, Any]]] = None,
+                            extraction: Optional[Dict[str, Any]] = None,
+                            generation: Optional[int] = None,
+                            analysis_stage: Optional[str] = None) -> str:
     try:
         db = get_mongodb_db()
         collection = db.resume_analysis
         
-        document = {
-            "resume_id": resume_id,
-            "user_id": user_id,
-            "extracted_text": extracted_text,
-            "analysis_results": analysis_result,
-            "created_at": datetime.now()
-        }
+        document = build_analysis_document(
+            resume_id, user_id, extracted_text, analysis_result, sections, extraction,
+            generation=generation, analysis_stage=analysis_stage
+        )
+        
+        if generation is not None:
+            return upsert_analysis_documents(db, [document])[0]
         
         result = collection.insert_one(document)
         
@@ -235,10 +814,10 @@ def update_resume_skills(resume: Resume, analysis_result: Dict[str, Any]) -> Non
         if not skills_found:
             return
         
-        skills = Skill.objects.filter(name__in=skills_found)
+        skill_ids = [skill.id for skill in get_skill_catalog().resolve_names(skills_found)]
         
         resume.skills.clear()
-        resume.skills.add(*skills)
+        resume.skills.add(*skill_ids)
         
     except Exception as e:
         logger.error(f"Ошибка при обновлении навыков резюме: {str(e)}", exc_info=True)
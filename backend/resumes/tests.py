@@ -1,3 +1,459 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from accounts.models import User
+from resume_analyzer.utils import prompt_builder
+from resume_analyzer.utils.ai_analyzer import AIResumeAnalyzer
+from resume_analyzer.utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from resume_analyzer.utils.extraction_pool import (
+    MEMORY_LIMIT, OK, TIMEOUT, TOO_DEEP, ExtractionAborted, ExtractionPool, PoolResult,
+)
+from resume_analyzer.utils.extraction_worker import handle_request
+from resume_analyzer.utils.llm_cache import LLMResponseCache, make_llm_cache_key
+from resume_analyzer.utils.prompt_builder import OMITTED_MARKER, compact_text, count_tokens, fit_to_budget
+from resume_analyzer.utils.skill_matcher import SkillMatcher
+from resumes import catalog
+from resumes.catalog import get_skill_catalog
+from resumes.dispatch import claim_analysis, is_current, request_analysis
+from resumes.management.pdf_fixtures import decompression_bomb, normal_resume, operator_flood
+from resumes.models import Resume, Skill, SkillAlias
+from resumes.tasks import merge_llm_analysis
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'resumes-tests'}}
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        self.breaker = CircuitBreaker(
+            'test', cache=LocMemCache('circuit-breaker-tests', {}),
+            min_requests=4, error_rate=0.5, open_seconds=30, half_open_successes=2,
+        )
+        self.breaker.cache.clear()
+
+    def _fail(self, calls):
+        for _ in range(calls):
+            self.breaker.record(self.breaker.allow(), success=False, latency=0.1)
+
+    def _end_open_period(self):
+        # Ключ open_until истекает через open_seconds
+        self.breaker.cache.delete(self.breaker._key('open_until'))
+
+    def test_stays_closed_below_min_requests(self):
+        self._fail(3)
+        self.assertEqual(self.breaker.state(), CLOSED)
+        self.assertIsNotNone(self.breaker.allow())
+
+    def test_opens_half_opens_and_closes(self):
+        self._fail(4)
+        self.assertEqual(self.breaker.state(), OPEN)
+        self.assertIsNone(self.breaker.allow())
+
+        self._end_open_period()
+        self.assertEqual(self.breaker.state(), HALF_OPEN)
+
+        for _ in range(2):
+            probe = self.breaker.allow()
+            self.assertTrue(probe.probe)
+            # Пока проба не завершена, остальные вызовы отклоняются
+            self.assertIsNone(self.breaker.allow())
+            self.breaker.record(probe, success=True, latency=0.1)
+
+        self.assertEqual(self.breaker.state(), CLOSED)
+        # Прежние ошибки окна сброшены и не размыкают выключатель снова
+        self.assertEqual(self.breaker.window_stats()['requests'], 0)
+        self._fail(1)
+        self.assertEqual(self.breaker.state(), CLOSED)
+
+        snapshot = self.breaker.snapshot()
+        self.assertEqual((snapshot['times_opened'], snapshot['rejected_calls']), (1, 3))
+
+    def test_failed_probe_reopens(self):
+        self._fail(4)
+        self._end_open_period()
+
+        self.breaker.record(self.breaker.allow(), success=False, latency=0.1)
+
+        self.assertEqual(self.breaker.state(), OPEN)
+        self.assertIsNone(self.breaker.allow())
+
+    def test_slow_probe_counts_as_failure(self):
+        self._fail(4)
+        self._end_open_period()
+
+        self.breaker.record(self.breaker.allow(), success=True, latency=self.breaker.p95_seconds + 1)
+
+        self.assertEqual(self.breaker.state(), OPEN)
+
+
+class LLMCacheTests(SimpleTestCase):
+    resume_text = 'Python developer\n\nExperience: Django, Celery, PostgreSQL'
+
+    def setUp(self):
+        self.analyzer = AIResumeAnalyzer()
+        self.analyzer.api_key = 'test-key'
+        self.analyzer.llm_cache = LLMResponseCache(shared=LocMemCache('llm-cache-tests', {}))
+        self.analyzer.llm_cache.shared.clear()
+        self.analyzer.breaker = CircuitBreaker('llm-cache-test', cache=LocMemCache('llm-cache-breaker-tests', {}))
+
+        self.scores = iter(range(70, 100))
+        patcher = mock.patch('resume_analyzer.utils.ai_analyzer.get_sync_client')
+        self.client = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        self.client.chat.completions.create.side_effect = self._complete
+
+    def _complete(self, **kwargs):
+        content = f'{{"overall_score": {next(self.scores)}}}'
+        return mock.Mock(choices=[mock.Mock(message=mock.Mock(content=content))])
+
+    def _analyze(self, **options):
+        return self.analyzer.analyze_resume(self.resume_text, **options)['overall_score']
+
+    def _llm_calls(self):
+        return self.client.chat.completions.create.call_count
+
+    def test_key_depends_on_request_parameters(self):
+        key = make_llm_cache_key(self.resume_text, None, 'gpt-3.5-turbo', 0.5, 2)
+        # Пробелы и пустые строки, которые добавляет извлечение текста, ключ не меняют
+        self.assertEqual(
+            make_llm_cache_key('  Python   developer\n\n\nExperience: Django, Celery, PostgreSQL \n', '', 'gpt-3.5-turbo', 0.5, 2),
+            key,
+        )
+        for changed in (
+            (self.resume_text + ', Redis', None, 'gpt-3.5-turbo', 0.5, 2),
+            (self.resume_text, 'Python developer', 'gpt-3.5-turbo', 0.5, 2),
+            (self.resume_text, None, 'gpt-4o-mini', 0.5, 2),
+            (self.resume_text, None, 'gpt-3.5-turbo', 0.2, 2),
+            (self.resume_text, None, 'gpt-3.5-turbo', 0.5, 3),
+        ):
+            self.assertNotEqual(make_llm_cache_key(*changed), key)
+
+    def test_repeated_analysis_is_served_from_cache(self):
+        self.assertEqual(self._analyze(), 70)
+        self.assertEqual(self._analyze(), 70)
+        self.analyzer.llm_cache.clear_local()
+        self.assertEqual(self._analyze(), 70)
+
+        self.assertEqual(self._llm_calls(), 1)
+        stats = self.analyzer.llm_cache.stats()
+        self.assertEqual((stats['misses'], stats['local_hits'], stats['shared_hits']), (1, 1, 1))
+
+        # Бюджет токенов меняет текст промпта и входит в ключ
+        self.analyzer.token_budget += 1
+        self.assertEqual(self._analyze(), 71)
+
+    def test_bypass_refreshes_cached_response(self):
+        self.assertEqual(self._analyze(), 70)
+        self.assertEqual(self._analyze(use_cache=False), 71)
+        self.assertEqual(self._analyze(), 71)
+
+        self.assertEqual(self._llm_calls(), 2)
+        stats = self.analyzer.llm_cache.stats()
+        self.assertEqual((stats['bypassed'], stats['misses'], stats['local_hits']), (1, 1, 1))
+
+    @override_settings(LLM_CACHE_ENABLED=False)
+    def test_disabled_cache_is_not_read_or_written(self):
+        self.assertEqual(self._analyze(), 70)
+        self.assertEqual(self._analyze(), 71)
+        self.assertEqual(self._analyze(use_cache=False), 72)
+
+        self.assertEqual(self._llm_calls(), 3)
+        stats = self.analyzer.llm_cache.stats()
+        self.assertEqual([stats[name] for name in ('local_hits', 'shared_hits', 'misses', 'bypassed')], [0] * 4)
+        self.assertEqual(stats['local_entries'], 0)
+
+
+class SkillMatcherTests(SimpleTestCase):
+    def test_respects_word_boundaries(self):
+        matcher = SkillMatcher.from_names(['Java', 'Go', 'SQL'])
+        self.assertEqual(matcher.find_values('JavaScript, Golang, MySQL'), [])
+        self.assertEqual(matcher.find_values('java/go (SQL)'), ['Java', 'Go', 'SQL'])
+
+    def test_finds_terms_with_symbol_edges(self):
+        # Граница слова проверяется только с буквенно-цифровой стороны термина
+        matcher = SkillMatcher.from_names(['C++', 'C#', '.NET'])
+        self.assertEqual(matcher.find_values('Опыт: C++, C# и .NET'), ['C++', 'C#', '.NET'])
+        self.assertEqual(matcher.find_values('ABC++, MC# и ASP.NETCore'), [])
+
+    def test_overlapping_terms_and_offsets(self):
+        text = 'Senior Machine Learning engineer'
+        matcher = SkillMatcher.from_names(['Machine Learning', 'Learning', 'ML'])
+        matches = {(match.value, text[match.start:match.end]) for match in matcher.finditer(text)}
+        self.assertEqual(matches, {('Machine Learning', 'Machine Learning'), ('Learning', 'Learning')})
+
+    def test_values_in_term_order(self):
+        matcher = SkillMatcher([('python', 1), ('py', 1), ('django', 2)])
+        self.assertEqual(matcher.find_values('Django, PY'), [1, 2])
+        self.assertEqual(len(matcher), 3)
+
+
+class PromptBuilderTests(SimpleTestCase):
+    def setUp(self):
+        # Оценка токенов по длине слов не зависит от наличия tiktoken
+        patcher = mock.patch.object(prompt_builder, 'tiktoken', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _resume(self):
+        experience = '\n'.join(f'- Project {number}: built services with Django and Celery' for number in range(20))
+        return (
+            'Ivan Petrov\nivan@example.com\n\nSkills\nPython, Django, PostgreSQL\n\n'
+            f'Experience\n{experience}\n\nEducation\nKazNU, 2015\n'
+        )
+
+    def test_compact_text_drops_page_furniture(self):
+        text = (
+            'Иван Петров | Резюме\nОпыт работы\nPython   developer,\tAcme\n\n- Разработка API\n- Код-ревью\n'
+            'Page 1 of 2\f'
+            'Иван Петров | Резюме\nPython developer, Beta\n- Разработка API\n- Наставничество\n'
+            'Образование\nКазНУ\n- 2 -'
+        )
+        # Колонтитул остается один раз, повтор внутри страницы сохраняется
+        self.assertEqual(compact_text(text).split('\n'), [
+            'Иван Петров | Резюме', 'Опыт работы', 'Python developer, Acme', '- Разработка API', '- Код-ревью',
+            'Python developer, Beta', '- Разработка API', '- Наставничество', 'Образование', 'КазНУ',
+        ])
+
+    def test_compact_text_keeps_single_page_lines(self):
+        self.assertEqual(compact_text('Навыки\nPython\nНавыки\nPython'), 'Навыки\nPython\nНавыки\nPython')
+        self.assertEqual(compact_text(None), '')
+
+    def test_fit_to_budget_keeps_text_within_budget(self):
+        text = self._resume()
+        self.assertEqual(fit_to_budget(text, count_tokens(text)), text)
+
+        for budget in (60, 100, 200):
+            fitted = fit_to_budget(text, budget)
+            self.assertLessEqual(count_tokens(fitted), budget)
+            # Опыт работы имеет приоритет и обрезается по строкам, заголовки разделов сохраняются
+            self.assertIn('- Project 0: built services with Django and Celery', fitted)
+            self.assertNotIn('- Project 19', fitted)
+            self.assertIn(f'\n{OMITTED_MARKER}\n\nEducation', fitted)
+
+        fitted = fit_to_budget(text, 100)
+        self.assertIn('Skills\nPython, Django, PostgreSQL', fitted)
+        self.assertIn('Education\nKazNU, 2015', fitted)
+
+    def test_fit_to_budget_cuts_single_line_by_words(self):
+        fitted = fit_to_budget(' '.join(['word'] * 200), 50)
+        self.assertTrue(fitted.startswith('word word'))
+        self.assertLessEqual(count_tokens(fitted), 50)
+
+    def test_failed_encoding_load_falls_back_to_estimate(self):
+        tiktoken = mock.Mock()
+        tiktoken.encoding_for_model.side_effect = OSError('network is unreachable')
+        prompt_builder._get_encoding.cache_clear()
+        self.addCleanup(prompt_builder._get_encoding.cache_clear)
+
+        with mock.patch.object(prompt_builder, 'tiktoken', tiktoken):
+            self.assertEqual(count_tokens('Python developer'), 5)
+            self.assertEqual(count_tokens('Python developer'), 5)
+        tiktoken.encoding_for_model.assert_called_once()
+
+
+@unittest.skipUnless(os.name == 'posix', 'Лимиты пула извлечения требуют POSIX')
+class ExtractionPoolLimitTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.directory = directory
+
+    def _extract(self, name, data, **options):
+        path = os.path.join(self.directory, f'{name}.pdf')
+        with open(path, 'wb') as f:
+            f.write(data)
+        pool = ExtractionPool(max_files_per_child=1, **options)
+        self.addCleanup(pool.close)
+        return pool.extract(path, 'pdf', 20, 100_000)
+
+    def test_normal_file(self):
+        result = self._extract('normal', normal_resume(), timeout=20, memory_limit_mb=512)
+        self.assertEqual(result.status, OK)
+        self.assertIn('Python Django developer', result.extraction.text)
+
+    def test_timeout(self):
+        result = self._extract('operator_flood', operator_flood(), timeout=1, memory_limit_mb=512)
+        self.assertEqual(result.status, TIMEOUT)
+        self.assertTrue(result.is_poison)
+        # Запас на завершение процесса
+        self.assertLess(result.elapsed, 3)
+
+    def test_memory_limit(self):
+        result = self._extract('decompression_bomb', decompression_bomb(512), timeout=20, memory_limit_mb=256)
+        self.assertEqual(result.status, MEMORY_LIMIT)
+        self.assertTrue(result.is_poison)
+
+    def test_too_deep_document_is_not_retried(self):
+        with mock.patch('resume_analyzer.utils.extraction_worker.extract_resume_text', side_effect=RecursionError):
+            response = handle_request({'path': 'resume.pdf', 'file_type': 'pdf', 'max_pages': 1, 'max_chars': 1})
+        self.assertEqual(response['status'], TOO_DEEP)
+
+        pool = ExtractionPool(timeout=1, memory_limit_mb=0)
+        with mock.patch.object(pool, 'extract', return_value=PoolResult(TOO_DEEP, error=response['error'])):
+            with self.assertRaises(ExtractionAborted) as raised:
+                pool.extract_or_raise('resume.pdf', 'pdf', 1, 1)
+        self.assertEqual(raised.exception.status, TOO_DEEP)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ClaimAnalysisTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(email='seeker@example.com', password='password')
+        self.resume = Resume.objects.create(user=user, title='Резюме', file='resumes/resume.pdf')
+        request_analysis(self.resume)
+
+    def _generation(self):
+        return Resume.objects.values_list('analysis_generation', flat=True).get(id=self.resume.id)
+
+    def test_claims_latest_generation_once(self):
+        generation = self._generation()
+
+        self.assertEqual(claim_analysis(self.resume.id), generation)
+        self.assertIsNone(claim_analysis(self.resume.id))
+        self.assertEqual(Resume.objects.get(id=self.resume.id).status, Resume.ANALYZING)
+
+    def test_retry_reclaims_same_generation(self):
+        generation = claim_analysis(self.resume.id)
+        self.assertEqual(claim_analysis(self.resume.id, retrying=True), generation)
+
+    def test_new_request_supersedes_running_generation(self):
+        old = claim_analysis(self.resume.id)
+        new = request_analysis(self.resume.id)['generation']
+
+        self.assertEqual(new, old + 1)
+        self.assertFalse(is_current(self.resume.id, old))
+        # Повтор устаревшего запуска берет последнее поколение, а не свое
+        self.assertEqual(claim_analysis(self.resume.id, retrying=True), new)
+        self.assertTrue(is_current(self.resume.id, new))
+
+    def test_merged_requests_share_generation(self):
+        request_analysis(self.resume.id)
+        generation = request_analysis(self.resume.id)['generation']
+
+        self.assertEqual(claim_analysis(self.resume.id), generation)
+        self.assertIsNone(claim_analysis(self.resume.id))
+
+    def test_missing_resume(self):
+        self.assertIsNone(claim_analysis(self.resume.id + 1))
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ResumeSignalTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        self.user = User.objects.create_user(email='seeker@example.com', password='password')
+
+    def _create_resume(self):
+        return Resume.objects.create(
+            user=self.user, title='Резюме', file=SimpleUploadedFile('resume.pdf', b'%PDF-1.4')
+        )
+
+    def test_saving_resume_does_not_request_analysis(self):
+        # Анализ запрашивают представления и админка через диспетчер, а не сигнал
+        resume = self._create_resume()
+        self.assertEqual(Resume.objects.get(id=resume.id).analysis_generation, 0)
+
+    def test_file_is_removed_after_delete_commits(self):
+        resume = self._create_resume()
+        storage, name = resume.file.storage, resume.file.name
+        self.assertTrue(storage.exists(name))
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            resume.delete()
+        self.assertTrue(storage.exists(name))
+
+        for callback in callbacks:
+            callback()
+        self.assertFalse(storage.exists(name))
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class SkillCatalogTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        catalog._catalog = None
+        self.addCleanup(setattr, catalog, '_catalog', None)
+        self.python = Skill.objects.create(name='Python', category='languages')
+
+    def _create_skill(self, name):
+        # Версия увеличивается после фиксации транзакции
+        with self.captureOnCommitCallbacks(execute=True):
+            return Skill.objects.create(name=name, category='languages')
+
+    def test_snapshot_is_reused_until_version_bump(self):
+        snapshot = get_skill_catalog()
+        self.assertIs(get_skill_catalog(), snapshot)
+
+        # Другой процесс меняет каталог: в этом процессе остается прежний снимок,
+        # пока не изменится общая версия
+        Skill.objects.filter(id=self.python.id).update(name='Python 3')
+        self.assertIs(get_skill_catalog(), snapshot)
+
+        self._create_skill('Go')
+        reloaded = get_skill_catalog()
+
+        self.assertIsNot(reloaded, snapshot)
+        self.assertGreater(reloaded.version, snapshot.version)
+        self.assertEqual({entry.name for entry in reloaded.entries}, {'Python 3', 'Go'})
+
+    def test_aliases_resolve_to_skill(self):
+        postgres = self._create_skill('PostgreSQL')
+        get_skill_catalog()
+        with self.captureOnCommitCallbacks(execute=True):
+            SkillAlias.objects.create(skill=postgres, name='  Postgres ')
+            SkillAlias.objects.create(skill=postgres, name='Postgre SQL')
+
+        snapshot = get_skill_catalog()
+
+        self.assertEqual(
+            [entry.id for entry in snapshot.find_skills('Python и POSTGRE SQL')],
+            [postgres.id, self.python.id],
+        )
+        resolved = snapshot.resolve_names(['postgres', 'PostgreSQL', 'Python (3.x)', 'Rust', None])
+        self.assertEqual([entry.name for entry in resolved], ['PostgreSQL', 'Python'])
+
+
+class MergeLlmAnalysisTests(SimpleTestCase):
+    def test_merges_llm_fields_and_keeps_rules_score(self):
+        analysis = {
+            'skills_found': ['Python', 'Django'],
+            'skill_count': 2,
+            'overall_score': 70,
+            'format_quality': 'rules',
+            'contact_info': {'email': 'seeker@example.com'},
+        }
+        llm = {
+            'skills_found': ['django', 'Docker', 'PostgreSQL', None],
+            'overall_score': 85,
+            'format_quality': 'good',
+            'improvement_suggestions': ['Добавить опыт'],
+            'contact_info': {},
+        }
+
+        merged = merge_llm_analysis(analysis, llm)
+
+        self.assertEqual(merged['skills_found'], ['Python', 'Django', 'Docker', 'PostgreSQL'])
+        self.assertEqual(merged['skill_count'], 4)
+        self.assertEqual(merged['overall_score'], 70)
+        self.assertEqual(merged['ai_overall_score'], 85)
+        self.assertEqual(merged['format_quality'], 'good')
+        self.assertEqual(merged['improvement_suggestions'], ['Добавить опыт'])
+        # Поля вне LLM_MERGED_FIELDS остаются от правил
+        self.assertEqual(merged['contact_info'], {'email': 'seeker@example.com'})
+        self.assertEqual(analysis['skills_found'], ['Python', 'Django'])
+
+    def test_without_llm_score(self):
+        merged = merge_llm_analysis({'skills_found': [], 'overall_score': 40}, {})
+        self.assertNotIn('ai_overall_score', merged)
+        self.assertEqual((merged['skill_count'], merged['overall_score']), (0, 40))
@@ -1,29 +1,44 @@
+import uuid
 import logging
 from django.shortcuts import get_object_or_404
 from django.http import FileResponse, Http404
 from django.conf import settings
-from django.db.models import Count, Q, Case, When, Value, IntegerField
 
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.reverse import reverse
 import datetime
 from bson.objectid import ObjectId
 from accounts.permissions import IsOwnerOrAdmin, IsJobseeker, IsAdmin, ReadOnly
 from jobs.models import Job
-from resume_analyzer.utils.ai_analyzer import AIResumeAnalyzer
 from resumes.models import Resume, Skill
 from resumes.serializers import (
     ResumeSerializer, ResumeListSerializer, SkillSerializer, 
     AnalysisResultSerializer
 )
-from resumes.tasks import analyze_resume
+from resumes.dispatch import request_analysis
+from resumes.tasks import (
+    GPT_JOB_COMPLETED, GPT_JOB_FAILED, GPT_JOB_QUEUED, gpt_analyze_resume,
+)
+from resume_analyzer.utils.circuit_breaker import get_circuit_breaker
+from resume_analyzer.utils.llm_cache import get_llm_cache
 from resume_analyzer.utils.mongodb import get_mongodb_db
 
 logger = logging.getLogger(__name__)
 
+# Поля состояния AI-анализа в документе resume_analysis
+GPT_JOB_FIELDS = {
+    "gpt_analysis": 1,
+    "gpt_analysis_job_id": 1,
+    "gpt_analysis_status": 1,
+    "gpt_analysis_error": 1,
+    "gpt_analysis_date": 1,
+    "gpt_analysis_requested_at": 1,
+}
+
 
 class SkillViewSet(viewsets.ModelViewSet):
     queryset = Skill.objects.all().order_by('category', 'name')
@@ -111,8 +126,7 @@ class ResumeViewSet(viewsets.ModelViewSet):
         resume = serializer.save(user=self.request.user)
         
         try:
-            analyze_resume.delay(resume.id)
-            logger.info(f"Задача анализа запущена для резюме {resume.id}")
+            request_analysis(resume)
         except Exception as e:
             logger.error(f"Ошибка при запуске задачи анализа резюме {resume.id}: {e}")
             resume.status = Resume.FAILED
@@ -124,11 +138,8 @@ class ResumeViewSet(viewsets.ModelViewSet):
     def reanalyze(self, request, pk=None):
         resume = self.get_object()
         
-        resume.status = Resume.PENDING
-        resume.save(update_fields=['status'])
-        
         try:
-            analyze_resume.delay(resume.id)
+            request_analysis(resume)
             return Response({
                 'message': 'Анализ резюме запущен успешно',
                 'resume_id': resume.id
@@ -168,10 +179,8 @@ class ResumeViewSet(viewsets.ModelViewSet):
             
         try:
             try:
-                db = get_mongodb_db()
-                collection = db.resume_analysis
-                
-                analysis_result = collection.find_one({"_id": resume.mongodb_id})
+                collection, mongodb_id = self._get_analysis_collection_and_id(resume)
+                analysis_result = collection.find_one({"_id": mongodb_id})
                 if not analysis_result:
                     # Если анализ не найден, создаём тестовые данные
                     analysis_result = {
@@ -248,7 +257,7 @@ class ResumeViewSet(viewsets.ModelViewSet):
         resume = self.get_object()
         
         try:
-            resume_skills = resume.skills.values_list('id', flat=True)
+            resume_skills = list(resume.skills.values_list('id', flat=True))
             
             if not resume_skills:
                 return Response({
@@ -256,18 +265,21 @@ class ResumeViewSet(viewsets.ModelViewSet):
                     'message': 'В резюме не найдены навыки для подбора вакансий'
                 })
             
+            from jobs.matching import JOBS, get_idf_weights, get_match_options, get_skill_matrix
             from jobs.models import Job
             from jobs.serializers import JobListSerializer
             
-            matching_jobs = Job.objects.filter(
-                required_skills__in=resume_skills,
-                status=Job.ACTIVE 
-            ).distinct().annotate(
-                matching_skills_count=Count('required_skills', 
-                                        filter=Q(required_skills__in=resume_skills))
-            ).order_by('-matching_skills_count')
+            try:
+                metric, limit = get_match_options(request.query_params)
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
             
-            matching_jobs = matching_jobs.select_related('company').prefetch_related('required_skills')
+            # Оценки считаются по матрице навыков в памяти, из БД загружаются только лучшие вакансии
+            matches, total = get_skill_matrix(JOBS).match(resume_skills, metric, limit, idf=get_idf_weights())
+            jobs = Job.objects.filter(
+                id__in=[match.id for match in matches], status=Job.ACTIVE
+            ).select_related('company').prefetch_related('required_skills').in_bulk()
+            matching_jobs = [jobs[match.id] for match in matches if match.id in jobs]
             
             serializer = JobListSerializer(
                 matching_jobs, 
@@ -275,9 +287,16 @@ class ResumeViewSet(viewsets.ModelViewSet):
                 context={'request': request}
             )
             
+            matches_by_id = {match.id: match for match in matches}
+            data = serializer.data
+            for item in data:
+                match = matches_by_id[item['id']]
+                item['matching_skills_count'] = match.overlap
+                item['match_score'] = round(match.score, 4)
+            
             return Response({
-                'jobs': serializer.data,
-                'count': matching_jobs.count()
+                'jobs': data,
+                'count': total
             })
             
         except Exception as e:
@@ -287,66 +306,121 @@ class ResumeViewSet(viewsets.ModelViewSet):
                 'detail': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def _get_analysis_collection_and_id(self, resume):
+        collection = get_mongodb_db().resume_analysis
+        
+        # Попробуем преобразовать MongoDB ID в ObjectId, если он является строкой
+        mongodb_id = resume.mongodb_id
+        if isinstance(mongodb_id, str):
+            try:
+                mongodb_id = ObjectId(mongodb_id)
+            except:
+                pass
+        
+        return collection, mongodb_id
+    
     @action(detail=True, methods=['post'])
     def gpt_analyze(self, request, pk=None):
         resume = self.get_object()
         
         try:
-            if resume.mongodb_id:
-                db = get_mongodb_db()
-                collection = db.resume_analysis
-                
-                # Попробуем преобразовать MongoDB ID в ObjectId, если он является строкой
-                mongodb_id = resume.mongodb_id
-                if isinstance(mongodb_id, str):
-                    try:
-                        mongodb_id = ObjectId(mongodb_id)
-                    except:
-                        pass
-                
-                analysis_record = collection.find_one({"_id": mongodb_id})
-                
-                # Добавляем проверку на None
-                if analysis_record is None:
-                    return Response({
-                        'error': 'Результаты анализа не найдены в базе данных. Возможно, анализ еще не завершен.'
-                    }, status=status.HTTP_404_NOT_FOUND)
-                
-                resume_text = analysis_record.get("extracted_text", "")
-                
-                # Проверяем, есть ли текст резюме
-                if not resume_text:
-                    return Response({
-                        'error': 'В результатах анализа не найден текст резюме.'
-                    }, status=status.HTTP_400_BAD_REQUEST)
-                    
-            else:
+            if not resume.mongodb_id:
                 return Response({
                     'error': 'Анализ резюме еще не был выполнен. Пожалуйста, дождитесь завершения базового анализа.'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            analyzer = AIResumeAnalyzer()
-            ai_analysis = analyzer.analyze_resume(resume_text)
+            collection, mongodb_id = self._get_analysis_collection_and_id(resume)
+            analysis_record = collection.find_one({"_id": mongodb_id}, {"extracted_text": 1})
             
-            if resume.mongodb_id:
-                # Сохраняем результаты AI анализа в MongoDB
-                collection.update_one(
-                    {"_id": mongodb_id},
-                    {"$set": {"gpt_analysis": ai_analysis, "gpt_analysis_date": datetime.datetime.now()}}
-                )
+            # Добавляем проверку на None
+            if analysis_record is None:
+                return Response({
+                    'error': 'Результаты анализа не найдены в базе данных. Возможно, анализ еще не завершен.'
+                }, status=status.HTTP_404_NOT_FOUND)
+            
+            # Проверяем, есть ли текст резюме
+            if not analysis_record.get("extracted_text"):
+                return Response({
+                    'error': 'В результатах анализа не найден текст резюме.'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            # Анализ выполняется в очереди llm, идентификатор задания совпадает с ID задачи Celery
+            job_id = str(uuid.uuid4())
+            collection.update_one(
+                {"_id": mongodb_id},
+                {
+                    "$set": {
+                        "gpt_analysis_job_id": job_id,
+                        "gpt_analysis_status": GPT_JOB_QUEUED,
+                        "gpt_analysis_requested_at": datetime.datetime.now(),
+                    },
+                    "$unset": {"gpt_analysis_error": ""},
+                }
+            )
+            # refresh=true - повторный запрос к LLM без использования кэша ответов
+            refresh = str(request.data.get('refresh', request.query_params.get('refresh', ''))).lower() in ('1', 'true')
+            gpt_analyze_resume.apply_async(args=(resume.id, str(mongodb_id), job_id, refresh), task_id=job_id)
             
             return Response({
-                'analysis': ai_analysis,
-                'message': 'Анализ с использованием AI успешно выполнен'
-            })
+                'job_id': job_id,
+                'status': GPT_JOB_QUEUED,
+                'status_url': reverse('resume-gpt-analysis-status', args=[resume.id], request=request),
+                'message': 'AI анализ резюме поставлен в очередь'
+            }, status=status.HTTP_202_ACCEPTED)
             
         except Exception as e:
-            logger.error(f"Ошибка при выполнении AI анализа резюме {resume.id}: {str(e)}")
+            logger.error(f"Ошибка при запуске AI анализа резюме {resume.id}: {str(e)}")
             return Response({
-                'error': 'Не удалось выполнить AI анализ резюме',
+                'error': 'Не удалось запустить AI анализ резюме',
                 'detail': str(e)
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-            
+    
+    def _get_gpt_job_state(self, resume):
+        collection, mongodb_id = self._get_analysis_collection_and_id(resume)
+        record = collection.find_one({"_id": mongodb_id}, GPT_JOB_FIELDS)
+        if record is None:
+            return None
+        
+        state = {
+            'job_id': record.get('gpt_analysis_job_id'),
+            'status': record.get('gpt_analysis_status'),
+            'requested_at': record.get('gpt_analysis_requested_at'),
+            'completed_at': record.get('gpt_analysis_date'),
+        }
+        if state['status'] == GPT_JOB_COMPLETED:
+            state['analysis'] = record.get('gpt_analysis')
+        elif state['status'] == GPT_JOB_FAILED:
+            state['error'] = record.get('gpt_analysis_error')
+        elif state['status'] is None and record.get('gpt_analysis') is not None:
+            # Результат синхронного анализа, выполненного до появления заданий
+            state.update(status=GPT_JOB_COMPLETED, analysis=record['gpt_analysis'])
+        return state
+    
+    @action(detail=True, methods=['get'], url_path='gpt_analysis/status')
+    def gpt_analysis_status(self, request, pk=None):
+        resume = self.get_object()
+        
+        if not resume.mongodb_id:
+            return Response({'error': 'Анализ для этого резюме ещё не завершен'}, status=status.HTTP_404_NOT_FOUND)
+        
+        try:
+            state = self._get_gpt_job_state(resume)
+        except Exception as e:
+            logger.error(f"Ошибка при получении состояния AI анализа резюме {resume.id}: {e}")
+            return Response({
+                'error': 'Не удалось получить состояние AI анализа'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+        if state is None or state['job_id'] is None and state['status'] is None:
+            return Response({'error': 'AI анализ для этого резюме не запрашивался'}, status=status.HTTP_404_NOT_FOUND)
+        
+        job_id = request.query_params.get('job_id')
+        if job_id and state['job_id'] != job_id:
+            state['superseded'] = True
+        
+        return Response(state)
+
+
 class AnalysisHistoryViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
     
@@ -450,4 +524,18 @@ class AnalysisHistoryViewSet(viewsets.ViewSet):
             logger.error(f"Ошибка при получении статистики анализа для пользователя {user.id}: {e}")
             return Response({
                 'error': 'Не удалось получить статистику анализа'
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated & IsAdmin])
+    def llm_metrics(self, request):
+        # Состояние выключателя LLM и кэша ответов, общее для всех процессов
+        try:
+            return Response({
+                'circuit_breaker': get_circuit_breaker().snapshot(),
+                'response_cache': get_llm_cache().stats(),
+            })
+        except Exception as e:
+            logger.error(f"Ошибка при получении метрик LLM: {e}")
+            return Response({
+                'error': 'Не удалось получить метрики LLM'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -23,6 +23,12 @@ import ResumeAnalysis from '../../components/resume/ResumeAnalysis';
 import MatchingJobs from '../../components/resume/MatchingJobs';
 import AIAnalysisResults from '../../components/resume/AIAnalysisResults';
 
+// Опрос состояния AI анализа, который выполняется в фоновой очереди
+const AI_ANALYSIS_POLL_INTERVAL = 2000;
+const AI_ANALYSIS_POLL_TIMEOUT = 5 * 60 * 1000;
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
 const ResumeDetailPage = () => {
   const { id } = useParams();
   const navigate = useNavigate();
@@ -91,9 +97,28 @@ const ResumeDetailPage = () => {
       setAiAnalysisError(null);
       
       const response = await resumeService.gptAnalyze(id);
-      console.log('Результаты AI анализа:', response.data);
+      const jobId = response.data.job_id;
+      
+      // Анализ поставлен в очередь: опрашиваем состояние задания до завершения
+      const deadline = Date.now() + AI_ANALYSIS_POLL_TIMEOUT;
+      let state = response.data;
+      while (state.status !== 'completed' && state.status !== 'failed') {
+        if (state.superseded) {
+          throw new Error('AI анализ был перезапущен другим запросом');
+        }
+        if (Date.now() > deadline) {
+          throw new Error('AI анализ выполняется слишком долго, попробуйте обновить страницу позже');
+        }
+        await sleep(AI_ANALYSIS_POLL_INTERVAL);
+        state = (await resumeService.getGptAnalysisStatus(id, jobId)).data;
+      }
+      
+      if (state.status === 'failed') {
+        throw new Error(state.error || 'Не удалось выполнить AI анализ резюме');
+      }
+      console.log('Результаты AI анализа:', state.analysis);
       
-      setAiAnalysisResults(response.data.analysis);
+      setAiAnalysisResults(state.analysis);
       
       // Прокрутка к результатам анализа
       setTimeout(() => {
@@ -107,6 +132,7 @@ const ResumeDetailPage = () => {
       console.error('Ошибка при выполнении AI анализа:', err);
       setAiAnalysisError(
         err.response?.data?.error || 
+        err.message ||
         'Не удалось выполнить AI анализ резюме'
       );
     } finally {
@@ -77,6 +77,9 @@ const resumeService = {
   getAnalysisResults: (id) => api.get(`/resumes/resumes/${id}/analysis/`),
   getMatchingJobs: (id) => api.get(`/resumes/resumes/${id}/matching_jobs/`),
   gptAnalyze: (id) => api.post(`/resumes/resumes/${id}/gpt_analyze/`),
+  getGptAnalysisStatus: (id, jobId) => api.get(`/resumes/resumes/${id}/gpt_analysis/status/`, {
+    params: { job_id: jobId },
+  }),
 };
 
 const jobService = {